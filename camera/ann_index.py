@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+โมดูลดัชนีค้นหาเวกเตอร์ใกล้ที่สุดสำหรับแกลเลอรีการจดจำบุคคลของระบบ MANTA
+(Nearest-neighbour index module for MANTA re-ID galleries)
+
+ดัชนีทุกแบบใช้ความคล้ายคลึงแบบโคไซน์ (เวกเตอร์ต้อง normalize แล้ว) และรองรับ
+การเพิ่ม/ลบทีละรายการสำหรับการลบตามอายุ
+- BruteForceIndex: ค้นหาแบบตรงทั้งหมด เหมาะกับแกลเลอรีไม่เกินไม่กี่พันรายการ
+- IVFFlatIndex: แบ่งเวกเตอร์เป็นกลุ่มด้วย k-means แล้วค้นหาเฉพาะ n_probe กลุ่มที่ใกล้ที่สุด
+  เหมาะกับแกลเลอรีหลายหมื่นรายการ
+
+ทั้งสองแบบเก็บเวกเตอร์เป็น float32, float16 หรือ int8 (dtype) และคำนวณความคล้ายคลึง
+จากค่าที่เก็บโดยตรง int8 ใช้หน่วยความจำราว 1/4 ของ float32
+
+รัน `python -m camera.ann_index` เพื่อเปรียบเทียบ recall เวลาค้นหาและหน่วยความจำกับการค้นหาแบบตรง
+"""
+
+import argparse
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.vector_utils import top_k
+
+
+# Storage types of gallery vectors (int8 keeps one float32 scale per vector)
+STORAGE_DTYPES = {
+    'float32': np.float32,
+    'float16': np.float16,
+    'int8': np.int8,
+}
+
+# Rows converted to float32 at a time when scoring quantized vectors (bounds the temporary)
+_SCORE_CHUNK = 4096
+
+
+def _storage_dtype(dtype: Any) -> np.dtype:
+    name = np.dtype(dtype).name if not isinstance(dtype, str) else dtype
+    if name not in STORAGE_DTYPES:
+        raise ValueError(f"ไม่รองรับชนิดข้อมูล '{dtype}' (รองรับ: {', '.join(STORAGE_DTYPES)})")
+    return np.dtype(STORAGE_DTYPES[name])
+
+
+class _VectorList:
+    """
+    อาร์เรย์เวกเตอร์แบบต่อเนื่องที่ขยายได้ การลบจะย้ายแถวสุดท้ายมาแทนที่
+    ทำให้การค้นหาเป็นการคูณเมทริกซ์ครั้งเดียวโดยไม่มีแถวว่าง
+
+    เวกเตอร์เก็บเป็น float32, float16 หรือ int8 ที่มีสเกลต่อเวกเตอร์ (ค่า = int8 * scale)
+    ความคล้ายคลึงคำนวณจากค่าที่เก็บโดยตรงทีละช่วงแถว
+    """
+
+    __slots__ = ('vectors', 'scales', 'ids', 'size')
+
+    def __init__(self, dim: int, capacity: int = 16, dtype: Any = np.float32):
+        dtype = _storage_dtype(dtype)
+        self.vectors = np.empty((capacity, dim), dtype=dtype)
+        self.scales = np.empty(capacity, dtype=np.float32) if dtype == np.int8 else None
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for vectors, scales and ids."""
+        return self.vectors.nbytes + self.ids.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _encode(self, vectors: np.ndarray, rows: slice) -> None:
+        if self.scales is None:
+            self.vectors[rows] = vectors
+            return
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        self.scales[rows] = scales
+        self.vectors[rows] = np.rint(vectors / scales[:, np.newaxis])
+
+    def append(self, ids: np.ndarray, vectors: np.ndarray) -> int:
+        """Append rows and return the position of the first one."""
+        start, end = self.size, self.size + len(ids)
+        if end > len(self.ids):
+            capacity = max(end, 2 * len(self.ids))
+            grown = np.empty((capacity, self.vectors.shape[1]), dtype=self.vectors.dtype)
+            grown[:start] = self.vectors[:start]
+            self.vectors = grown
+            self.ids = np.resize(self.ids, capacity)
+            if self.scales is not None:
+                self.scales = np.resize(self.scales, capacity)
+        self._encode(vectors, slice(start, end))
+        self.ids[start:end] = ids
+        self.size = end
+        return start
+
+    def get(self, position: int) -> np.ndarray:
+        """Stored vector at position as float32."""
+        vector = self.vectors[position].astype(np.float32)
+        if self.scales is not None:
+            vector *= self.scales[position]
+        return vector
+
+    def decode(self) -> np.ndarray:
+        """All stored vectors as a float32 (size, dim) array."""
+        vectors = self.vectors[:self.size].astype(np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[:self.size, np.newaxis]
+        return vectors
+
+    def set(self, position: int, vector: np.ndarray) -> None:
+        """Overwrite the vector at position."""
+        self._encode(np.asarray(vector, dtype=np.float32).reshape(1, -1), slice(position, position + 1))
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """(Q, size) dot products of float32 queries with the stored vectors."""
+        size = self.size
+        if self.vectors.dtype == np.float32:
+            return queries @ self.vectors[:size].T
+        out = np.empty((len(queries), size), dtype=np.float32)
+        for start in range(0, size, _SCORE_CHUNK):
+            end = min(start + _SCORE_CHUNK, size)
+            out[:, start:end] = queries @ self.vectors[start:end].T.astype(np.float32)
+        if self.scales is not None:
+            out *= self.scales[:size]
+        return out
+
+    def remove_at(self, position: int) -> Optional[int]:
+        """Remove a row; returns the id moved into its place (None if it was the last row)."""
+        last = self.size - 1
+        self.size = last
+        if position == last:
+            return None
+        self.vectors[position] = self.vectors[last]
+        self.ids[position] = self.ids[last]
+        if self.scales is not None:
+            self.scales[position] = self.scales[last]
+        return int(self.ids[position])
+
+    def clear(self) -> None:
+        self.size = 0
+
+
+class BruteForceIndex:
+    """
+    ดัชนีค้นหาแบบตรง (เทียบกับทุกเวกเตอร์) ใช้เป็นค่าเริ่มต้นและเป็นค่าอ้างอิงของ recall
+    """
+
+    def __init__(self, dim: Optional[int] = None, dtype: str = 'float32'):
+        """
+        เริ่มต้นดัชนี
+
+        Args:
+            dim: ขนาดเวกเตอร์ (None = กำหนดจากเวกเตอร์แรกที่เพิ่ม)
+            dtype: ชนิดข้อมูลที่เก็บ 'float32', 'float16' หรือ 'int8' (สเกลต่อเวกเตอร์)
+        """
+        self.dim = dim
+        self.dtype = _storage_dtype(dtype)
+        self._list: Optional[_VectorList] = None
+        self._where: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._where
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the stored vectors (excluding the id lookup table)."""
+        return self._list.nbytes if self._list is not None else 0
+
+    def _prepare(self, ids: Iterable[int], vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.asarray(list(ids), dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"ขนาดเวกเตอร์ไม่ตรงกับดัชนี ({vectors.shape[1]} != {self.dim})")
+        duplicates = [i for i in ids.tolist() if i in self._where]
+        if duplicates or len(set(ids.tolist())) != len(ids):
+            raise ValueError(f"รหัสซ้ำในดัชนี: {duplicates or ids.tolist()}")
+        return ids, vectors
+
+    def add(self, ids: Iterable[int], vectors: np.ndarray) -> None:
+        """
+        เพิ่มเวกเตอร์
+
+        Args:
+            ids: รหัสจำนวนเต็มที่ไม่ซ้ำของแต่ละเวกเตอร์
+            vectors: (N, D) เวกเตอร์ที่ normalize แล้ว
+        """
+        ids, vectors = self._prepare(ids, vectors)
+        if self._list is None:
+            self._list = _VectorList(self.dim, dtype=self.dtype)
+        start = self._list.append(ids, vectors)
+        for offset, item_id in enumerate(ids.tolist()):
+            self._where[item_id] = start + offset
+
+    def remove(self, ids: Iterable[int]) -> int:
+        """
+        ลบเวกเตอร์ตามรหัส (รหัสที่ไม่มีในดัชนีจะถูกข้าม)
+
+        Returns:
+            int: จำนวนเวกเตอร์ที่ถูกลบ
+        """
+        removed = 0
+        for item_id in ids:
+            position = self._where.pop(int(item_id), None)
+            if position is None:
+                continue
+            moved = self._list.remove_at(position)
+            if moved is not None:
+                self._where[moved] = position
+            removed += 1
+        return removed
+
+    def get(self, item_id: int) -> np.ndarray:
+        """Copy of the stored vector (KeyError if the id is not in the index)."""
+        return self._list.get(self._where[item_id])
+
+    def update(self, item_id: int, vector: np.ndarray) -> None:
+        """Replace the stored vector of an id in place."""
+        self._list.set(self._where[item_id], vector)
+
+    def clear(self) -> None:
+        """Remove every vector."""
+        self._where.clear()
+        if self._list is not None:
+            self._list.clear()
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ค้นหา k เวกเตอร์ที่คล้ายที่สุดของแต่ละคำค้น
+
+        Args:
+            queries: (Q, D) เวกเตอร์คำค้นที่ normalize แล้ว
+            k: จำนวนผลลัพธ์ต่อคำค้น
+
+        Returns:
+            tuple: (similarities (Q, k) float32, ids (Q, k) int64) เรียงจากมากไปน้อย
+                   ตำแหน่งที่ไม่มีผลลัพธ์มีค่า (-inf, -1)
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim or np.shape(queries)[-1])
+        sims = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if not self._where:
+            return sims, ids
+
+        sims, best = top_k(self._list.scores(queries), k)
+        found = best >= 0
+        ids[found] = self._list.ids[best[found]]
+        return sims, ids
+
+
+class IVFFlatIndex(BruteForceIndex):
+    """
+    ดัชนีแบบ IVF-flat: เวกเตอร์ถูกแบ่งเป็น n_lists กลุ่มตามจุดศูนย์กลาง k-means (แบบทรงกลม)
+    การค้นหาเทียบเฉพาะเวกเตอร์ใน n_probe กลุ่มที่ใกล้คำค้นที่สุด
+
+    ก่อนมีเวกเตอร์ครบ train_size ดัชนีจะค้นหาแบบตรง เมื่อจำนวนเวกเตอร์เพิ่มเป็นสองเท่า
+    ของครั้งที่ฝึกล่าสุด จุดศูนย์กลางจะถูกคำนวณใหม่ (ค่าใช้จ่ายเฉลี่ยต่อการเพิ่มจึงคงที่)
+    """
+
+    def __init__(self, dim: Optional[int] = None, n_lists: int = 64, n_probe: int = 8,
+                 train_size: Optional[int] = None, iterations: int = 10, seed: int = 0,
+                 dtype: str = 'float32'):
+        """
+        เริ่มต้นดัชนี
+
+        Args:
+            dim: ขนาดเวกเตอร์ (None = กำหนดจากเวกเตอร์แรกที่เพิ่ม)
+            n_lists: จำนวนกลุ่ม
+            n_probe: จำนวนกลุ่มที่ค้นหาต่อคำค้น (มาก = recall สูงขึ้นแต่ช้าลง)
+            train_size: จำนวนเวกเตอร์ขั้นต่ำก่อนฝึก k-means (None = 32 * n_lists)
+            iterations: จำนวนรอบของ k-means
+            seed: ค่าเริ่มต้นของตัวสุ่ม
+            dtype: ชนิดข้อมูลที่เก็บ 'float32', 'float16' หรือ 'int8' (จุดศูนย์กลางเป็น float32 เสมอ)
+        """
+        if n_lists < 1 or n_probe < 1:
+            raise ValueError("n_lists และ n_probe ต้องมีค่าอย่างน้อย 1")
+        super().__init__(dim, dtype)
+        self.n_lists = int(n_lists)
+        self.n_probe = int(n_probe)
+        self.train_size = int(train_size) if train_size else 32 * self.n_lists
+        self.iterations = iterations
+        self.centroids: Optional[np.ndarray] = None
+        self._rng = np.random.default_rng(seed)
+        self._lists: List[_VectorList] = []
+        self._trained_at = 0
+        # id -> (list index, position); untrained vectors live in list 0
+        self._where: Dict[int, Tuple[int, int]] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the stored vectors and centroids (excluding the id lookup table)."""
+        centroids = self.centroids.nbytes if self.centroids is not None else 0
+        return sum(lst.nbytes for lst in self._lists) + centroids
+
+    def _kmeans(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means centroids (unit rows) of the given vectors."""
+        sample_size = min(len(vectors), 256 * self.n_lists)
+        sample = vectors[self._rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[self._rng.choice(sample_size, self.n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=self.n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty clusters with random points
+                sums[empty] = sample[self._rng.choice(sample_size, int(empty.sum()), replace=False)]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        return centroids.astype(np.float32)
+
+    def _all_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.concatenate([lst.ids[:lst.size] for lst in self._lists])
+        vectors = np.concatenate([lst.decode() for lst in self._lists])
+        return ids, vectors
+
+    def train(self) -> None:
+        """คำนวณจุดศูนย์กลางใหม่จากเวกเตอร์ปัจจุบันและจัดกลุ่มใหม่ทั้งหมด"""
+        if len(self) < self.n_lists:
+            return
+        ids, vectors = self._all_vectors()
+        self.centroids = self._kmeans(vectors)
+        self._lists = [_VectorList(self.dim, dtype=self.dtype) for _ in range(self.n_lists)]
+        self._where.clear()
+        self._trained_at = len(ids)
+        self._insert(ids, vectors)
+
+    def _insert(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        if self.centroids is None:
+            assignment = np.zeros(len(ids), dtype=np.intp)
+        else:
+            assignment = (vectors @ self.centroids.T).argmax(axis=1)
+        order = np.argsort(assignment, kind='stable')
+        groups = np.flatnonzero(np.diff(assignment[order])) + 1
+        for chunk in np.split(order, groups):
+            list_index = int(assignment[chunk[0]])
+            start = self._lists[list_index].append(ids[chunk], vectors[chunk])
+            for offset, item_id in enumerate(ids[chunk].tolist()):
+                self._where[item_id] = (list_index, start + offset)
+
+    def add(self, ids: Iterable[int], vectors: np.ndarray) -> None:
+        """
+        เพิ่มเวกเตอร์ (ฝึก k-means อัตโนมัติเมื่อครบ train_size หรือเพิ่มเป็นสองเท่า)
+
+        Args:
+            ids: รหัสจำนวนเต็มที่ไม่ซ้ำของแต่ละเวกเตอร์
+            vectors: (N, D) เวกเตอร์ที่ normalize แล้ว
+        """
+        ids, vectors = self._prepare(ids, vectors)
+        if len(ids) == 0:
+            return
+        if not self._lists:
+            self._lists = [_VectorList(self.dim, dtype=self.dtype)]
+        self._insert(ids, vectors)
+        size = len(self)
+        if size >= self.train_size and size >= 2 * self._trained_at:
+            self.train()
+
+    def remove(self, ids: Iterable[int]) -> int:
+        """
+        ลบเวกเตอร์ตามรหัส (รหัสที่ไม่มีในดัชนีจะถูกข้าม)
+
+        Returns:
+            int: จำนวนเวกเตอร์ที่ถูกลบ
+        """
+        removed = 0
+        for item_id in ids:
+            location = self._where.pop(int(item_id), None)
+            if location is None:
+                continue
+            list_index, position = location
+            moved = self._lists[list_index].remove_at(position)
+            if moved is not None:
+                self._where[moved] = (list_index, position)
+            removed += 1
+        return removed
+
+    def get(self, item_id: int) -> np.ndarray:
+        """Copy of the stored vector (KeyError if the id is not in the index)."""
+        list_index, position = self._where[item_id]
+        return self._lists[list_index].get(position)
+
+    def update(self, item_id: int, vector: np.ndarray) -> None:
+        """Replace the stored vector of an id, moving it to its nearest list if needed."""
+        list_index, position = self._where[item_id]
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if self.centroids is not None and int((vector @ self.centroids.T).argmax()) != list_index:
+            self.remove([item_id])
+            self._insert(np.array([item_id], dtype=np.int64), vector)
+        else:
+            self._lists[list_index].set(position, vector[0])
+
+    def clear(self) -> None:
+        """Remove every vector (the centroids are kept)."""
+        self._where.clear()
+        for lst in self._lists:
+            lst.clear()
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ค้นหา k เวกเตอร์ที่คล้ายที่สุดของแต่ละคำค้นใน n_probe กลุ่มที่ใกล้ที่สุด
+
+        Args:
+            queries: (Q, D) เวกเตอร์คำค้นที่ normalize แล้ว
+            k: จำนวนผลลัพธ์ต่อคำค้น
+
+        Returns:
+            tuple: (similarities (Q, k) float32, ids (Q, k) int64) เรียงจากมากไปน้อย
+                   ตำแหน่งที่ไม่มีผลลัพธ์มีค่า (-inf, -1)
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim or np.shape(queries)[-1])
+        sims = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if not self._where:
+            return sims, ids
+
+        if self.centroids is None:
+            probes = np.zeros((len(queries), 1), dtype=np.intp)
+        else:
+            n_probe = min(self.n_probe, self.n_lists)
+            coarse = queries @ self.centroids.T
+            probes = np.argpartition(coarse, -n_probe, axis=1)[:, -n_probe:]
+
+        for row, query in enumerate(queries):
+            lists = [self._lists[i] for i in probes[row] if self._lists[i].size]
+            if not lists:
+                continue
+            scores = np.concatenate([lst.scores(query[np.newaxis])[0] for lst in lists])
+            candidates = np.concatenate([lst.ids[:lst.size] for lst in lists])
+            row_sims, best = top_k(scores[np.newaxis], k)
+            found = best[0] >= 0
+            sims[row] = row_sims[0]
+            ids[row, found] = candidates[best[0, found]]
+        return sims, ids
+
+
+INDEX_TYPES = {
+    'brute': BruteForceIndex,
+    'ivf': IVFFlatIndex,
+}
+
+
+def create_index(kind: str = 'brute', dim: Optional[int] = None, **options: Any) -> BruteForceIndex:
+    """
+    สร้างดัชนีตามชนิด
+
+    Args:
+        kind: 'brute' หรือ 'ivf'
+        dim: ขนาดเวกเตอร์ (None = กำหนดจากเวกเตอร์แรก)
+        **options: ตัวเลือกของดัชนี (เช่น n_lists, n_probe สำหรับ 'ivf')
+
+    Returns:
+        ดัชนีที่สร้างขึ้น
+    """
+    index_class = INDEX_TYPES.get(str(kind).lower())
+    if index_class is None:
+        raise ValueError(f"ไม่รู้จักชนิดดัชนี '{kind}' (รองรับ: {', '.join(INDEX_TYPES)})")
+    if index_class is BruteForceIndex:
+        return BruteForceIndex(dim, dtype=options.get('dtype', 'float32'))
+    return index_class(dim, **options)
+
+
+def synthetic_gallery(size: int, dim: int = 128, queries: int = 1000, noise: float = 0.8,
+                      seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    สร้างแกลเลอรีและคำค้นจำลอง: คำค้นคือเวกเตอร์ในแกลเลอรีที่เพิ่มสัญญาณรบกวน
+    (เหมือนการพบบุคคลเดิมซ้ำ) แกลเลอรีมีโครงสร้างกลุ่มเล็กน้อยเช่นเดียวกับ embedding จริง
+
+    Returns:
+        tuple: (gallery (size, dim), queries (queries, dim)) normalize แล้ว
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, size // 100), dim)).astype(np.float32)
+    gallery = centers[rng.integers(0, len(centers), size)] + rng.standard_normal((size, dim)).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    picks = rng.integers(0, size, queries)
+    probes = gallery[picks] + noise * rng.standard_normal((queries, dim)).astype(np.float32) / np.sqrt(dim)
+    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+    return gallery, probes
+
+
+def benchmark(index: BruteForceIndex, gallery: np.ndarray, queries: np.ndarray,
+              k: int = 1, batch_size: int = 10) -> Dict[str, float]:
+    """
+    วัด recall@k และเวลาค้นหาของดัชนีเทียบกับการค้นหาแบบตรง
+
+    Args:
+        index: ดัชนีว่างที่จะทดสอบ
+        gallery: (N, D) เวกเตอร์ของแกลเลอรี
+        queries: (Q, D) เวกเตอร์คำค้น
+        k: จำนวนผลลัพธ์ต่อคำค้น
+        batch_size: จำนวนคำค้นต่อการเรียก (เท่ากับจำนวนบุคคลต่อเฟรม)
+
+    Returns:
+        dict: recall, build_seconds, latency_ms (ต่อการเรียก), exact_latency_ms,
+        bytes_per_vector (หน่วยความจำเวกเตอร์ของดัชนีต่อรายการ)
+    """
+    ids = np.arange(len(gallery))
+    exact = BruteForceIndex()
+    exact.add(ids, gallery)
+
+    started = time.perf_counter()
+    index.add(ids, gallery)
+    build_seconds = time.perf_counter() - started
+
+    def timed(target):
+        results = []
+        started = time.perf_counter()
+        for i in range(0, len(queries), batch_size):
+            results.append(target.search(queries[i:i + batch_size], k)[1])
+        calls = -(-len(queries) // batch_size)
+        return np.concatenate(results), (time.perf_counter() - started) * 1000.0 / calls
+
+    truth, exact_ms = timed(exact)
+    found, index_ms = timed(index)
+    hits = sum(len(np.intersect1d(a, b)) for a, b in zip(truth, found))
+    return {
+        'recall': hits / float(truth.size),
+        'build_seconds': build_seconds,
+        'latency_ms': index_ms,
+        'exact_latency_ms': exact_ms,
+        'bytes_per_vector': index.nbytes / float(len(gallery)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='เปรียบเทียบ recall และเวลาค้นหาของดัชนี IVF กับการค้นหาแบบตรง')
+    parser.add_argument('--size', type=int, default=50000, help='Gallery size')
+    parser.add_argument('--dim', type=int, default=128, help='Vector size')
+    parser.add_argument('--queries', type=int, default=1000, help='Number of queries')
+    parser.add_argument('--batch', type=int, default=10, help='Queries per search call (people per frame)')
+    parser.add_argument('--lists', type=int, default=0, help='IVF lists (0 = 4 * sqrt(size))')
+    parser.add_argument('--probes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32], help='n_probe values')
+    parser.add_argument('-k', type=int, default=1, help='Neighbours per query')
+    parser.add_argument('--dtypes', nargs='+', default=['float32'], choices=list(STORAGE_DTYPES),
+                        help='Storage types to compare (brute-force row plus IVF rows for each)')
+    args = parser.parse_args()
+
+    gallery, queries = synthetic_gallery(args.size, args.dim, args.queries)
+    n_lists = args.lists or max(1, int(4 * np.sqrt(args.size)))
+    print(f"gallery={args.size} dim={args.dim} lists={n_lists} k={args.k} batch={args.batch}")
+    print(f"{'dtype':>8} {'n_probe':>8} {'recall':>8} {'ms/call':>9} {'exact ms':>9} {'speedup':>8} {'B/vector':>9}")
+    for dtype in args.dtypes:
+        runs = [('all', BruteForceIndex(dtype=dtype))]
+        runs += [(n_probe, IVFFlatIndex(n_lists=n_lists, n_probe=n_probe, dtype=dtype)) for n_probe in args.probes]
+        for n_probe, index in runs:
+            result = benchmark(index, gallery, queries, args.k, args.batch)
+            print(f"{dtype:>8} {n_probe:>8} {result['recall']:>8.3f} {result['latency_ms']:>9.2f} "
+                  f"{result['exact_latency_ms']:>9.2f} {result['exact_latency_ms'] / result['latency_ms']:>7.1f}x "
+                  f"{result['bytes_per_vector']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+การวาดผลการตรวจจับลงบนภาพแบบขี้เกียจสำหรับระบบ MANTA
+(Lazy detection overlay rendering for MANTA system)
+
+process_frame บันทึกเพียงรายการสิ่งที่ต้องวาด (FrameAnnotations) ซึ่งไม่แตะพิกเซลและไม่คัดลอกภาพ
+FrameAnnotator วาดรายการนั้นลงในบัฟเฟอร์ที่ใช้ซ้ำเฉพาะเมื่อมีผู้ใช้ภาพ (หน้าต่างแสดงผลหรือภาพตัวอย่าง MJPEG)
+การติดตั้งแบบไม่มีจอจึงไม่มีค่าใช้จ่ายในการคัดลอกหรือวาดภาพต่อเฟรม
+"""
+
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.camera_utils import as_bgr
+
+NEW_PERSON_COLOR = (0, 255, 0)
+KNOWN_PERSON_COLOR = (0, 0, 255)
+FACE_COLOR = (255, 0, 0)
+
+
+class FrameAnnotations:
+    """
+    รายการสิ่งที่ต้องวาดของหนึ่งเฟรม พิกัดทั้งหมดเป็นของภาพความละเอียดเต็ม
+    """
+
+    __slots__ = ('frame', 'scale', 'people', 'faces')
+
+    def __init__(self, frame, scale: Tuple[float, float] = (1.0, 1.0)):
+        """
+        Args:
+            frame: ภาพที่จะใช้วาด (numpy.ndarray หรือ YUVFrame; ในโหมดสองสตรีมคือภาพเล็ก)
+            scale: อัตราส่วน (sx, sy) จากภาพที่ใช้วาดไปยังภาพความละเอียดเต็ม
+        """
+        self.frame = frame
+        self.scale = scale
+        self.people: List[Tuple[float, float, float, float, str, bool]] = []
+        self.faces: List[Tuple[float, float, float, float]] = []
+
+    def add_person(self, box, person_id: str, is_new: bool) -> None:
+        """บันทึกกรอบบุคคล (x1, y1, x2, y2) พร้อมรหัสบุคคล"""
+        x1, y1, x2, y2 = box[:4]
+        self.people.append((x1, y1, x2, y2, person_id, is_new))
+
+    def add_face(self, box) -> None:
+        """บันทึกกรอบใบหน้า (x1, y1, x2, y2)"""
+        x1, y1, x2, y2 = box[:4]
+        self.faces.append((x1, y1, x2, y2))
+
+    def __len__(self) -> int:
+        return len(self.people) + len(self.faces)
+
+
+class FrameAnnotator:
+    """
+    วาด FrameAnnotations ลงในบัฟเฟอร์ BGR ที่ใช้ซ้ำ (จัดสรรใหม่เฉพาะเมื่อขนาดภาพเปลี่ยน)
+    """
+
+    def __init__(self):
+        self._buffer: Optional[np.ndarray] = None
+        self.renders = 0
+
+    def render(self, annotations: FrameAnnotations) -> np.ndarray:
+        """
+        วาดผลการตรวจจับ
+
+        Args:
+            annotations: รายการสิ่งที่ต้องวาดของเฟรม
+
+        Returns:
+            numpy.ndarray: ภาพ BGR ที่วาดแล้ว ใช้ได้จนถึงการเรียก render() ครั้งถัดไป
+        """
+        source = as_bgr(annotations.frame)
+        if self._buffer is None or self._buffer.shape != source.shape:
+            self._buffer = np.empty_like(source)
+        canvas = self._buffer
+        np.copyto(canvas, source)
+        sx, sy = annotations.scale
+
+        for x1, y1, x2, y2, person_id, is_new in annotations.people:
+            color = NEW_PERSON_COLOR if is_new else KNOWN_PERSON_COLOR
+            cx1, cy1 = int(x1 / sx), int(y1 / sy)
+            cv2.rectangle(canvas, (cx1, cy1), (int(x2 / sx), int(y2 / sy)), color, 2)
+            text = f"ID: {person_id[:8]}... {'NEW' if is_new else ''}"
+            cv2.putText(canvas, text, (cx1, cy1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+        for x1, y1, x2, y2 in annotations.faces:
+            cv2.rectangle(canvas, (int(x1 / sx), int(y1 / sy)), (int(x2 / sx), int(y2 / sy)), FACE_COLOR, 1)
+
+        self.renders += 1
+        return canvas
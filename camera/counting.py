@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+โมดูลนับจำนวนคนผ่านเส้นสำหรับระบบ MANTA
+(Line-crossing people counter for MANTA system)
+
+ตรวจสอบว่าเส้นทางของแต่ละแทร็กระหว่างสองการอัปเดตตัดกับเส้นนับ (advanced.counting_line)
+หรือไม่ สำหรับทุกแทร็กพร้อมกันด้วย NumPy และเก็บจำนวนเข้า/ออกแยกตามทิศทาง
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from camera.tracking import TrackFrame
+
+DEFAULT_COUNTING_LINE = [[0.0, 0.5], [1.0, 0.5]]
+
+
+def _cross(ax, ay, bx, by):
+    """2D cross product of vectors a and b (element-wise)."""
+    return ax * by - ay * bx
+
+
+def segment_crossings(line: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    ทิศทางการตัดเส้นของแต่ละส่วนของเส้นทาง start -> end
+
+    Args:
+        line: จุดปลายของเส้นนับ (2, 2)
+        start: จุดเริ่มต้น (N, 2)
+        end: จุดสิ้นสุด (N, 2)
+
+    Returns:
+        np.ndarray: (N,) int8 โดย +1 = ข้ามไปทางขวามือของเส้นเมื่อมองจากจุดแรกไปจุดที่สอง (เข้า),
+        -1 = ข้ามไปทางซ้ายมือ (ออก), 0 = ไม่ตัด
+    """
+    (ax, ay), (bx, by) = line
+    dx, dy = bx - ax, by - ay
+
+    # Side of the line for both ends in image coordinates (y down): True is the
+    # right-hand side looking from the first point; points on the line count as right
+    side_start = _cross(dx, dy, start[:, 0] - ax, start[:, 1] - ay) >= 0
+    side_end = _cross(dx, dy, end[:, 0] - ax, end[:, 1] - ay) >= 0
+    changed = side_start != side_end
+
+    # The line endpoints must lie on opposite sides of the path (finite counting line)
+    px, py = end[:, 0] - start[:, 0], end[:, 1] - start[:, 1]
+    a_side = _cross(px, py, ax - start[:, 0], ay - start[:, 1])
+    b_side = _cross(px, py, bx - start[:, 0], by - start[:, 1])
+    within = a_side * b_side <= 0
+
+    crossed = changed & within
+    return np.where(crossed, np.where(side_end, 1, -1), 0).astype(np.int8)
+
+
+class LineCounter:
+    """
+    ตัวนับคนเข้า/ออกจากการตัดเส้นนับ
+
+    ทิศทาง "เข้า" คือการข้ามไปทางขวามือของเส้นเมื่อมองจากจุดแรกไปจุดที่สอง
+    (สำหรับเส้นแนวนอนจากซ้ายไปขวาในภาพ คือการเดินจากบนลงล่าง)
+    การตัดเส้นทั้งหมดของเฟรมรวมเป็นเหตุการณ์เดียว แทนการบันทึกทุกการตรวจจับ
+    """
+
+    def __init__(self, line: Sequence[Sequence[float]] = DEFAULT_COUNTING_LINE,
+                 name: str = 'counting_line'):
+        """
+        เริ่มต้นตัวนับ
+
+        Args:
+            line: จุดปลายสองจุดของเส้นนับในพิกัดปกติ [[x1, y1], [x2, y2]]
+            name: ชื่อเส้นนับในเหตุการณ์
+        """
+        self.name = name
+        self.count_in = 0
+        self.count_out = 0
+        self.set_line(line)
+
+    def set_line(self, line: Sequence[Sequence[float]]) -> None:
+        """
+        เปลี่ยนเส้นนับ (จำนวนที่นับแล้วยังคงอยู่)
+
+        Args:
+            line: จุดปลายสองจุดของเส้นนับในพิกัดปกติ
+        """
+        line = np.asarray(line, dtype=np.float32)
+        if line.shape != (2, 2):
+            raise ValueError("counting_line ต้องเป็นจุดสองจุด [[x1, y1], [x2, y2]]")
+        self.line = line
+
+    def update(self, tracks: TrackFrame) -> Optional[Dict[str, Any]]:
+        """
+        นับการตัดเส้นของแทร็กในเฟรมนี้
+
+        Args:
+            tracks: ผลการติดตามของเฟรม
+
+        Returns:
+            dict: เหตุการณ์ 'line_crossing' ถ้ามีการตัดเส้น หรือ None ถ้าไม่มี
+        """
+        if len(tracks) == 0:
+            return None
+
+        directions = segment_crossings(self.line, tracks.previous, tracks.centroids)
+        crossed = np.flatnonzero(directions)
+        if crossed.size == 0:
+            return None
+
+        entered = int(np.count_nonzero(directions > 0))
+        exited = int(crossed.size - entered)
+        self.count_in += entered
+        self.count_out += exited
+
+        return {
+            'type': 'line_crossing',
+            'timestamp': tracks.timestamp,
+            'line': self.name,
+            'in': entered,
+            'out': exited,
+            'total_in': self.count_in,
+            'total_out': self.count_out,
+            'tracks': [[int(tracks.ids[i]), 'in' if directions[i] > 0 else 'out'] for i in crossed]
+        }
+
+    def reset(self) -> None:
+        """Reset both counters to zero."""
+        self.count_in = 0
+        self.count_out = 0
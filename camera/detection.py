@@ -11,6 +11,8 @@ import numpy as np
 import os
 from typing import List, Tuple, Union, Optional
 
+from utils.camera_utils import YUVFrame
+
 class PersonDetector:
     """
     การตรวจจับบุคคลโดยใช้โมเดล YOLO
@@ -90,11 +92,17 @@ class PersonDetector:
         ตรวจจับบุคคลในเฟรมที่กำหนด
         
         Args:
-            frame: ภาพนำเข้า (รูปแบบ BGR)
+            frame: ภาพนำเข้า (รูปแบบ BGR หรือ YUVFrame)
             
         Returns:
             รายการการตรวจจับ: [x1, y1, x2, y2, confidence, class_id]
         """
+        # YUV frames are converted straight to the model's RGB order, unless BGR already exists
+        swap_rb = True
+        if isinstance(frame, YUVFrame):
+            swap_rb = frame.has_bgr
+            frame = frame.bgr if swap_rb else frame.rgb
+        
         if frame is None or frame.size == 0:
             return []
         
@@ -102,7 +110,7 @@ class PersonDetector:
         height, width = frame.shape[:2]
         
         # Preprocess image
-        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (640, 640), swapRB=True, crop=False)
+        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (640, 640), swapRB=swap_rb, crop=False)
         
         # Forward pass
         self.model.setInput(blob)
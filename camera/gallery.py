@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+โมดูลแกลเลอรีบุคคลสำหรับการจดจำบุคคลซ้ำของระบบ MANTA
+(Identity gallery module for MANTA re-identification)
+
+เก็บเวกเตอร์ต้นแบบหนึ่งเวกเตอร์ต่อบุคคลในดัชนีค้นหา (camera.ann_index) พร้อมรหัสบุคคล
+เวลาที่พบล่าสุด และเวลาที่พบล่าสุดของแต่ละกล้อง ใช้ทั้งภายในโปรเซสกล้อง (PersonReIdentifier)
+และในบริการแกลเลอรีร่วมของหลายกล้อง (camera.gallery_service)
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from camera.ann_index import create_index
+
+# Files of a gallery checkpoint (one .npy per array, rows ordered by last seen)
+GALLERY_FILES = ('vectors', 'last_seen', 'ids')
+
+# Gallery candidates considered per vector when several people match the same identity
+MAX_CANDIDATES = 5
+
+
+def _gallery_paths(directory: str) -> Dict[str, str]:
+    return {name: os.path.join(directory, f"gallery_{name}.npy") for name in GALLERY_FILES}
+
+
+def _write_gallery(directory: str, arrays: Dict[str, np.ndarray]) -> None:
+    """
+    เขียนแกลเลอรีลงไฟล์ .npy โดยเขียนไฟล์ชั่วคราวก่อนแล้วแทนที่ (ไฟล์เดิมไม่เสียหายถ้าเขียนไม่สำเร็จ)
+
+    Args:
+        directory: ไดเร็กทอรีปลายทาง
+        arrays: {'vectors': ..., 'last_seen': ..., 'ids': ...}
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = _gallery_paths(directory)
+    for name in GALLERY_FILES:
+        with open(paths[name] + '.tmp', 'wb') as f:
+            np.save(f, arrays[name])
+            f.flush()
+            os.fsync(f.fileno())
+    for name in GALLERY_FILES:
+        os.replace(paths[name] + '.tmp', paths[name])
+
+
+class IdentityGallery:
+    """
+    แกลเลอรีต้นแบบของบุคคล: หนึ่งเวกเตอร์ต่อบุคคล ปรับด้วยค่าเฉลี่ยเคลื่อนที่แบบเอ็กซ์โพเนนเชียล
+    เมื่อพบซ้ำ และลบเมื่อไม่พบนานกว่า retention_period
+    """
+
+    def __init__(self, similarity_threshold: float = 0.6, retention_period: float = 3600,
+                 max_identities: int = 1000, index: str = 'brute',
+                 index_options: Optional[Dict[str, Any]] = None, ema_alpha: float = 0.1,
+                 update_threshold: Optional[float] = None, vector_size: Optional[int] = None):
+        """
+        เริ่มต้นแกลเลอรี
+
+        Args:
+            similarity_threshold: ความคล้ายคลึงแบบโคไซน์ขั้นต่ำที่ถือว่าเป็นบุคคลเดิม
+            retention_period: ระยะเวลาที่จะจดจำบุคคลหลังพบครั้งล่าสุด (วินาที)
+            max_identities: จำนวนบุคคลสูงสุด (ลบบุคคลที่ไม่พบนานที่สุดเมื่อเกิน)
+            index: ชนิดดัชนี 'brute' หรือ 'ivf' (ดู camera.ann_index)
+            index_options: ตัวเลือกของดัชนี เช่น {'n_lists': 256, 'n_probe': 8, 'dtype': 'int8'}
+            ema_alpha: น้ำหนักของเวกเตอร์ใหม่เมื่อปรับต้นแบบ (0 = ไม่ปรับ)
+            update_threshold: ความคล้ายคลึงขั้นต่ำที่จะปรับต้นแบบ (None = similarity_threshold)
+            vector_size: ขนาดเวกเตอร์ที่คาดไว้ (None = กำหนดจากเวกเตอร์แรก)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.retention_period = retention_period
+        self.max_identities = max_identities
+        self.ema_alpha = ema_alpha
+        self.update_threshold = update_threshold
+        self.vector_size = vector_size
+
+        # One prototype per identity lives in the index;
+        # identity id -> (last seen, person id), least recently seen first
+        self.index = create_index(index, **(index_options or {}))
+        self._entries: 'OrderedDict[int, Tuple[float, str]]' = OrderedDict()
+        self._next_entry = 0
+        # person id -> {source (camera id): last seen}, only for sightings with a source
+        self.source_last_seen: Dict[str, Dict[str, float]] = {}
+
+        # Background checkpoint (see save)
+        self._checkpoint_thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _new_person_id(self) -> str:
+        """
+        สร้างรหัสบุคคลใหม่เมื่อเพิ่มเข้าแกลเลอรี รหัสนี้ถูกส่งคืนทุกครั้งที่พบบุคคลเดิม
+
+        Returns:
+            str: รหัสบุคคล (hex 32 ตัวอักษร ไม่ซ้ำกันข้ามการรีสตาร์ทและข้ามกล้อง)
+        """
+        return uuid.uuid4().hex
+
+    def match(self, vectors: np.ndarray, source: Optional[str] = None,
+              timestamp: Optional[float] = None) -> List[Tuple[bool, str]]:
+        """
+        จับคู่เวกเตอร์ของหนึ่งเฟรมกับแกลเลอรี และเพิ่มบุคคลที่ไม่พบในแกลเลอรี
+
+        เวกเตอร์ที่มั่นใจที่สุดเลือกบุคคลก่อน และบุคคลหนึ่งคนถูกจับคู่ได้ครั้งเดียวต่อการเรียก
+
+        Args:
+            vectors: (N, D) เวกเตอร์ที่ normalize แล้ว
+            source: รหัสกล้องที่พบ (สำหรับ source_last_seen)
+            timestamp: เวลาที่พบ (None = เวลาปัจจุบัน)
+
+        Returns:
+            list: [(is_new_person, person_id), ...] ตามลำดับของ vectors
+        """
+        if len(vectors) == 0:
+            return []
+        now = time.time() if timestamp is None else timestamp
+        self.expire(now)
+
+        # Candidate identities of every vector in one search
+        k = max(1, min(len(vectors), MAX_CANDIDATES))
+        similarities, identity_ids = self.index.search(vectors, k)
+
+        results: List[Optional[Tuple[bool, str]]] = [None] * len(vectors)
+        claimed = set()
+        for row in np.argsort(-similarities[:, 0], kind='stable'):
+            match = None
+            for similarity, identity_id in zip(similarities[row], identity_ids[row].tolist()):
+                if similarity < self.similarity_threshold:
+                    break
+                if identity_id not in claimed:
+                    match = (float(similarity), identity_id)
+                    break
+
+            if match is None:
+                identity_id = self._add_identity(vectors[row], now)
+                results[row] = (True, self._entries[identity_id][1])
+            else:
+                similarity, identity_id = match
+                self._update_identity(identity_id, vectors[row], similarity, now)
+                results[row] = (False, self._entries[identity_id][1])
+            claimed.add(identity_id)
+
+            if source is not None:
+                self.source_last_seen.setdefault(results[row][1], {})[source] = now
+        return results
+
+    def insert(self, vectors: np.ndarray, person_ids: Optional[Sequence[str]] = None,
+               last_seen: Optional[Sequence[float]] = None) -> List[str]:
+        """
+        เพิ่มบุคคลหลายคนพร้อมกันโดยไม่จับคู่ (เช่น โหลดจากไฟล์หรือย้ายจากกล้องอื่น)
+
+        Args:
+            vectors: (N, D) เวกเตอร์ที่ normalize แล้ว เรียงตามเวลาที่พบล่าสุด
+            person_ids: รหัสบุคคล (None = สร้างใหม่) รหัสที่มีอยู่แล้วจะถูกแทนที่
+            last_seen: เวลาที่พบล่าสุดของแต่ละคน (None = เวลาปัจจุบัน)
+
+        Returns:
+            list: รหัสบุคคลที่เพิ่ม
+        """
+        count = len(vectors)
+        if count == 0:
+            return []
+        if person_ids is None:
+            person_ids = [self._new_person_id() for _ in range(count)]
+        else:
+            person_ids = [str(person_id) for person_id in person_ids]
+            if self._entries:
+                self.remove(person_ids)
+        if last_seen is None:
+            last_seen = [time.time()] * count
+        else:
+            last_seen = np.asarray(last_seen, dtype=np.float64).tolist()
+
+        identity_ids = np.arange(self._next_entry, self._next_entry + count)
+        self._next_entry += count
+        newest = next(reversed(self._entries.values()))[0] if self._entries else None
+        self.index.add(identity_ids, vectors)
+        for identity_id, timestamp, person_id in zip(identity_ids.tolist(), last_seen, person_ids):
+            self._entries[identity_id] = (timestamp, person_id)
+        if newest is not None and min(last_seen) < newest:
+            # Keep the least-recently-seen-first order that expire() relies on
+            self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1][0]))
+        self._trim()
+        return person_ids
+
+    def _add_identity(self, vector: np.ndarray, timestamp: float) -> int:
+        """Add a new person and return its internal identity id."""
+        identity_id = self._next_entry
+        self._next_entry += 1
+        self.index.add([identity_id], vector[np.newaxis])
+        self._entries[identity_id] = (timestamp, self._new_person_id())
+        self._trim()
+        return identity_id
+
+    def _update_identity(self, identity_id: int, vector: np.ndarray, similarity: float,
+                         timestamp: Optional[float] = None) -> None:
+        """
+        บันทึกการพบบุคคลซ้ำ และปรับต้นแบบด้วยค่าเฉลี่ยเคลื่อนที่แบบเอ็กซ์โพเนนเชียล
+        เมื่อความคล้ายคลึงสูงพอ
+
+        Args:
+            identity_id: รหัสภายในของบุคคล
+            vector: เวกเตอร์ลักษณะเฉพาะที่ normalize แล้ว
+            similarity: ความคล้ายคลึงกับต้นแบบ
+            timestamp: เวลาที่พบ (None = เวลาปัจจุบัน)
+        """
+        person_id = self._entries.pop(identity_id)[1]
+        self._entries[identity_id] = (time.time() if timestamp is None else timestamp, person_id)
+
+        threshold = self.similarity_threshold if self.update_threshold is None else self.update_threshold
+        if self.ema_alpha > 0 and similarity >= threshold:
+            prototype = self.index.get(identity_id)
+            prototype *= 1.0 - self.ema_alpha
+            prototype += self.ema_alpha * vector
+            prototype /= max(float(np.linalg.norm(prototype)), 1e-12)
+            self.index.update(identity_id, prototype)
+
+    def _drop(self, identity_ids: List[int]) -> List[str]:
+        person_ids = [self._entries.pop(identity_id)[1] for identity_id in identity_ids]
+        if identity_ids:
+            self.index.remove(identity_ids)
+            for person_id in person_ids:
+                self.source_last_seen.pop(person_id, None)
+        return person_ids
+
+    def _trim(self) -> None:
+        excess = len(self._entries) - self.max_identities
+        if excess > 0:
+            self._drop(list(self._entries)[:excess])
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """
+        ลบบุคคลที่ไม่พบนานกว่า retention_period (รายการเรียงตามเวลาที่พบล่าสุด จึงตรวจเฉพาะส่วนหัว)
+
+        Args:
+            now: เวลาปัจจุบัน (None = time.time())
+
+        Returns:
+            list: รหัสบุคคลที่ถูกลบ
+        """
+        cutoff = (time.time() if now is None else now) - self.retention_period
+        expired = []
+        for identity_id, (timestamp, _) in self._entries.items():
+            if timestamp >= cutoff:
+                break
+            expired.append(identity_id)
+        return self._drop(expired)
+
+    def remove(self, person_ids: Sequence[str]) -> List[str]:
+        """
+        ลบบุคคลตามรหัส (รหัสที่ไม่มีจะถูกข้าม)
+
+        Returns:
+            list: รหัสบุคคลที่ถูกลบ
+        """
+        wanted = set(person_ids)
+        if not wanted:
+            return []
+        return self._drop([identity_id for identity_id, (_, person_id) in self._entries.items()
+                           if person_id in wanted])
+
+    def clear(self) -> None:
+        """Forget everyone."""
+        self.index.clear()
+        self._entries.clear()
+        self.source_last_seen.clear()
+
+    def export(self) -> Dict[str, np.ndarray]:
+        """
+        สำเนาของแกลเลอรีเรียงตามเวลาที่พบล่าสุด (เก่าไปใหม่)
+
+        Returns:
+            dict: {'vectors': (N, D) float32, 'last_seen': (N,) float64, 'ids': (N,) str}
+        """
+        count = len(self._entries)
+        vectors = np.empty((count, self.index.dim or self.vector_size or 0), dtype=np.float32)
+        last_seen = np.empty(count, dtype=np.float64)
+        person_ids = []
+        for row, (identity_id, (timestamp, person_id)) in enumerate(self._entries.items()):
+            vectors[row] = self.index.get(identity_id)
+            last_seen[row] = timestamp
+            person_ids.append(person_id)
+        return {'vectors': vectors, 'last_seen': last_seen,
+                'ids': np.array(person_ids, dtype='<U32')}
+
+    def save(self, directory: str, background: bool = False) -> bool:
+        """
+        บันทึกแกลเลอรีเป็นไฟล์ .npy สำหรับการเริ่มต้นใหม่โดยไม่ลืมบุคคลที่เคยพบ
+
+        Args:
+            directory: ไดเร็กทอรีปลายทาง
+            background: เขียนไฟล์ในเธรดเบื้องหลัง (ข้ามถ้าการบันทึกครั้งก่อนยังไม่เสร็จ)
+
+        Returns:
+            bool: True ถ้าเริ่มหรือบันทึกสำเร็จ
+        """
+        if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+            if background:
+                return False
+            self._checkpoint_thread.join()
+
+        arrays = self.export()
+        if not background:
+            _write_gallery(directory, arrays)
+            return True
+
+        def write():
+            try:
+                _write_gallery(directory, arrays)
+            except Exception as e:
+                print(f"Error saving re-ID gallery: {e}")
+
+        self._checkpoint_thread = threading.Thread(target=write, name='reid-checkpoint', daemon=True)
+        self._checkpoint_thread.start()
+        return True
+
+    def load(self, directory: str) -> int:
+        """
+        โหลดแกลเลอรีที่บันทึกไว้แทนแกลเลอรีปัจจุบัน ไฟล์ถูกเปิดแบบ memory-map
+        จึงไม่ต้องแปลงข้อมูล และบุคคลที่หมดอายุแล้ว (ตาม retention_period) จะไม่ถูกโหลด
+
+        Args:
+            directory: ไดเร็กทอรีที่บันทึกไว้
+
+        Returns:
+            int: จำนวนบุคคลที่โหลด (0 ถ้าไม่มีไฟล์หรือไฟล์ใช้ไม่ได้)
+        """
+        paths = _gallery_paths(directory)
+        if not all(os.path.exists(path) for path in paths.values()):
+            return 0
+
+        try:
+            vectors = np.load(paths['vectors'], mmap_mode='r')
+            last_seen = np.load(paths['last_seen'], mmap_mode='r')
+            person_ids = np.load(paths['ids'], mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"Warning: cannot read re-ID gallery in {directory}: {e}")
+            return 0
+
+        if vectors.ndim != 2 or not len(vectors) == len(last_seen) == len(person_ids):
+            print(f"Warning: re-ID gallery in {directory} is inconsistent, ignoring it")
+            return 0
+        expected_size = self.index.dim or self.vector_size
+        if len(vectors) and expected_size and vectors.shape[1] != expected_size:
+            print(f"Warning: re-ID gallery vectors have size {vectors.shape[1]}, expected {expected_size}")
+            return 0
+
+        # Rows are ordered by last seen: the live entries are a suffix of the file
+        cutoff = time.time() - self.retention_period
+        start = int(np.searchsorted(last_seen, cutoff, side='left'))
+        start = max(start, len(vectors) - self.max_identities)
+
+        self.clear()
+        return len(self.insert(vectors[start:], person_ids[start:].tolist(), last_seen[start:]))
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+โมดูลบริการแกลเลอรีการจดจำบุคคลร่วมของหลายกล้องสำหรับระบบ MANTA
+(Shared cross-camera re-ID gallery service for MANTA system)
+
+กล้องหลายตัวในพื้นที่เดียวกันส่งเวกเตอร์ของทั้งเฟรมมาค้นหาในแกลเลอรีเดียว ผ่าน Unix socket
+หรือ TCP บน localhost จึงได้รหัสบุคคลเดียวกันเมื่อบุคคลเดินจากกล้องหนึ่งไปอีกกล้องหนึ่ง
+บริการเก็บเวลาที่พบล่าสุดของแต่ละกล้อง รองรับการเพิ่ม/ลบหลายรายการ และบันทึกแกลเลอรีเป็นระยะ
+
+เริ่มบริการด้วย `python -m camera.gallery_service --config config/config.yaml`
+"""
+
+import argparse
+import ipaddress
+import logging
+import os
+import signal
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from camera.gallery import IdentityGallery
+
+logger = logging.getLogger('manta.gallery_service')
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(address: Union[str, Tuple[str, int]]) -> Address:
+    """
+    แปลงที่อยู่ของบริการ: 'host:port' เป็น TCP ส่วนค่าอื่นเป็นพาธของ Unix socket
+
+    Args:
+        address: เช่น '/run/manta/gallery.sock' หรือ '127.0.0.1:7070'
+
+    Returns:
+        พาธ (Unix socket) หรือ (host, port)
+    """
+    if isinstance(address, (tuple, list)):
+        return str(address[0]), int(address[1])
+    host, sep, port = str(address).rpartition(':')
+    if sep and host and port.isdigit() and '/' not in host:
+        return host, int(port)
+    return str(address)
+
+
+def is_loopback(host: str) -> bool:
+    """True ถ้า host เป็นที่อยู่ loopback (localhost, 127.0.0.0/8 หรือ ::1)"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+def _authkey(authkey: Optional[Union[str, bytes]]) -> Optional[bytes]:
+    if authkey is None or isinstance(authkey, bytes):
+        return authkey
+    return str(authkey).encode('utf-8')
+
+
+class GalleryServer:
+    """
+    เซิร์ฟเวอร์แกลเลอรีร่วม: หนึ่งเธรดต่อกล้องที่เชื่อมต่อ การเข้าถึงแกลเลอรีทำภายใต้ล็อกเดียว
+
+    คำขอคือ (operation, kwargs) และคำตอบคือ ('ok', ผลลัพธ์) หรือ ('error', ข้อความ)
+    """
+
+    OPERATIONS = ('match', 'insert', 'remove', 'expire', 'last_seen', 'stats', 'ping')
+
+    def __init__(self, gallery: IdentityGallery, address: Union[str, Tuple[str, int]],
+                 authkey: Optional[Union[str, bytes]] = None, gallery_dir: Optional[str] = None,
+                 checkpoint_interval: float = 300.0):
+        """
+        เริ่มต้นเซิร์ฟเวอร์
+
+        Args:
+            gallery: แกลเลอรีที่ใช้ร่วมกัน
+            address: พาธของ Unix socket หรือ 'host:port'
+            authkey: คีย์ยืนยันตัวตนของกล้อง (จำเป็นเมื่อใช้ TCP)
+            gallery_dir: ไดเร็กทอรีสำหรับบันทึกแกลเลอรี (None = ไม่บันทึก)
+            checkpoint_interval: ช่วงเวลาระหว่างการบันทึก (วินาที)
+        """
+        self.gallery = gallery
+        self.address = parse_address(address)
+        self.authkey = _authkey(authkey)
+        self.gallery_dir = gallery_dir
+        self.checkpoint_interval = checkpoint_interval
+
+        self._lock = threading.Lock()
+        self._listener: Optional[Listener] = None
+        self._running = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_checkpoint = time.monotonic()
+
+    def start(self) -> None:
+        """
+        เปิดการรับการเชื่อมต่อในเธรดเบื้องหลัง (โหลดแกลเลอรีที่บันทึกไว้ก่อน ถ้ามี)
+
+        Raises:
+            ValueError: ถ้าใช้ TCP บนที่อยู่ที่ไม่ใช่ loopback หรือไม่มี authkey
+                (multiprocessing.connection ถอด pickle ทุกคำขอ จึงรันโค้ดได้ถ้าเปิดให้ผู้อื่นเข้าถึง)
+        """
+        if not isinstance(self.address, str):
+            host = self.address[0]
+            if not is_loopback(host):
+                raise ValueError(f"Gallery service TCP address must be loopback, got {host!r}")
+            if self.authkey is None:
+                raise ValueError("Gallery service over TCP requires an authkey")
+
+        if self.gallery_dir:
+            loaded = self.gallery.load(self.gallery_dir)
+            logger.info(f"โหลดแกลเลอรีร่วม {loaded} รายการจาก {self.gallery_dir}")
+
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)  # stale socket from a previous run
+        self._listener = Listener(self.address, authkey=self.authkey)
+        if isinstance(self.address, str):
+            os.chmod(self.address, 0o660)
+        self._running.set()
+
+        for target, name in ((self._accept_loop, 'gallery-accept'), (self._checkpoint_loop, 'gallery-checkpoint')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"บริการแกลเลอรีร่วมทำงานที่ {self.address}")
+
+    def serve_forever(self) -> None:
+        """เริ่มบริการและรอจนกว่าจะถูกหยุด (แกลเลอรีถูกบันทึกแม้สัญญาณหยุดมาถึงระหว่างเริ่มบริการ)"""
+        try:
+            # Clients are served as soon as start() opens the listener, so it must be inside the try
+            self.start()
+            while self._running.is_set():
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            while True:
+                try:
+                    self.stop()
+                    break
+                except KeyboardInterrupt:
+                    # A repeated SIGTERM/Ctrl+C must not skip the final save: stop() is retried
+                    continue
+
+    def stop(self) -> None:
+        """
+        หยุดรับการเชื่อมต่อและบันทึกแกลเลอรีครั้งสุดท้าย
+
+        เรียกซ้ำได้: ถ้าถูกขัดจังหวะก่อนบันทึกเสร็จ การเรียกครั้งถัดไปจะบันทึกอีกครั้ง
+        """
+        if self._listener is None:
+            return  # never opened (start() failed early) or already stopped and saved
+        self._running.clear()
+        try:
+            self._listener.close()
+        finally:
+            if self.gallery_dir:
+                with self._lock:
+                    self.gallery.save(self.gallery_dir)
+            self._listener = None
+
+    def _accept_loop(self) -> None:
+        while self._running.is_set():
+            try:
+                connection = self._listener.accept()
+            except Exception as e:
+                if self._running.is_set():
+                    logger.warning(f"ไม่สามารถรับการเชื่อมต่อได้: {e}")
+                    continue
+                return
+            threading.Thread(target=self._serve_connection, args=(connection,),
+                             name='gallery-client', daemon=True).start()
+
+    def _serve_connection(self, connection) -> None:
+        with connection:
+            while self._running.is_set():
+                try:
+                    operation, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = ('ok', self.handle(operation, **kwargs))
+                except Exception as e:
+                    response = ('error', f"{type(e).__name__}: {e}")
+                try:
+                    connection.send(response)
+                except (EOFError, OSError):
+                    return
+
+    def _checkpoint_loop(self) -> None:
+        while self._running.is_set():
+            time.sleep(min(1.0, self.checkpoint_interval))
+            if not self.gallery_dir or not self._running.is_set():
+                continue
+            if time.monotonic() - self._last_checkpoint < self.checkpoint_interval:
+                continue
+            self._last_checkpoint = time.monotonic()
+            try:
+                # Only the copy happens under the lock; the files are written in the background
+                with self._lock:
+                    started = self.gallery.save(self.gallery_dir, background=True)
+                if not started:
+                    logger.debug("ข้ามการบันทึกแกลเลอรีร่วม (การบันทึกครั้งก่อนยังไม่เสร็จ)")
+            except Exception as e:
+                logger.error(f"ไม่สามารถบันทึกแกลเลอรีร่วมได้: {e}")
+
+    def handle(self, operation: str, **kwargs: Any) -> Any:
+        """
+        ดำเนินการหนึ่งคำขอ (เรียกได้โดยตรงโดยไม่ผ่านซ็อกเก็ต)
+
+        Args:
+            operation: หนึ่งใน OPERATIONS
+            **kwargs: อาร์กิวเมนต์ของการดำเนินการ
+
+        Returns:
+            ผลลัพธ์ของการดำเนินการ
+        """
+        if operation not in self.OPERATIONS:
+            raise ValueError(f"ไม่รู้จักการดำเนินการ '{operation}'")
+        if operation == 'ping':
+            return 'pong'
+
+        with self._lock:
+            if operation == 'match':
+                return self.gallery.match(np.asarray(kwargs['vectors'], dtype=np.float32),
+                                          source=kwargs.get('source'),
+                                          timestamp=kwargs.get('timestamp'))
+            if operation == 'insert':
+                return self.gallery.insert(np.asarray(kwargs['vectors'], dtype=np.float32),
+                                           kwargs.get('person_ids'), kwargs.get('last_seen'))
+            if operation == 'remove':
+                return self.gallery.remove(kwargs['person_ids'])
+            if operation == 'expire':
+                return self.gallery.expire(kwargs.get('now'))
+            if operation == 'last_seen':
+                return {person_id: dict(self.gallery.source_last_seen.get(person_id, {}))
+                        for person_id in kwargs['person_ids']}
+            cameras: Dict[str, int] = {}
+            for sources in self.gallery.source_last_seen.values():
+                for source in sources:
+                    cameras[source] = cameras.get(source, 0) + 1
+            return {'identities': len(self.gallery), 'cameras': cameras}
+
+
+class GalleryClient:
+    """
+    ตัวเชื่อมต่อบริการแกลเลอรีร่วมสำหรับหนึ่งกล้อง มีเมธอด match แบบเดียวกับ IdentityGallery
+
+    เมื่อเชื่อมต่อไม่ได้จะส่ง ConnectionError ทันทีโดยไม่ลองใหม่จนกว่าจะครบ retry_interval
+    ลูปหลักจึงไม่ถูกบล็อกขณะบริการไม่ทำงาน
+    """
+
+    def __init__(self, address: Union[str, Tuple[str, int]], authkey: Optional[Union[str, bytes]] = None,
+                 timeout: float = 1.0, retry_interval: float = 5.0):
+        """
+        เริ่มต้นตัวเชื่อมต่อ (เชื่อมต่อเมื่อเรียกใช้ครั้งแรก)
+
+        Args:
+            address: พาธของ Unix socket หรือ 'host:port'
+            authkey: คีย์ยืนยันตัวตน (ต้องตรงกับของบริการ)
+            timeout: เวลารอคำตอบต่อคำขอ (วินาที)
+            retry_interval: ระยะเวลาก่อนลองเชื่อมต่อใหม่หลังล้มเหลว (วินาที)
+        """
+        self.address = parse_address(address)
+        self.authkey = _authkey(authkey)
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._connection = None
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str, **kwargs: Any) -> Any:
+        with self._lock:
+            if self._connection is None:
+                if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval:
+                    raise ConnectionError("บริการแกลเลอรีร่วมไม่พร้อมใช้งาน")
+                try:
+                    self._connection = Client(self.address, authkey=self.authkey)
+                except Exception as e:
+                    self._failed_at = time.monotonic()
+                    raise ConnectionError(f"ไม่สามารถเชื่อมต่อบริการแกลเลอรีร่วมที่ {self.address}: {e}") from e
+
+            try:
+                self._connection.send((operation, kwargs))
+                if not self._connection.poll(self.timeout):
+                    raise TimeoutError(f"บริการแกลเลอรีร่วมไม่ตอบสนองภายใน {self.timeout} วินาที")
+                status, result = self._connection.recv()
+            except (OSError, EOFError) as e:
+                # A late or partial reply would desynchronize the stream: reconnect next time
+                self._disconnect()
+                self._failed_at = time.monotonic()
+                if isinstance(e, EOFError):
+                    raise ConnectionError("บริการแกลเลอรีร่วมปิดการเชื่อมต่อ") from e
+                raise
+
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def _disconnect(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except OSError:
+                pass
+            self._connection = None
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            self._disconnect()
+
+    def ping(self) -> bool:
+        """True if the service answers."""
+        return self._call('ping') == 'pong'
+
+    def match(self, vectors: np.ndarray, source: Optional[str] = None,
+              timestamp: Optional[float] = None) -> List[Tuple[bool, str]]:
+        """
+        จับคู่เวกเตอร์ของหนึ่งเฟรมกับแกลเลอรีร่วม (ดู IdentityGallery.match)
+
+        Returns:
+            list: [(is_new_person, person_id), ...] รหัสบุคคลเป็นรหัสร่วมของทุกกล้อง
+        """
+        if len(vectors) == 0:
+            return []
+        return [tuple(result) for result in
+                self._call('match', vectors=np.asarray(vectors, dtype=np.float32),
+                           source=source, timestamp=timestamp)]
+
+    def insert(self, vectors: np.ndarray, person_ids: Optional[Sequence[str]] = None,
+               last_seen: Optional[Sequence[float]] = None) -> List[str]:
+        """เพิ่มบุคคลหลายคนพร้อมกัน (ดู IdentityGallery.insert)"""
+        return self._call('insert', vectors=np.asarray(vectors, dtype=np.float32),
+                          person_ids=None if person_ids is None else list(person_ids),
+                          last_seen=None if last_seen is None else list(last_seen))
+
+    def remove(self, person_ids: Sequence[str]) -> List[str]:
+        """ลบบุคคลตามรหัส"""
+        return self._call('remove', person_ids=list(person_ids))
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """ลบบุคคลที่หมดอายุ และส่งคืนรหัสที่ถูกลบ"""
+        return self._call('expire', now=now)
+
+    def last_seen(self, person_ids: Sequence[str]) -> Dict[str, Dict[str, float]]:
+        """เวลาที่พบล่าสุดของแต่ละกล้อง {person_id: {camera_id: timestamp}}"""
+        return self._call('last_seen', person_ids=list(person_ids))
+
+    def stats(self) -> Dict[str, Any]:
+        """จำนวนบุคคลในแกลเลอรีร่วมและจำนวนบุคคลที่แต่ละกล้องเคยพบ"""
+        return self._call('stats')
+
+
+def create_gallery_from_config(reid_config: Dict[str, Any]) -> IdentityGallery:
+    """
+    สร้างแกลเลอรีจากส่วน reid ของการกำหนดค่า
+
+    Args:
+        reid_config: การกำหนดค่า reid
+
+    Returns:
+        IdentityGallery: แกลเลอรีใหม่
+    """
+    index_options = {'dtype': reid_config.get('index_dtype', 'float32')}
+    if reid_config.get('index', 'brute') == 'ivf':
+        index_options.update(n_lists=reid_config.get('ivf_lists', 64),
+                             n_probe=reid_config.get('ivf_probe', 8))
+    return IdentityGallery(
+        similarity_threshold=reid_config.get('similarity_threshold', 0.6),
+        retention_period=reid_config.get('retention_period', 3600),
+        max_identities=reid_config.get('max_stored_vectors', 1000),
+        index=reid_config.get('index', 'brute'),
+        index_options=index_options,
+        ema_alpha=reid_config.get('ema_alpha', 0.1),
+        update_threshold=reid_config.get('update_threshold')
+    )
+
+
+def _terminate(signum, frame):
+    # systemd stops services with SIGTERM: shut down like Ctrl+C so the gallery is saved
+    raise KeyboardInterrupt
+
+
+def main() -> None:
+    import yaml
+
+    parser = argparse.ArgumentParser(description='บริการแกลเลอรีการจดจำบุคคลร่วมของหลายกล้อง MANTA')
+    parser.add_argument('--config', type=str, default='config/config.yaml', help='Path to config file')
+    parser.add_argument('--address', type=str, help='Unix socket path or host:port (overrides config)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f) or {}
+    reid_config = config.get('reid', {})
+    service_config = reid_config.get('gallery_service', {})
+
+    server = GalleryServer(
+        create_gallery_from_config(reid_config),
+        args.address or service_config.get('address', '/tmp/manta-gallery.sock'),
+        authkey=service_config.get('authkey'),
+        gallery_dir=reid_config.get('gallery_dir'),
+        checkpoint_interval=reid_config.get('checkpoint_interval', 300)
+    )
+    signal.signal(signal.SIGTERM, _terminate)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
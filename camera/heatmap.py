@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+โมดูลแผนที่ความร้อนการเคลื่อนไหวสำหรับระบบ MANTA
+(Movement heatmap module for MANTA system)
+
+สะสมตำแหน่งเท้าของบุคคลที่ติดตามลงในกริดความละเอียดต่ำ และบันทึกภาพรวม
+เป็นระยะตาม advanced.heatmap_interval ค่าใช้จ่ายต่อเฟรมขึ้นกับจำนวนบุคคลในเฟรมเท่านั้น
+ไม่ขึ้นกับความยาวของประวัติ
+"""
+
+import os
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Rescale the grid once the lazy decay weight grows past this (keeps float32 precise)
+_RENORMALIZE_WEIGHT = float(2 ** 20)
+
+
+class HeatmapAccumulator:
+    """
+    ตัวสะสมแผนที่ความร้อนแบบเพิ่มทีละเฟรม
+
+    การลดค่าแบบเอ็กซ์โพเนนเชียล (half_life) ใช้วิธีเพิ่มน้ำหนักของจุดใหม่แทนการคูณทั้งกริด
+    ทุกเฟรม กริดจะถูกปรับสเกลเพียงครั้งเดียวในทุก ๆ 20 half-life
+    """
+
+    def __init__(self, grid_size: Tuple[int, int] = (64, 36), half_life: float = 0.0,
+                 interval: float = 3600.0, reset_on_snapshot: bool = True):
+        """
+        เริ่มต้นตัวสะสมแผนที่ความร้อน
+
+        Args:
+            grid_size: ขนาดกริด (width, height)
+            half_life: ระยะเวลาที่ค่าลดลงครึ่งหนึ่ง (วินาที, 0 = ไม่ลดค่า)
+            interval: ช่วงเวลาระหว่างภาพรวม (วินาที)
+            reset_on_snapshot: ล้างกริดหลังบันทึกภาพรวม (แต่ละภาพครอบคลุมหนึ่งช่วงเวลา)
+        """
+        width, height = int(grid_size[0]), int(grid_size[1])
+        if width <= 0 or height <= 0:
+            raise ValueError("heatmap_grid ต้องเป็นจำนวนเต็มบวก [width, height]")
+        self.grid = np.zeros((height, width), dtype=np.float32)
+        self.half_life = float(half_life)
+        self.interval = float(interval)
+        self.reset_on_snapshot = reset_on_snapshot
+
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._last_timestamp = 0.0
+        self._decay_origin: Optional[float] = None
+        self._next_snapshot: Optional[float] = None
+
+    def _weight(self, timestamp: float) -> float:
+        """Weight of a sample taken at timestamp relative to the decay origin."""
+        if self.half_life <= 0:
+            return 1.0
+        if self._decay_origin is None:
+            self._decay_origin = timestamp
+        weight = 2.0 ** ((timestamp - self._decay_origin) / self.half_life)
+        if weight > _RENORMALIZE_WEIGHT:
+            self.grid /= weight
+            self._decay_origin = timestamp
+            weight = 1.0
+        return weight
+
+    def add(self, points: np.ndarray, timestamp: float) -> None:
+        """
+        เพิ่มตำแหน่งของหนึ่งเฟรม
+
+        Args:
+            points: ตำแหน่งในพิกัดปกติ (N, 2)
+            timestamp: เวลาของเฟรม
+        """
+        if self.started_at is None:
+            self.started_at = timestamp
+        self._last_timestamp = timestamp
+        if len(points) == 0:
+            return
+
+        height, width = self.grid.shape
+        xs = np.clip((points[:, 0] * width).astype(np.intp), 0, width - 1)
+        ys = np.clip((points[:, 1] * height).astype(np.intp), 0, height - 1)
+        np.add.at(self.grid, (ys, xs), np.float32(self._weight(timestamp)))
+        self.samples += len(points)
+
+    def snapshot(self, timestamp: Optional[float] = None) -> np.ndarray:
+        """
+        ค่าปัจจุบันของแผนที่ความร้อน (สำเนา)
+
+        Args:
+            timestamp: เวลาที่ใช้คำนวณการลดค่า (None = เวลาของจุดล่าสุด)
+
+        Returns:
+            np.ndarray: กริด float32 (height, width)
+        """
+        if self.half_life <= 0 or self._decay_origin is None:
+            return self.grid.copy()
+        if timestamp is None:
+            timestamp = self._last_timestamp
+        return self.grid / np.float32(2.0 ** ((timestamp - self._decay_origin) / self.half_life))
+
+    def reset(self) -> None:
+        """Clear the grid."""
+        self.grid.fill(0.0)
+        self.samples = 0
+        self.started_at = None
+        self._decay_origin = None
+
+    def due(self, timestamp: float) -> bool:
+        """
+        ถึงเวลาบันทึกภาพรวมหรือไม่
+
+        Args:
+            timestamp: เวลาปัจจุบัน
+
+        Returns:
+            bool: True ถ้าครบ interval นับจากภาพรวมครั้งก่อน (หรือเริ่มต้น)
+        """
+        if self._next_snapshot is None:
+            self._next_snapshot = timestamp + self.interval
+            return False
+        return timestamp >= self._next_snapshot
+
+    def save_snapshot(self, directory: str, timestamp: float, fmt: str = 'png') -> str:
+        """
+        บันทึกภาพรวมเป็นไฟล์ PNG (สีแบบ JET) หรือ .npz (ค่าดิบแบบบีบอัด)
+
+        Args:
+            directory: ไดเร็กทอรีปลายทาง
+            timestamp: เวลาของภาพรวม
+            fmt: 'png' หรือ 'npz'
+
+        Returns:
+            str: พาธของไฟล์ที่บันทึก
+        """
+        fmt = fmt.lower()
+        if fmt not in ('png', 'npz'):
+            raise ValueError("heatmap_format ต้องเป็น 'png' หรือ 'npz'")
+
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime('heatmap_%Y%m%d_%H%M%S', time.localtime(timestamp))
+        path = os.path.join(directory, f"{name}.{fmt}")
+        values = self.snapshot(timestamp)
+
+        if fmt == 'npz':
+            np.savez_compressed(path, heatmap=values, timestamp=timestamp,
+                                started_at=self.started_at if self.started_at is not None else timestamp,
+                                samples=self.samples)
+        else:
+            peak = float(values.max())
+            scaled = (values * (255.0 / peak)).astype(np.uint8) if peak > 0 else \
+                np.zeros(values.shape, dtype=np.uint8)
+            if not cv2.imwrite(path, cv2.applyColorMap(scaled, cv2.COLORMAP_JET)):
+                raise IOError(f"ไม่สามารถบันทึกแผนที่ความร้อนไปยัง {path}")
+
+        self._next_snapshot = timestamp + self.interval
+        if self.reset_on_snapshot:
+            self.reset()
+        return path
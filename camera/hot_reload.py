@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+โมดูลโหลดการกำหนดค่าใหม่ขณะทำงานสำหรับระบบ MANTA
+(Live configuration reload module for MANTA system)
+
+รับการกำหนดค่าใหม่จากเซิร์ฟเวอร์การกำหนดค่าระยะไกล (เธรดอื่น) และนำไปใช้
+ในลูปหลักระหว่างเฟรม โดยไม่ต้องรีสตาร์ทโปรเซส การเปลี่ยนโมเดลตรวจจับจะโหลด
+ในเบื้องหลังและสลับเมื่อพร้อม
+"""
+
+import copy
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger('manta.hot_reload')
+
+_MISSING = object()
+
+# Keys that cannot be applied without reopening the camera or uploader
+RESTART_REQUIRED_KEYS = (
+    'camera',
+    'firebase.enabled',
+    'firebase.config_path',
+    'firebase.database_url',
+    'firebase.path_prefix',
+    'face_detection.enabled',
+    'face_detection.model_path',
+    'reid.index',
+    'reid.ivf_lists',
+    'reid.index_dtype',
+    'reid.gallery_dir',
+    'reid.gallery_service',
+    'remote_config',
+    'wifi_direct',
+)
+
+
+def get_path(config: Dict[str, Any], path: str, default: Any = None) -> Any:
+    """
+    อ่านค่าจากการกำหนดค่าด้วยพาธแบบจุด เช่น 'detection.frame_skip'
+
+    Args:
+        config: การกำหนดค่า
+        path: พาธแบบจุด
+        default: ค่าเริ่มต้นถ้าไม่พบ
+
+    Returns:
+        ค่าที่พบหรือค่าเริ่มต้น
+    """
+    node = config
+    for part in path.split('.'):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
+
+
+def changed_paths(old: Dict[str, Any], new: Dict[str, Any],
+                  paths: Sequence[str]) -> List[str]:
+    """
+    ส่งคืนพาธที่มีค่าต่างกันระหว่างการกำหนดค่าเดิมและใหม่
+
+    Args:
+        old: การกำหนดค่าเดิม
+        new: การกำหนดค่าใหม่
+        paths: พาธแบบจุดที่จะตรวจสอบ
+
+    Returns:
+        รายการพาธที่เปลี่ยนแปลง
+    """
+    return [p for p in paths if get_path(old, p, _MISSING) != get_path(new, p, _MISSING)]
+
+
+class ConfigReloader:
+    """
+    ตัวกลางระหว่างเซิร์ฟเวอร์การกำหนดค่าระยะไกลและลูปหลัก
+
+    submit() ถูกเรียกจากเธรดของเซิร์ฟเวอร์ และเก็บการกำหนดค่าล่าสุดไว้เท่านั้น
+    apply_pending() ถูกเรียกจากลูปหลักระหว่างเฟรม และเรียกตัวจัดการที่สมัครไว้
+    เฉพาะส่วนที่มีการเปลี่ยนแปลง ทำให้ไม่มีการล็อกในเส้นทางของเฟรม
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        เริ่มต้นตัวโหลดการกำหนดค่าใหม่
+
+        Args:
+            config: การกำหนดค่าที่ใช้อยู่ปัจจุบัน
+        """
+        self.config = config
+        self._lock = threading.Lock()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._handlers: List[Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], None]]] = []
+
+        # Background detector swap
+        self._ready_detector = None
+        self._loader_thread: Optional[threading.Thread] = None
+        self._loader_generation = 0
+
+    def subscribe(self, paths: Sequence[str], handler: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        สมัครรับการเปลี่ยนแปลงของพาธที่กำหนด
+
+        Args:
+            paths: พาธแบบจุด (เช่น 'detection.confidence_threshold' หรือทั้งส่วน 'advanced')
+            handler: ฟังก์ชันที่รับการกำหนดค่าใหม่ทั้งหมด เรียกบนเธรดของลูปหลัก
+        """
+        self._handlers.append((tuple(paths), handler))
+
+    def submit(self, new_config: Dict[str, Any]) -> None:
+        """
+        ส่งการกำหนดค่าใหม่ (ปลอดภัยเมื่อเรียกจากเธรดอื่น)
+
+        Args:
+            new_config: การกำหนดค่าใหม่ทั้งหมด
+        """
+        with self._lock:
+            self._pending = copy.deepcopy(new_config)
+
+    @property
+    def has_pending(self) -> bool:
+        """True if a submitted config is waiting to be applied."""
+        return self._pending is not None
+
+    def apply_pending(self) -> Optional[Dict[str, Any]]:
+        """
+        นำการกำหนดค่าที่รออยู่ไปใช้ (เรียกจากลูปหลักระหว่างเฟรม)
+
+        Returns:
+            การกำหนดค่าใหม่ หรือ None ถ้าไม่มีการเปลี่ยนแปลง
+        """
+        # Unlocked fast path: nothing pending on almost every frame
+        if self._pending is None:
+            return None
+
+        with self._lock:
+            new_config, self._pending = self._pending, None
+        if new_config is None:
+            return None
+
+        old_config = self.config
+        self.config = new_config
+
+        restart_keys = changed_paths(old_config, new_config, RESTART_REQUIRED_KEYS)
+        if restart_keys:
+            logger.warning(f"การเปลี่ยนแปลงต่อไปนี้จะมีผลหลังรีสตาร์ท: {', '.join(restart_keys)}")
+
+        for paths, handler in self._handlers:
+            if changed_paths(old_config, new_config, paths):
+                try:
+                    handler(new_config)
+                except Exception as e:
+                    logger.error(f"ไม่สามารถนำการกำหนดค่าใหม่ไปใช้ได้ ({', '.join(paths)}): {e}")
+
+        logger.info("นำการกำหนดค่าใหม่ไปใช้แล้วโดยไม่ต้องรีสตาร์ท")
+        return new_config
+
+    def load_detector_async(self, factory: Callable[[], Any]) -> None:
+        """
+        โหลดตัวตรวจจับใหม่ในเธรดเบื้องหลัง ตัวตรวจจับเดิมทำงานต่อจนกว่าตัวใหม่จะพร้อม
+
+        Args:
+            factory: ฟังก์ชันที่สร้างตัวตรวจจับใหม่
+        """
+        self._loader_generation += 1
+        generation = self._loader_generation
+
+        def load():
+            try:
+                detector = factory()
+            except Exception as e:
+                logger.error(f"ไม่สามารถโหลดโมเดลตรวจจับใหม่ได้ ใช้โมเดลเดิมต่อ: {e}")
+                return
+            with self._lock:
+                # A newer request superseded this one while it was loading
+                if generation == self._loader_generation:
+                    self._ready_detector = detector
+            logger.info("โหลดโมเดลตรวจจับใหม่สำเร็จ จะสลับในเฟรมถัดไป")
+
+        self._loader_thread = threading.Thread(target=load, name='detector-loader', daemon=True)
+        self._loader_thread.start()
+
+    def take_detector(self):
+        """
+        รับตัวตรวจจับใหม่ที่โหลดเสร็จแล้ว (ครั้งเดียว)
+
+        Returns:
+            ตัวตรวจจับใหม่ หรือ None ถ้ายังไม่พร้อม
+        """
+        if self._ready_detector is None:
+            return None
+        with self._lock:
+            detector, self._ready_detector = self._ready_detector, None
+        return detector
+
+    def wait_for_loader(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background detector load to finish (used on shutdown and in tests)."""
+        if self._loader_thread is not None:
+            self._loader_thread.join(timeout)
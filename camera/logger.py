@@ -97,6 +97,21 @@ class ActivityLogger:
         # Save to file
         self._save_logs()
     
+    def log_event(self, event: Dict[str, Any]) -> None:
+        """
+        บันทึกเหตุการณ์สรุป (เช่น การนับคนผ่านเส้น) แทนการบันทึกทุกการตรวจจับ
+        
+        Args:
+            event: พจนานุกรมเหตุการณ์ที่มีคีย์ 'type'
+        """
+        event["record_time"] = datetime.datetime.now().isoformat()
+        if "camera_id" not in event:
+            event["camera_id"] = self.camera_id
+        
+        self.activity_logs.append(event)
+        self.info(f"Event: {event.get('type', 'unknown')}")
+        self._save_logs()
+    
     def get_recent_logs(self, count: int = 10) -> List[Dict[str, Any]]:
         """
         ดึงบันทึกล่าสุด
@@ -168,3 +183,48 @@ Log an error message.
 Log a critical message.
         """
         self.logger.critical(message)
+
+
+class SightingThrottle:
+    """
+    ลดบันทึกการพบบุคคลซ้ำ: บันทึกเมื่อพบครั้งแรก และไม่เกินหนึ่งครั้งต่อ interval ต่อบุคคล
+    (ใช้ได้เพราะรหัสบุคคลจาก PersonReIdentifier คงเดิมทุกครั้งที่พบ)
+    """
+    
+    def __init__(self, interval: float = 60.0):
+        """
+        เริ่มต้นตัวจำกัดการบันทึก
+        
+        Args:
+            interval: ช่วงเวลาขั้นต่ำระหว่างบันทึกของบุคคลเดียวกัน (วินาที, 0 = บันทึกทุกครั้ง)
+        """
+        self.interval = interval
+        self._last_logged: Dict[str, float] = {}
+        self._next_prune = 0.0
+    
+    def allow(self, person_id: str, timestamp: float, is_new: bool = False) -> bool:
+        """
+        ควรบันทึกการพบบุคคลนี้หรือไม่
+        
+        Args:
+            person_id: รหัสบุคคล
+            timestamp: เวลาที่พบ
+            is_new: บุคคลใหม่ (บันทึกเสมอ)
+            
+        Returns:
+            bool: True ถ้าควรบันทึก
+        """
+        if self.interval <= 0:
+            return True
+        
+        if timestamp >= self._next_prune:
+            # Entries older than the interval would be allowed anyway; drop them
+            cutoff = timestamp - self.interval
+            self._last_logged = {pid: t for pid, t in self._last_logged.items() if t > cutoff}
+            self._next_prune = timestamp + self.interval
+        
+        last = self._last_logged.get(person_id)
+        if not is_new and last is not None and timestamp - last < self.interval:
+            return False
+        self._last_logged[person_id] = timestamp
+        return True
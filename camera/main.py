@@ -15,20 +15,34 @@ import yaml
 import cv2
 import numpy as np
 import uuid
+from contextlib import nullcontext
 
 # เพิ่มไดเร็กทอรีหลักลงในพาธ
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from camera.detection import PersonDetector
 from camera.reid import PersonReIdentifier
-from camera.logger import ActivityLogger
+from camera.gallery_service import GalleryClient
+from camera.logger import ActivityLogger, SightingThrottle
 from camera.uploader import FirebaseUploader
-from utils.camera_utils import setup_camera
+from camera.replay import SystemClock, VirtualClock, ReplaySource, BenchmarkReport
+from camera.hot_reload import ConfigReloader
+from camera.tracking import CentroidTracker
+from camera.counting import LineCounter, DEFAULT_COUNTING_LINE
+from camera.zones import ZoneMap, ZoneMonitor
+from camera.notifier import N8nNotifier
+from camera.heatmap import HeatmapAccumulator
+from camera.track_analytics import TrackAnalytics
+from camera.annotation import FrameAnnotations, FrameAnnotator
+from utils.camera_utils import DualStreamFrame, YUVFrame, as_bgr, create_camera_source
 from utils.config_utils import decrypt_config_fields, load_encryption_key
 from utils.webcam_utils import WebcamConnection, create_insta360_connection
 from utils.remote_config import setup_remote_config
+from utils.metrics import PipelineMetrics
+from utils.frame_envelope import FrameStamper
+from utils.preview import PreviewBroadcaster
 from utils.face_utils import FaceDetector, FaceDataManager
-from firebase.storage_utils import init_storage_uploader, upload_face_image
+from firebase.storage_utils import init_storage_uploader, upload_face_image, upload_heatmap
 
 # ตั้งค่าการบันทึก
 logging.basicConfig(
@@ -68,6 +82,14 @@ def parse_arguments():
                         help='เปิดใช้งานการตรวจจับใบหน้าและเก็บรวบรวมข้อมูลสำหรับการเทรน AI')
     parser.add_argument('--no-face-upload', action='store_true',
                         help='ปิดการอัปโหลดใบหน้าไปยัง Firebase Storage')
+    parser.add_argument('--replay', type=str,
+                        help='เล่นซ้ำไฟล์วิดีโอผ่านไปป์ไลน์ทั้งหมดเพื่อวัดประสิทธิภาพ (แทนกล้องสด)')
+    parser.add_argument('--replay-realtime', action='store_true',
+                        help='เล่นซ้ำตามเวลาจริงของวิดีโอ แทนการเล่นเร็วที่สุด')
+    parser.add_argument('--replay-max-frames', type=int,
+                        help='จำนวนเฟรมสูงสุดที่จะเล่นซ้ำ')
+    parser.add_argument('--replay-report', type=str,
+                        help='พาธไฟล์ JSON สำหรับบันทึกรายงานประสิทธิภาพของการเล่นซ้ำ')
     
     return parser.parse_args()
 
@@ -95,20 +117,130 @@ def load_config(config_path, encrypt_key=None):
         logger.error(f"ไม่สามารถโหลดการกำหนดค่าได้: {e}")
         return {}
 
-def initialize_system(args, config):
+def create_detector(detection_config):
+    """
+    สร้างตัวตรวจจับบุคคลจากส่วน detection ของการกำหนดค่า
+    
+    Args:
+        detection_config (dict): การกำหนดค่าส่วน detection
+    
+    Returns:
+        PersonDetector: ตัวตรวจจับบุคคล
+    """
+    return PersonDetector(
+        model_path=detection_config.get('model_path', 'models/yolov8n.onnx'),
+        confidence_threshold=detection_config.get('confidence_threshold', 0.5),
+        nms_threshold=detection_config.get('nms_threshold', 0.45),
+        device=detection_config.get('device', 'CPU')
+    )
+
+def apply_runtime_config(config, detector, reidentifier, uploader=None,
+                         face_detector=None, face_manager=None):
+    """
+    นำค่าที่ปรับได้ขณะทำงานไปใช้กับอ็อบเจ็กต์ที่สร้างไว้แล้ว (เกณฑ์, การเก็บข้อมูล, การอัปโหลด)
+    
+    Args:
+        config (dict): การกำหนดค่าใหม่
+        detector (PersonDetector): ตัวตรวจจับบุคคล
+        reidentifier (PersonReIdentifier): ตัวจดจำบุคคล
+        uploader (FirebaseUploader, optional): ตัวอัปโหลด Firebase
+        face_detector (FaceDetector, optional): ตัวตรวจจับใบหน้า
+        face_manager (FaceDataManager, optional): ตัวจัดการข้อมูลใบหน้า
+    """
+    detection_config = config.get('detection', {})
+    detector.confidence_threshold = detection_config.get('confidence_threshold', detector.confidence_threshold)
+    detector.nms_threshold = detection_config.get('nms_threshold', detector.nms_threshold)
+    
+    # การตั้งค่าของแกลเลอรีร่วม (gallery_service) มาจากการกำหนดค่าของบริการเอง
+    reid_config = config.get('reid', {})
+    gallery = reidentifier.local_gallery
+    gallery.similarity_threshold = reid_config.get('similarity_threshold', gallery.similarity_threshold)
+    gallery.retention_period = reid_config.get('retention_period', gallery.retention_period)
+    gallery.max_identities = reid_config.get('max_stored_vectors', gallery.max_identities)
+    gallery.ema_alpha = reid_config.get('ema_alpha', gallery.ema_alpha)
+    gallery.update_threshold = reid_config.get('update_threshold', gallery.update_threshold)
+    if hasattr(gallery.index, 'n_probe'):
+        gallery.index.n_probe = reid_config.get('ivf_probe', gallery.index.n_probe)
+    
+    if uploader:
+        firebase_config = config.get('firebase', {})
+        uploader.retry_interval = firebase_config.get('retry_interval', uploader.retry_interval)
+        uploader.batch_size = firebase_config.get('batch_size', uploader.batch_size)
+    
+    face_config = config.get('face_detection', {})
+    if face_detector is not None:
+        face_detector.confidence_threshold = face_config.get('confidence_threshold', face_detector.confidence_threshold)
+    if face_manager is not None:
+        face_manager.max_faces_per_person = face_config.get('max_faces_per_person', face_manager.max_faces_per_person)
+
+def emit_event(event, activity_logger, uploader=None, notifier=None):
+    """
+    บันทึกและอัปโหลดเหตุการณ์สรุป
+    
+    Args:
+        event (dict): เหตุการณ์ที่มีคีย์ 'type'
+        activity_logger (ActivityLogger): ตัวบันทึกกิจกรรม
+        uploader (FirebaseUploader, optional): ตัวอัปโหลด Firebase
+        notifier (N8nNotifier, optional): ตัวส่งเหตุการณ์ไปยัง n8n
+    """
+    activity_logger.log_event(event)
+    if uploader:
+        uploader.upload_log(event)
+    if notifier:
+        notifier.notify(event)
+
+def save_heatmap_snapshot(heatmap, heatmap_config, timestamp, camera_id,
+                          activity_logger, uploader=None, storage_uploader=None, notifier=None):
+    """
+    บันทึกภาพรวมแผนที่ความร้อน อัปโหลดไปยัง Firebase Storage และบันทึกเหตุการณ์
+    
+    Args:
+        heatmap (HeatmapAccumulator): ตัวสะสมแผนที่ความร้อน
+        heatmap_config (dict): การกำหนดค่าส่วน advanced
+        timestamp (float): เวลาของภาพรวม
+        camera_id (str): รหัสกล้อง
+        activity_logger (ActivityLogger): ตัวบันทึกกิจกรรม
+        uploader (FirebaseUploader, optional): ตัวอัปโหลด Firebase
+        storage_uploader (FirebaseStorageUploader, optional): ตัวอัปโหลด Firebase Storage
+        notifier (N8nNotifier, optional): ตัวส่งเหตุการณ์ไปยัง n8n
+    """
+    samples = heatmap.samples
+    started_at = heatmap.started_at
+    path = heatmap.save_snapshot(
+        heatmap_config.get('heatmap_dir', 'logs/heatmaps'),
+        timestamp,
+        heatmap_config.get('heatmap_format', 'png')
+    )
+    event = {
+        'type': 'heatmap_snapshot',
+        'timestamp': timestamp,
+        'started_at': started_at,
+        'samples': samples,
+        'path': path
+    }
+    remote_path = upload_heatmap(storage_uploader, path, camera_id, {'samples': samples})
+    if remote_path:
+        event['storage_path'] = remote_path
+    emit_event(event, activity_logger, uploader, notifier)
+
+def initialize_system(args, config, clock=None):
     """
     เริ่มต้นระบบ MANTA
     
     Args:
         args (Namespace): อาร์กิวเมนต์บรรทัดคำสั่ง
         config (dict): การกำหนดค่า
+        clock (VirtualClock, optional): นาฬิกาเสมือนสำหรับโหมดเล่นซ้ำ
     
     Returns:
         tuple: (cap, detector, reidentifier, activity_logger, uploader, face_detector, face_manager, storage_uploader)
     """
     # เริ่มต้นกล้อง
     try:
-        if args.webcam_mode or config.get('camera', {}).get('type') == 'webcam':
+        if args.replay:
+            logger.info(f"เริ่มต้นในโหมดเล่นซ้ำจากไฟล์: {args.replay}")
+            cap = ReplaySource(args.replay, clock, max_frames=args.replay_max_frames)
+        elif args.webcam_mode or config.get('camera', {}).get('type') == 'webcam':
             logger.info("เริ่มต้นในโหมด WebCam Protocol")
             
             # ตั้งค่า URL ของอุปกรณ์ถ้ามีการระบุในอาร์กิวเมนต์
@@ -124,13 +256,12 @@ def initialize_system(args, config):
                 logger.info("ใช้การเชื่อมต่อ WebCam ทั่วไป")
                 cap = WebcamConnection(config=config)
             
-            # เชื่อมต่อกับกล้อง
+            # เชื่อมต่อกับกล้อง (ถ้ายังไม่สำเร็จ ตัวควบคุมจะลองใหม่ในเบื้องหลังโดยไม่หยุดลูปหลัก)
             if not cap.connect():
-                logger.error("ไม่สามารถเชื่อมต่อกับกล้องได้")
-                return None, None, None, None, None
+                logger.warning("ยังเชื่อมต่อกับกล้องไม่ได้ จะลองเชื่อมต่อใหม่ในเบื้องหลัง")
         else:
-            # ใช้กล้องปกติผ่าน OpenCV
-            cap = setup_camera(config.get('camera', {}))
+            # ใช้กล้อง Raspberry Pi ผ่าน picamera2 (prefer_picamera) หรือกล้องปกติผ่าน OpenCV
+            cap = create_camera_source(config.get('camera', {}))
             
         logger.info("เริ่มต้นกล้องสำเร็จ")
     except Exception as e:
@@ -139,13 +270,7 @@ def initialize_system(args, config):
     
     # เริ่มต้น PersonDetector
     try:
-        detection_config = config.get('detection', {})
-        detector = PersonDetector(
-            model_path=detection_config.get('model_path', 'models/yolov8n.onnx'),
-            confidence_threshold=detection_config.get('confidence_threshold', 0.5),
-            nms_threshold=detection_config.get('nms_threshold', 0.45),
-            device=detection_config.get('device', 'CPU')
-        )
+        detector = create_detector(config.get('detection', {}))
         logger.info("เริ่มต้นตัวตรวจจับบุคคลสำเร็จ")
     except Exception as e:
         logger.error(f"ไม่สามารถเริ่มต้นตัวตรวจจับบุคคลได้: {e}")
@@ -154,12 +279,42 @@ def initialize_system(args, config):
     # เริ่มต้น PersonReIdentifier
     try:
         reid_config = config.get('reid', {})
+        # แกลเลอรีร่วมของหลายกล้อง (ถ้าเปิดใช้งาน) ให้รหัสบุคคลเดียวกันทุกกล้อง
+        shared_gallery = None
+        service_config = reid_config.get('gallery_service', {})
+        if service_config.get('enabled', False) and not args.replay:
+            shared_gallery = GalleryClient(
+                service_config.get('address', '/tmp/manta-gallery.sock'),
+                authkey=service_config.get('authkey'),
+                timeout=service_config.get('timeout', 1.0)
+            )
+            logger.info(f"ใช้แกลเลอรีร่วมที่ {shared_gallery.address}")
+        
+        index_options = {'dtype': reid_config.get('index_dtype', 'float32')}
+        if reid_config.get('index', 'brute') == 'ivf':
+            index_options.update(n_lists=reid_config.get('ivf_lists', 64),
+                                 n_probe=reid_config.get('ivf_probe', 8))
         reidentifier = PersonReIdentifier(
             feature_size=reid_config.get('feature_size', 128),
             similarity_threshold=reid_config.get('similarity_threshold', 0.6),
-            max_stored_vectors=reid_config.get('max_stored_vectors', 1000)
+            retention_period=reid_config.get('retention_period', 3600),
+            max_stored_vectors=reid_config.get('max_stored_vectors', 1000),
+            model_path=reid_config.get('model_path'),
+            index=reid_config.get('index', 'brute'),
+            index_options=index_options,
+            ema_alpha=reid_config.get('ema_alpha', 0.1),
+            update_threshold=reid_config.get('update_threshold'),
+            gallery=shared_gallery,
+            camera_id=config.get('camera', {}).get('id')
         )
         logger.info("เริ่มต้นตัวจดจำบุคคลสำเร็จ")
+        
+        # โหลดแกลเลอรีที่บันทึกไว้ เพื่อไม่ให้นับบุคคลที่อยู่ในพื้นที่เป็นบุคคลใหม่หลังรีสตาร์ท
+        # (แกลเลอรีร่วมถูกบันทึกโดยบริการแกลเลอรี)
+        gallery_dir = reid_config.get('gallery_dir')
+        if gallery_dir and shared_gallery is None and not args.replay:
+            loaded = reidentifier.load_gallery(gallery_dir)
+            logger.info(f"โหลดแกลเลอรีการจดจำบุคคล {loaded} รายการจาก {gallery_dir}")
     except Exception as e:
         logger.error(f"ไม่สามารถเริ่มต้นตัวจดจำบุคคลได้: {e}")
         return cap, detector, None, None, None
@@ -251,69 +406,86 @@ def initialize_system(args, config):
     
     return cap, detector, reidentifier, activity_logger, uploader, face_detector, face_manager, storage_uploader
 
-def process_frame(frame, detector, reidentifier, frame_skip_counter, frame_skip, 
-                face_detector=None, face_manager=None):
+def _measure(timer, stage):
+    """จับเวลาขั้นตอนของไปป์ไลน์ถ้ามีตัวจับเวลา (ไม่มีค่าใช้จ่ายถ้าไม่มี)"""
+    return timer.measure(stage) if timer is not None else nullcontext()
+
+def process_frame(frame, detector, reidentifier, frame_skip_counter, frame_skip,
+                face_detector=None, face_manager=None, timer=None, timestamp=None):
     """
     ประมวลผลเฟรมเพื่อตรวจจับและจดจำบุคคล
     
     Args:
-        frame (numpy.ndarray): เฟรมภาพที่จะประมวลผล
+        frame (numpy.ndarray | DualStreamFrame): เฟรมภาพที่จะประมวลผล (DualStreamFrame: ตรวจจับบนภาพเล็ก
+            และตัดภาพบุคคล/ใบหน้าจากภาพความละเอียดเต็ม โดยพิกัดผลลัพธ์เป็นของภาพเต็ม)
         detector (PersonDetector): ตัวตรวจจับบุคคล
         reidentifier (PersonReIdentifier): ตัวจดจำบุคคล
         frame_skip_counter (int): ตัวนับการข้ามเฟรม
         frame_skip (int): จำนวนเฟรมที่จะข้าม
         face_detector (FaceDetector, optional): ตัวตรวจจับใบหน้า
         face_manager (FaceDataManager, optional): ตัวจัดการข้อมูลใบหน้า
+        timer (FrameEnvelope | PipelineMetrics, optional): ตัวจับเวลาแต่ละขั้นตอน (มีเมธอด measure(stage))
+        timestamp (float, optional): เวลาจับภาพของเฟรม (epoch) ที่แกลเลอรีบันทึกเป็นเวลาที่พบบุคคล
+            (None = เวลาปัจจุบัน; ในโหมดเล่นซ้ำคือเวลาของ VirtualClock)
     
     Returns:
-        tuple: (detections, identities, frame_with_detections, frame_skip_counter, faces_data)
+        tuple: (detections, identities, annotations, frame_skip_counter, faces_data)
+               annotations (FrameAnnotations) เป็นรายการสิ่งที่ต้องวาด ซึ่งวาดจริงด้วย FrameAnnotator
+               เฉพาะเมื่อมีผู้ใช้ภาพเท่านั้น
     """
+    # ภาพสำหรับตรวจจับและวาดผล (ภาพเล็กในโหมดสองสตรีม) และอัตราส่วนไปยังภาพเต็ม
+    dual_stream = isinstance(frame, DualStreamFrame)
+    detection_frame = frame.low if dual_stream else frame
+    annotations = FrameAnnotations(detection_frame, frame.scale if dual_stream else (1.0, 1.0))
+    
     # ข้ามเฟรมตามที่กำหนด
     frame_skip_counter += 1
     if frame_skip_counter <= frame_skip:
-        return [], [], frame, frame_skip_counter, []
+        return [], [], annotations, frame_skip_counter, []
     
     frame_skip_counter = 0
     
     # ตรวจจับบุคคล
-    detections = detector.detect(frame)
-    
-    # สร้างก๊อปปี้ของเฟรมเพื่อวาดการตรวจจับ
-    frame_with_detections = frame.copy()
-    
-    # จดจำและติดตามบุคคล
+    with _measure(timer, 'detect'):
+        detections = detector.detect(detection_frame)
+        if dual_stream:
+            detections = [frame.to_full(det) for det in detections]
+    
+    # ภาพความละเอียดเต็มถูกโหลด (และแปลงเป็น BGR) เฉพาะเมื่อมีบุคคลที่ต้องตัดภาพ
+    full_frame = (frame.full if dual_stream else frame) if detections else None
+    full_bgr = as_bgr(full_frame) if detections else None
+    
+    # จดจำบุคคลทั้งหมดในเฟรมด้วยการทำนายครั้งเดียว
+    with _measure(timer, 'reid'):
+        reid_results = reidentifier.process_batch(
+            full_bgr, [(int(x1), int(y1), int(x2), int(y2)) for x1, y1, x2, y2, _, _ in detections],
+            timestamp=timestamp)
+    
+    # ติดตามบุคคล
     identities = []
     faces_data = []  # เก็บข้อมูลใบหน้าที่ตรวจพบ
     
     for i, det in enumerate(detections):
         # แยกข้อมูลการตรวจจับ
         x1, y1, x2, y2, conf, class_id = det
-        
-        # แยกภาพบุคคล
         x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-        person_img = frame[y1:y2, x1:x2]
         
-        # จดจำบุคคล
-        is_new, person_id = reidentifier.process(person_img)
+        is_new, person_id = reid_results[i]
         identities.append((person_id, is_new))
         
-        # วาดกรอบและข้อมูล
-        color = (0, 255, 0) if is_new else (0, 0, 255)
-        cv2.rectangle(frame_with_detections, (x1, y1), (x2, y2), color, 2)
-        
-        # แสดงข้อความ
-        text = f"ID: {person_id[:8]}... {'NEW' if is_new else ''}"
-        cv2.putText(frame_with_detections, text, (x1, y1 - 10), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        # บันทึกกรอบและข้อมูลสำหรับวาด (วาดจริงเฉพาะเมื่อมีผู้ใช้ภาพ)
+        annotations.add_person((x1, y1, x2, y2), person_id, is_new)
         
         # ตรวจจับใบหน้า ถ้าเปิดใช้งาน
         if face_detector is not None and face_manager is not None:
             try:
                 # ตรวจจับใบหน้าในภาพบุคคล
-                face_images = face_detector.process_person_for_faces(frame, det)
+                with _measure(timer, 'face'):
+                    face_images, face_boxes = face_detector.process_person_for_faces(
+                        full_frame, det, return_boxes=True)
                 
                 # วนลูปผ่านทุกใบหน้าที่ตรวจพบ
-                for face_idx, face_img in enumerate(face_images):
+                for face_img, face_box in zip(face_images, face_boxes):
                     if face_img.size > 0:
                         # บันทึกภาพใบหน้า
                         face_path = face_manager.save_face(face_img, person_id)
@@ -333,21 +505,13 @@ def process_frame(frame, detector, reidentifier, frame_skip_counter, frame_skip,
                             # เพิ่มข้อมูลใบหน้าที่ตรวจพบ
                             faces_data.append((face_path, person_id, metadata))
                             
-                            # วาดกรอบใบหน้าและข้อความในโหมดดีบั๊ก
-                            face_color = (255, 0, 0)  # สีแดง
-                            face_box = face_detector.detect_faces(person_img)[face_idx]
+                            # บันทึกกรอบใบหน้า (พิกัดของภาพเต็ม) สำหรับวาด
                             fx, fy, fw, fh, _ = face_box
-                            
-                            # ปรับพิกัดให้สัมพันธ์กับภาพเต็ม
-                            fx1, fy1 = x1 + fx, y1 + fy
-                            fx2, fy2 = fx1 + fw, fy1 + fh
-                            
-                            # วาดกรอบใบหน้า
-                            cv2.rectangle(frame_with_detections, (fx1, fy1), (fx2, fy2), face_color, 1)
+                            annotations.add_face((fx, fy, fx + fw, fy + fh))
             except Exception as e:
                 logger.warning(f"เกิดข้อผิดพลาดในการตรวจจับใบหน้า: {e}")
     
-    return detections, identities, frame_with_detections, frame_skip_counter, faces_data
+    return detections, identities, annotations, frame_skip_counter, faces_data
 
 def main():
     """ฟังก์ชันหลักของโปรแกรม"""
@@ -373,24 +537,48 @@ def main():
         for handler in logging.root.handlers:
             handler.setLevel(logging.DEBUG)
     
+    # ตัวชี้วัดประสิทธิภาพของไปป์ไลน์ (แสดงที่ /metrics ของเซิร์ฟเวอร์การกำหนดค่าระยะไกล)
+    metrics = PipelineMetrics()
+    YUVFrame.listener = lambda format: metrics.frame_conversions.labels(format).inc()
+    
     # เริ่มต้นเซิร์ฟเวอร์การกำหนดค่าระยะไกล (ถ้าเปิดใช้งาน)
     remote_config_server = None
+    preview = None
     if args.enable_remote_config or config.get('remote_config', {}).get('enabled', False):
         port = args.remote_config_port or config.get('remote_config', {}).get('port', 8080)
         enable_wifi_direct = args.enable_wifi_direct or config.get('wifi_direct', {}).get('enabled', False)
         
+        # ภาพตัวอย่าง MJPEG ที่ /stream.mjpg (เข้ารหัสเฉพาะเมื่อมีผู้ชม)
+        preview_config = config.get('remote_config', {}).get('preview', {})
+        if preview_config.get('enabled', True):
+            preview = PreviewBroadcaster(
+                max_fps=preview_config.get('max_fps', 5),
+                jpeg_quality=preview_config.get('jpeg_quality', 70),
+                max_width=preview_config.get('max_width', 960)
+            )
+        
         logger.info(f"กำลังเริ่มเซิร์ฟเวอร์การกำหนดค่าระยะไกลที่พอร์ต {port}...")
         remote_config_server = setup_remote_config(
             args.config, 
             enable_wifi_direct=enable_wifi_direct,
-            port=port
+            port=port,
+            metrics=metrics,
+            preview=preview
         )
         
         if remote_config_server:
             logger.info(f"เซิร์ฟเวอร์การกำหนดค่าระยะไกลทำงานที่ http://0.0.0.0:{port}/")
     
+    # ตั้งค่านาฬิกาและรายงานประสิทธิภาพสำหรับโหมดเล่นซ้ำ
+    clock = SystemClock()
+    report = None
+    if args.replay:
+        clock = VirtualClock(realtime=args.replay_realtime)
+        report = BenchmarkReport(source_path=args.replay)
+        metrics.add_listener(report.record)
+    
     # เริ่มต้นระบบ
-    cap, detector, reidentifier, activity_logger, uploader, face_detector, face_manager, storage_uploader = initialize_system(args, config)
+    cap, detector, reidentifier, activity_logger, uploader, face_detector, face_manager, storage_uploader = initialize_system(args, config, clock)
     
     if cap is None or detector is None or reidentifier is None or activity_logger is None:
         logger.error("ไม่สามารถเริ่มต้นระบบได้ กำลังออกจากโปรแกรม")
@@ -409,100 +597,321 @@ def main():
         else:
             logger.info("การอัปโหลดใบหน้าไปยัง Firebase Storage ไม่ทำงาน")
     
+    # โหลดการกำหนดค่าใหม่ขณะทำงาน: เซิร์ฟเวอร์ส่งการกำหนดค่าที่บันทึกแล้วมา
+    # และลูปหลักนำไปใช้ระหว่างเฟรม
+    reloader = ConfigReloader(config)
+    if remote_config_server:
+        def submit_config(new_config):
+            if encrypt_key:
+                new_config = decrypt_config_fields(new_config, encrypt_key)
+            reloader.submit(new_config)
+        remote_config_server.add_config_listener(submit_config)
+    
+    # เปลี่ยนโมเดลหรืออุปกรณ์: โหลดโมเดลใหม่ในเบื้องหลังแล้วสลับเมื่อพร้อม
+    reloader.subscribe(
+        ('detection.model_path', 'detection.device'),
+        lambda new_config: reloader.load_detector_async(
+            lambda: create_detector(new_config.get('detection', {})))
+    )
+    
+    # การติดตามและการนับคนผ่านเส้น (advanced)
+    advanced_config = config.get('advanced', {})
+    line_counter = None
+    if advanced_config.get('enable_counting', False):
+        line_counter = LineCounter(advanced_config.get('counting_line', DEFAULT_COUNTING_LINE))
+        reloader.subscribe(
+            ('advanced.counting_line',),
+            lambda new_config: line_counter.set_line(
+                new_config.get('advanced', {}).get('counting_line', DEFAULT_COUNTING_LINE))
+        )
+        logger.info("การนับคนผ่านเส้นทำงาน")
+    
+    # มาสก์โซนใช้ร่วมกันระหว่างการตรวจจับโซนและการวิเคราะห์แทร็ก
+    zone_map = None
+    if advanced_config.get('enable_zone_detection', False) or advanced_config.get('enable_track_analytics', False):
+        zone_map = ZoneMap(advanced_config.get('zones') or [])
+    zone_monitor = None
+    if advanced_config.get('enable_zone_detection', False) and len(zone_map):
+        zone_monitor = ZoneMonitor(zone_map)
+        logger.info(f"การตรวจจับโซนทำงาน: {', '.join(zone_map.names)}")
+    
+    def update_zones(new_config):
+        zones = new_config.get('advanced', {}).get('zones') or []
+        if zone_monitor is not None:
+            zone_monitor.set_zones(zones)
+        elif zone_map is not None:
+            zone_map.set_zones(zones)
+    reloader.subscribe(('advanced.zones',), update_zones)
+    
+    # สรุปเส้นทางและเวลาอยู่ในโซนเมื่อแทร็กสิ้นสุด (ไม่บันทึกตำแหน่งรายเฟรม)
+    track_analytics = None
+    if advanced_config.get('enable_track_analytics', False):
+        track_analytics = TrackAnalytics(
+            zone_map=zone_map,
+            max_points=advanced_config.get('track_path_points', 32),
+            min_duration=advanced_config.get('track_min_duration', 1.0)
+        )
+        logger.info("การวิเคราะห์เส้นทางของแทร็กทำงาน")
+    
+    # ส่งเหตุการณ์ไปยัง n8n (เช่น zone_entry) ถ้าเปิดใช้งาน
+    notifier = None
+    n8n_config = config.get('n8n', {})
+    if n8n_config.get('enabled', False) and n8n_config.get('webhook_url'):
+        notifier = N8nNotifier(
+            webhook_url=n8n_config['webhook_url'],
+            notify_events=n8n_config.get('notify_events', []),
+            camera_id=config.get('camera', {}).get('id')
+        )
+    
+    # แผนที่ความร้อนของตำแหน่งเท้า บันทึกทุก heatmap_interval วินาที
+    heatmap = None
+    if advanced_config.get('enable_heatmap', False):
+        heatmap = HeatmapAccumulator(
+            grid_size=tuple(advanced_config.get('heatmap_grid', [64, 36])),
+            half_life=advanced_config.get('heatmap_half_life', 0),
+            interval=advanced_config.get('heatmap_interval', 3600),
+            reset_on_snapshot=advanced_config.get('heatmap_reset', True)
+        )
+        
+        def update_heatmap(new_config):
+            new_advanced = new_config.get('advanced', {})
+            heatmap.interval = float(new_advanced.get('heatmap_interval', 3600))
+            heatmap.half_life = float(new_advanced.get('heatmap_half_life', 0))
+            heatmap.reset_on_snapshot = new_advanced.get('heatmap_reset', True)
+        reloader.subscribe(
+            ('advanced.heatmap_interval', 'advanced.heatmap_half_life', 'advanced.heatmap_reset'),
+            update_heatmap
+        )
+        
+        # ภาพรวมแผนที่ความร้อนอัปโหลดผ่าน Firebase Storage แม้ไม่ได้เปิดการตรวจจับใบหน้า
+        firebase_config = config.get('firebase', {})
+        if storage_uploader is None and not args.no_upload and firebase_config.get('enabled', False) \
+                and firebase_config.get('storage', {}).get('enabled', False):
+            storage_uploader = init_storage_uploader(
+                firebase_config.get('config_path'),
+                firebase_config.get('storage', {}).get('bucket')
+            )
+        logger.info("แผนที่ความร้อนการเคลื่อนไหวทำงาน")
+    
+    tracker = None
+    if line_counter is not None or zone_monitor is not None or heatmap is not None \
+            or track_analytics is not None or advanced_config.get('enable_tracking', False):
+        tracker = CentroidTracker(max_objects=advanced_config.get('tracking_max_objects', 20))
+        reloader.subscribe(
+            ('advanced.tracking_max_objects',),
+            lambda new_config: setattr(tracker, 'max_objects',
+                                       new_config.get('advanced', {}).get('tracking_max_objects', 20))
+        )
+    
+    # แกลเลอรีการจดจำบุคคลที่บันทึกเป็นระยะและเมื่อปิดระบบ (ไม่ใช้ในโหมดเล่นซ้ำ)
+    gallery_dir = None if args.replay or reidentifier.gallery is not reidentifier.local_gallery \
+        else config.get('reid', {}).get('gallery_dir')
+    next_gallery_checkpoint = clock.time() + config.get('reid', {}).get('checkpoint_interval', 300)
+    
+    # บันทึกการพบบุคคลเดิมซ้ำไม่เกินหนึ่งครั้งต่อช่วงเวลา
+    sighting_throttle = SightingThrottle(config.get('logging', {}).get('person_log_interval', 60))
+    reloader.subscribe(
+        ('logging.person_log_interval',),
+        lambda new_config: setattr(sighting_throttle, 'interval',
+                                   new_config.get('logging', {}).get('person_log_interval', 60))
+    )
+    
+    # ติดตามขนาดคิวการอัปโหลด
+    if uploader:
+        metrics.track_queue('upload', uploader.upload_queue.qsize, upload=True)
+    if storage_uploader:
+        metrics.track_queue('face_storage', storage_uploader.upload_queue.qsize, upload=True)
+    
     # ตั้งค่าการข้ามเฟรม
     frame_skip = config.get('detection', {}).get('frame_skip', 0)
     frame_skip_counter = 0
     
+    # ห่อเฟรมด้วยหมายเลขลำดับและเวลาจับภาพ (เวลาของเหตุการณ์และความหน่วงนับจากตอนจับภาพ)
+    stamper = FrameStamper(str(config.get('camera', {}).get('id', 'unknown')), clock,
+                           timer=metrics, on_missed=metrics.frames_missed.inc)
+    
     # ตั้งค่าการแสดงวิดีโอ
     show_video = args.debug or config.get('system', {}).get('show_video', False)
+    annotator = FrameAnnotator()
     
     logger.info("MANTA กำลังทำงาน...")
     
+    if report:
+        report.start()
+    
     try:
         while True:
+            # นำการกำหนดค่าใหม่ไปใช้ระหว่างเฟรม (ถ้ามี)
+            new_config = reloader.apply_pending()
+            if new_config is not None:
+                config = new_config
+                frame_skip = config.get('detection', {}).get('frame_skip', 0)
+                apply_runtime_config(config, detector, reidentifier, uploader,
+                                     face_detector, face_manager)
+            
+            # สลับไปใช้ตัวตรวจจับที่โหลดเสร็จแล้ว
+            new_detector = reloader.take_detector()
+            if new_detector is not None:
+                detector = new_detector
+                apply_runtime_config(reloader.config, detector, reidentifier)
+                logger.info("สลับไปใช้โมเดลตรวจจับใหม่แล้ว")
+            
             # อ่านเฟรม
-            if isinstance(cap, WebcamConnection):
-                ret, frame = cap.read()
-            else:
+            with metrics.measure('read'):
                 ret, frame = cap.read()
             
             if not ret or frame is None:
+                # จบไฟล์วิดีโอในโหมดเล่นซ้ำ
+                if isinstance(cap, ReplaySource) and cap.finished:
+                    logger.info("เล่นซ้ำไฟล์วิดีโอครบแล้ว")
+                    break
+                
+                # สตรีมยังเชื่อมต่ออยู่แต่เฟรมใหม่ยังไม่มา (read รอไม่เกินหนึ่งช่วงเฟรมแล้ว)
+                if isinstance(cap, WebcamConnection) and cap.connected:
+                    continue
+                
                 logger.warning("ไม่สามารถอ่านเฟรมจากกล้องได้")
-                time.sleep(1)
+                metrics.frames_dropped.inc()
+                clock.sleep(1)
                 continue
             
-            # ประมวลผลเฟรม
-            detections, identities, frame_with_detections, frame_skip_counter, faces_data = process_frame(
+            metrics.frames.inc()
+            frame_start = time.perf_counter()
+            envelope = stamper.wrap(frame, getattr(cap, 'last_capture', None))
+            
+            # ประมวลผลเฟรม (เวลาของแต่ละขั้นตอนบันทึกทั้งในซองข้อมูลเฟรมและตัวชี้วัด)
+            detections, identities, annotations, frame_skip_counter, faces_data = process_frame(
                 frame, detector, reidentifier, frame_skip_counter, frame_skip,
-                face_detector, face_manager
+                face_detector, face_manager, timer=envelope, timestamp=envelope.captured_wall
             )
             
+            if frame_skip_counter:
+                metrics.frames_skipped.inc()
+            elif detections:
+                metrics.detections.inc(len(detections))
+            
+            # ติดตามบุคคลและนับการผ่านเส้น (เฉพาะเฟรมที่ประมวลผล)
+            if tracker is not None and not frame_skip_counter:
+                with envelope.measure('track'):
+                    tracks = tracker.update(detections, frame.shape, envelope.captured_wall)
+                    if line_counter is not None:
+                        crossing_event = line_counter.update(tracks)
+                        if crossing_event:
+                            emit_event(crossing_event, activity_logger, uploader, notifier)
+                    if zone_monitor is not None:
+                        for zone_event in zone_monitor.update(tracks, frame.shape):
+                            emit_event(zone_event, activity_logger, uploader, notifier)
+                    if heatmap is not None:
+                        heatmap.add(tracks.feet, tracks.timestamp)
+                    if track_analytics is not None:
+                        for summary in track_analytics.update(tracks, frame.shape):
+                            emit_event(summary, activity_logger, uploader, notifier)
+            
+            # บันทึกภาพรวมแผนที่ความร้อนตามรอบเวลา
+            if heatmap is not None and heatmap.due(clock.time()):
+                with envelope.measure('heatmap'):
+                    try:
+                        save_heatmap_snapshot(heatmap, config.get('advanced', {}), clock.time(),
+                                              config.get('camera', {}).get('id', 'unknown'),
+                                              activity_logger, uploader, storage_uploader, notifier)
+                    except Exception as e:
+                        logger.error(f"ไม่สามารถบันทึกแผนที่ความร้อนได้: {e}")
+            
+            # บันทึกแกลเลอรีการจดจำบุคคลตามรอบเวลา (เขียนไฟล์ในเบื้องหลัง)
+            if gallery_dir and clock.time() >= next_gallery_checkpoint:
+                with envelope.measure('checkpoint'):
+                    reidentifier.save_gallery(gallery_dir, background=True)
+                next_gallery_checkpoint = clock.time() + config.get('reid', {}).get('checkpoint_interval', 300)
+            
             # บันทึกกิจกรรม
-            if detections and identities:
-                for det, (person_id, is_new) in zip(detections, identities):
-                    x1, y1, x2, y2, conf, class_id = det
-                    
-                    # สร้างรายการบันทึก
-                    log_entry = {
-                        'timestamp': time.time(),
-                        'person_id': person_id,
-                        'is_new': is_new,
-                        'confidence': float(conf),
-                        'location': {
-                            'x1': int(x1),
-                            'y1': int(y1),
-                            'x2': int(x2),
-                            'y2': int(y2)
+            with envelope.measure('log'):
+                if detections and identities:
+                    now = envelope.captured_wall
+                    for det, (person_id, is_new) in zip(detections, identities):
+                        # บันทึกเฉพาะครั้งแรกและไม่เกินหนึ่งครั้งต่อ person_log_interval ต่อบุคคล
+                        if not sighting_throttle.allow(person_id, now, is_new):
+                            continue
+                        x1, y1, x2, y2, conf, class_id = det
+                        
+                        # สร้างรายการบันทึก
+                        log_entry = {
+                            'timestamp': now,
+                            'person_id': person_id,
+                            'is_new': is_new,
+                            'confidence': float(conf),
+                            'location': {
+                                'x1': int(x1),
+                                'y1': int(y1),
+                                'x2': int(x2),
+                                'y2': int(y2)
+                            }
                         }
-                    }
-                    
-                    # เพิ่มข้อมูลว่ามีใบหน้าหรือไม่
-                    has_face = any(pid == person_id for _, pid, _ in faces_data)
-                    log_entry['has_face'] = has_face
-                    
-                    # บันทึกไปยัง ActivityLogger
-                    activity_logger.log_activity(log_entry)
-                    
-                    # อัปโหลดไปยัง Firebase ถ้าเปิดใช้งาน
-                    if uploader:
-                        uploader.upload_log(log_entry)
+                        
+                        # เพิ่มข้อมูลว่ามีใบหน้าหรือไม่
+                        has_face = any(pid == person_id for _, pid, _ in faces_data)
+                        log_entry['has_face'] = has_face
+                        
+                        # บันทึกไปยัง ActivityLogger
+                        activity_logger.log_activity(log_entry)
+                        
+                        # อัปโหลดไปยัง Firebase ถ้าเปิดใช้งาน
+                        if uploader:
+                            uploader.upload_log(log_entry)
             
             # อัปโหลดภาพใบหน้าไปยัง Firebase Storage
-            if faces_data and storage_uploader:
-                for face_path, person_id, metadata in faces_data:
-                    # อัปโหลดภาพใบหน้า
-                    remote_path = upload_face_image(storage_uploader, face_path, person_id, metadata)
-                    
-                    if remote_path:
-                        logger.debug(f"อัปโหลดใบหน้าไปยัง Firebase Storage: {remote_path}")
+            with envelope.measure('upload'):
+                if faces_data and storage_uploader:
+                    for face_path, person_id, metadata in faces_data:
+                        # อัปโหลดภาพใบหน้า
+                        remote_path = upload_face_image(storage_uploader, face_path, person_id, metadata)
                         
-                        # บันทึกข้อมูลการอัปโหลดใบหน้าใน Firebase Database
-                        if uploader:
-                            # สร้างรายการบันทึกสำหรับใบหน้า
-                            face_log = {
-                                'timestamp': time.time(),
-                                'person_id': person_id,
-                                'face_id': metadata.get('face_id', str(uuid.uuid4())),
-                                'storage_path': remote_path,
-                                'metadata': metadata
-                            }
+                        if remote_path:
+                            logger.debug(f"อัปโหลดใบหน้าไปยัง Firebase Storage: {remote_path}")
                             
-                            # อัปโหลดไปยัง Firebase
-                            uploader.upload_log({
-                                'type': 'face_detected',
-                                'data': face_log
-                            })
+                            # บันทึกข้อมูลการอัปโหลดใบหน้าใน Firebase Database
+                            if uploader:
+                                # สร้างรายการบันทึกสำหรับใบหน้า
+                                face_log = {
+                                    'timestamp': envelope.captured_wall,
+                                    'person_id': person_id,
+                                    'face_id': metadata.get('face_id', str(uuid.uuid4())),
+                                    'storage_path': remote_path,
+                                    'metadata': metadata
+                                }
+                                
+                                # อัปโหลดไปยัง Firebase
+                                uploader.upload_log({
+                                    'type': 'face_detected',
+                                    'data': face_log
+                                })
             
-            # แสดงเฟรมถ้าเปิดใช้งาน
-            if show_video:
-                cv2.imshow('MANTA - Person Detection', frame_with_detections)
+            # วาดผลการตรวจจับเฉพาะเมื่อมีผู้ใช้ภาพ: หน้าต่างแสดงผล หรือผู้ชม /stream.mjpg ที่ถึงรอบเฟรม
+            publish_preview = preview is not None and preview.wants_frame
+            if show_video or publish_preview:
+                with envelope.measure('annotate'):
+                    canvas = annotator.render(annotations)
                 
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    break
+                # ส่งภาพตัวอย่างให้ผู้ชมที่เชื่อมต่อผ่าน /stream.mjpg
+                if publish_preview:
+                    with envelope.measure('preview'):
+                        preview.publish(canvas)
+                
+                # แสดงเฟรมถ้าเปิดใช้งาน
+                if show_video:
+                    cv2.imshow('MANTA - Person Detection', canvas)
+                    
+                    key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
+                        break
+            
+            # เก็บสถิติเวลารวมของเฟรม
+            envelope.record('frame', time.perf_counter() - frame_start)
+            metrics.frame_latency.observe(envelope.latency(clock.monotonic()))
+            if report:
+                report.count_frame(detections, identities)
             
             # หน่วงเวลาเล็กน้อยเพื่อลดการใช้ CPU
-            time.sleep(0.01)
+            clock.sleep(0.01)
     
     except KeyboardInterrupt:
         logger.info("ได้รับการขัดจังหวะจากผู้ใช้ กำลังออกจากโปรแกรม")
@@ -517,6 +926,28 @@ def main():
         else:
             cap.release()
         
+        # สรุปแทร็กที่ยังติดตามอยู่
+        if track_analytics is not None:
+            for summary in track_analytics.finish_all():
+                emit_event(summary, activity_logger, uploader, notifier)
+        
+        # บันทึกแกลเลอรีการจดจำบุคคลล่าสุด
+        if gallery_dir:
+            try:
+                reidentifier.save_gallery(gallery_dir)
+                logger.info(f"บันทึกแกลเลอรีการจดจำบุคคล {reidentifier.gallery_size} รายการ")
+            except Exception as e:
+                logger.error(f"ไม่สามารถบันทึกแกลเลอรีการจดจำบุคคลได้: {e}")
+        
+        # บันทึกแผนที่ความร้อนส่วนที่ยังไม่ได้บันทึก
+        if heatmap is not None and heatmap.samples:
+            try:
+                save_heatmap_snapshot(heatmap, config.get('advanced', {}), clock.time(),
+                                      config.get('camera', {}).get('id', 'unknown'),
+                                      activity_logger, uploader, storage_uploader, notifier)
+            except Exception as e:
+                logger.error(f"ไม่สามารถบันทึกแผนที่ความร้อนได้: {e}")
+        
         # ล้างข้อมูลค้างใน Firebase Realtime Database
         if uploader:
             logger.info("กำลังล้างข้อมูลค้างใน Firebase...")
@@ -528,10 +959,22 @@ def main():
             storage_uploader.flush()
             storage_uploader.stop()
         
+        # ส่งเหตุการณ์ n8n ที่ค้างอยู่
+        if notifier:
+            notifier.stop()
+        
         # หยุดเซิร์ฟเวอร์การกำหนดค่าระยะไกล (ถ้ามี)
         if remote_config_server:
             remote_config_server.stop()
         
+        # แสดงและบันทึกรายงานประสิทธิภาพของการเล่นซ้ำ
+        if report:
+            report.stop()
+            logger.info("รายงานประสิทธิภาพการเล่นซ้ำ:\n" + report.format_text())
+            if args.replay_report:
+                report.save(args.replay_report)
+                logger.info(f"บันทึกรายงานประสิทธิภาพไปยัง {args.replay_report}")
+        
         logger.info("MANTA ถูกปิดอย่างปลอดภัย")
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+โมดูลแจ้งเตือนผ่าน n8n webhook สำหรับระบบ MANTA
+(n8n webhook notifier for MANTA system)
+
+ส่งเหตุการณ์ที่อยู่ใน n8n.notify_events ไปยัง webhook ในเธรดเบื้องหลัง
+ลูปหลักเพียงใส่เหตุการณ์ลงคิว จึงไม่ถูกบล็อกโดยเครือข่าย
+"""
+
+import json
+import logging
+import queue
+import threading
+import urllib.request
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger('manta.notifier')
+
+
+class N8nNotifier:
+    """
+    ตัวส่งเหตุการณ์ไปยัง n8n webhook
+
+    เนื้อหาที่ส่งคือเหตุการณ์เดิมพร้อมคีย์ 'event_type' (ตามเวิร์กโฟลว์ใน n8n/workflows)
+    ถ้าคิวเต็ม เหตุการณ์ใหม่จะถูกทิ้งแทนการบล็อกลูปหลัก
+    """
+
+    def __init__(self, webhook_url: str, notify_events: Iterable[str],
+                 camera_id: Optional[str] = None, timeout: float = 5.0,
+                 max_queue: int = 100):
+        """
+        เริ่มต้นตัวส่งเหตุการณ์
+
+        Args:
+            webhook_url: URL ของ n8n webhook
+            notify_events: ประเภทเหตุการณ์ที่จะส่ง (เช่น zone_entry)
+            camera_id: รหัสกล้องที่จะใส่ในทุกเหตุการณ์
+            timeout: เวลารอการตอบกลับของ webhook (วินาที)
+            max_queue: จำนวนเหตุการณ์สูงสุดที่รอส่ง
+        """
+        self.webhook_url = webhook_url
+        self.notify_events = set(notify_events or [])
+        self.camera_id = camera_id
+        self.timeout = timeout
+        self.dropped = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name='n8n-notifier', daemon=True)
+        self._thread.start()
+
+    def wants(self, event_type: str) -> bool:
+        """True if events of this type are forwarded to n8n."""
+        return event_type in self.notify_events
+
+    def notify(self, event: Dict[str, Any]) -> bool:
+        """
+        ใส่เหตุการณ์ลงคิวถ้าประเภทอยู่ใน notify_events (ไม่บล็อก)
+
+        Args:
+            event: เหตุการณ์ที่มีคีย์ 'type'
+
+        Returns:
+            bool: True ถ้าเหตุการณ์ถูกใส่ลงคิว
+        """
+        event_type = event.get('type')
+        if not self._running or event_type not in self.notify_events:
+            return False
+
+        payload = dict(event)
+        payload['event_type'] = event_type
+        if self.camera_id and 'camera_id' not in payload:
+            payload['camera_id'] = self.camera_id
+
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _post(self, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, default=str).encode('utf-8')
+        request = urllib.request.Request(self.webhook_url, data=data, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _worker(self) -> None:
+        while self._running or not self._queue.empty():
+            try:
+                payload = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._post(payload)
+            except Exception as e:
+                logger.warning(f"ไม่สามารถส่งเหตุการณ์ {payload.get('event_type')} ไปยัง n8n ได้: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        หยุดตัวส่งหลังจากส่งเหตุการณ์ที่ค้างอยู่ (รอไม่เกิน timeout วินาที)
+        """
+        self._running = False
+        self._thread.join(timeout)
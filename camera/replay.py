@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+โมดูลเล่นซ้ำวิดีโอและวัดประสิทธิภาพสำหรับระบบ MANTA
+(Replay and benchmark module for MANTA system)
+
+ป้อนไฟล์วิดีโอที่บันทึกไว้ผ่านไปป์ไลน์ทั้งหมดด้วยนาฬิกาเสมือน
+เพื่อให้สามารถเปรียบเทียบโมเดล แบ็กเอนด์ และการปรับแต่งบนคลิปเดียวกันได้
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+import cv2
+import numpy as np
+
+
+class SystemClock:
+    """
+    นาฬิกาของระบบจริง ใช้ในโหมดปกติ (กล้องสด)
+    """
+
+    def time(self) -> float:
+        """Wall-clock time in seconds since the epoch."""
+        return time.time()
+
+    def monotonic(self) -> float:
+        """Monotonic time in seconds."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep for the given number of seconds."""
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    นาฬิกาเสมือนที่เดินตามเวลาของสื่อ (media time) ในไฟล์วิดีโอ
+
+    ในโหมดเร็วที่สุด (realtime=False) เวลาจะกระโดดไปยังเวลาของเฟรมทันที
+    ในโหมดเวลาจริง (realtime=True) จะรอจนกว่าเวลาจริงจะตามทันเวลาของเฟรม
+    การเรียก sleep() จะไม่กินเวลาจริงในทั้งสองโหมด
+    """
+
+    def __init__(self, realtime: bool = False, start_time: Optional[float] = None):
+        """
+        เริ่มต้นนาฬิกาเสมือน
+
+        Args:
+            realtime: เล่นตามเวลาจริงของวิดีโอแทนการเล่นเร็วที่สุด
+            start_time: เวลา epoch ที่ตรงกับเฟรมแรก (ค่าเริ่มต้น: เวลาปัจจุบัน)
+        """
+        self.realtime = realtime
+        self._wall_origin = time.time() if start_time is None else start_time
+        self._real_origin = time.monotonic()
+        self._media_time = 0.0
+
+    def advance_to(self, media_seconds: float) -> None:
+        """
+        เลื่อนนาฬิกาไปยังเวลาของสื่อที่กำหนด
+
+        Args:
+            media_seconds: เวลาของเฟรมนับจากต้นคลิป (วินาที)
+        """
+        # Never run backwards, even if the container reports odd timestamps
+        if media_seconds < self._media_time:
+            return
+        self._media_time = media_seconds
+
+        if self.realtime:
+            delay = self._media_time - (time.monotonic() - self._real_origin)
+            if delay > 0:
+                time.sleep(delay)
+
+    def time(self) -> float:
+        """Virtual wall-clock time of the current frame."""
+        return self._wall_origin + self._media_time
+
+    def monotonic(self) -> float:
+        """Virtual monotonic time (media time of the current frame)."""
+        return self._media_time
+
+    def sleep(self, seconds: float) -> None:
+        """Sleeps are virtualized; pacing is driven by advance_to()."""
+        return None
+
+
+class ReplaySource:
+    """
+    แหล่งเฟรมจากไฟล์วิดีโอที่บันทึกไว้ ใช้แทนกล้องในโหมด --replay
+    มีอินเทอร์เฟซเหมือน cv2.VideoCapture (read/isOpened/release)
+    """
+
+    def __init__(self, path: str, clock: VirtualClock, max_frames: Optional[int] = None):
+        """
+        เปิดไฟล์วิดีโอสำหรับเล่นซ้ำ
+
+        Args:
+            path: พาธไปยังไฟล์วิดีโอ
+            clock: นาฬิกาเสมือนที่จะเลื่อนตามเวลาของแต่ละเฟรม
+            max_frames: จำนวนเฟรมสูงสุดที่จะเล่น (None = ทั้งไฟล์)
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Replay file not found at {path}")
+
+        self.path = path
+        self.clock = clock
+        self.max_frames = max_frames
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Error: Could not open replay file {path}")
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        # Some containers report 0 or NaN; fall back to a sane default
+        self.fps = fps if fps and fps == fps and fps > 0 else 30.0
+        self.frame_index = 0
+        self.finished = False
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        อ่านเฟรมถัดไปและเลื่อนนาฬิกาเสมือน
+
+        Returns:
+            tuple: (success, frame) คล้ายกับ cv2.VideoCapture.read()
+        """
+        if self.finished:
+            return False, None
+
+        if self.max_frames is not None and self.frame_index >= self.max_frames:
+            self.finished = True
+            return False, None
+
+        ret, frame = self.cap.read()
+        if not ret or frame is None:
+            self.finished = True
+            return False, None
+
+        # Timestamps come from the frame index so runs are deterministic
+        # across OpenCV backends (CAP_PROP_POS_MSEC is not reliable everywhere)
+        self.clock.advance_to(self.frame_index / self.fps)
+        self.frame_index += 1
+        return True, frame
+
+    def isOpened(self) -> bool:
+        """True while frames remain to be read."""
+        return not self.finished and self.cap.isOpened()
+
+    def release(self) -> None:
+        """Release the underlying video file."""
+        self.cap.release()
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MiB.
+
+    Returns:
+        Peak RSS, or 0.0 where the resource module is unavailable
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024.0 * 1024.0)
+    return peak / 1024.0
+
+
+class BenchmarkReport:
+    """
+    รวบรวมสถิติประสิทธิภาพระหว่างการเล่นซ้ำ
+    (เฟรมต่อวินาที, เปอร์เซ็นไทล์ความหน่วงของแต่ละขั้นตอน, จำนวนการตรวจจับ,
+    จำนวนบุคคลที่ไม่ซ้ำกัน และหน่วยความจำสูงสุด)
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, source_path: Optional[str] = None):
+        """
+        เริ่มต้นรายงาน
+
+        Args:
+            source_path: พาธไฟล์วิดีโอที่ใช้ (สำหรับแสดงในรายงาน)
+        """
+        self.source_path = source_path
+        self.stage_samples: Dict[str, List[float]] = {}
+        self.frames = 0
+        self.detections = 0
+        self.person_ids = set()
+        self._start = None
+        self._end = None
+
+    def start(self) -> None:
+        """Mark the beginning of the measured run."""
+        self._start = time.perf_counter()
+        self._end = None
+
+    def stop(self) -> None:
+        """Mark the end of the measured run."""
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    @contextmanager
+    def measure(self, stage: str):
+        """
+        Context manager that records the wall time spent in a stage.
+
+        Args:
+            stage: Stage name ('detect', 'reid', 'face', ...)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Record one latency sample for a stage.
+
+        Args:
+            stage: Stage name
+            seconds: Elapsed time in seconds
+        """
+        samples = self.stage_samples.get(stage)
+        if samples is None:
+            samples = self.stage_samples[stage] = []
+        samples.append(seconds)
+
+    def count_frame(self, detections: Iterable = (), identities: Iterable = ()) -> None:
+        """
+        Account for one frame that went through the pipeline.
+
+        Args:
+            detections: Detections returned for the frame
+            identities: (person_id, is_new) tuples returned for the frame
+        """
+        self.frames += 1
+        self.detections += len(detections)
+        for person_id, _ in identities:
+            self.person_ids.add(person_id)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Build the report as a JSON-serializable dictionary.
+
+        Returns:
+            Summary dictionary
+        """
+        end = self._end if self._end is not None else time.perf_counter()
+        elapsed = (end - self._start) if self._start is not None else 0.0
+
+        stages = {}
+        for stage, samples in self.stage_samples.items():
+            values = np.asarray(samples, dtype=np.float64) * 1000.0
+            entry = {
+                'count': int(values.size),
+                'mean_ms': float(values.mean()),
+                'max_ms': float(values.max()),
+            }
+            for p, value in zip(self.PERCENTILES, np.percentile(values, self.PERCENTILES)):
+                entry[f'p{p}_ms'] = float(value)
+            stages[stage] = entry
+
+        return {
+            'source': self.source_path,
+            'frames': self.frames,
+            'elapsed_s': elapsed,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'detections': self.detections,
+            'unique_persons': len(self.person_ids),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': stages,
+        }
+
+    def format_text(self) -> str:
+        """
+        Render the report as a human-readable table.
+
+        Returns:
+            Multi-line report string
+        """
+        s = self.summary()
+        lines = [
+            f"Replay: {s['source']}",
+            f"Frames: {s['frames']} in {s['elapsed_s']:.2f}s ({s['fps']:.2f} fps)",
+            f"Detections: {s['detections']}  Unique persons: {s['unique_persons']}",
+            f"Peak RSS: {s['peak_rss_mb']:.1f} MiB",
+            f"{'stage':<10}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}",
+        ]
+        for stage, st in s['stages'].items():
+            lines.append(
+                f"{stage:<10}{st['count']:>8}{st['mean_ms']:>10.2f}{st['p50_ms']:>10.2f}"
+                f"{st['p90_ms']:>10.2f}{st['p99_ms']:>10.2f}{st['max_ms']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """
+        Write the summary to a JSON file.
+
+        Args:
+            path: Output file path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
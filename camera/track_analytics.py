@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+โมดูลวิเคราะห์เส้นทางและเวลาอยู่ในโซนของแต่ละแทร็กสำหรับระบบ MANTA
+(Per-track dwell and path analytics module for MANTA system)
+
+เก็บเส้นทางของแต่ละแทร็กในบัฟเฟอร์ขนาดคงที่แบบลดจำนวนจุด และสร้างสรุปหนึ่งรายการ
+เมื่อแทร็กสิ้นสุด (เวลาอยู่ในแต่ละโซน, โซนแรก/โซนสุดท้าย, ความยาวเส้นทาง)
+ตำแหน่งรายเฟรมจะไม่ถูกบันทึกหรืออัปโหลด
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from camera.tracking import TrackFrame
+from camera.zones import ZoneMap
+
+
+class TrackPath:
+    """
+    เส้นทางของหนึ่งแทร็กในบัฟเฟอร์ขนาดคงที่
+
+    จุดใหม่ถูกเก็บเมื่อเคลื่อนที่อย่างน้อย min_step เมื่อบัฟเฟอร์เต็มจะเก็บจุดเว้นจุด
+    และเพิ่ม min_step เป็นสองเท่า หน่วยความจำต่อแทร็กจึงคงที่ไม่ว่าแทร็กจะยาวเท่าใด
+    """
+
+    __slots__ = ('points', 'size', 'min_step', 'start', 'last_time', 'last_point',
+                 'length', 'zone_dwell', 'entry_zone', 'exit_zone', 'last_zones')
+
+    def __init__(self, point: np.ndarray, timestamp: float, max_points: int, min_step: float):
+        # Columns: x, y, seconds since the track started (float32 keeps it small)
+        self.points = np.empty((max_points, 3), dtype=np.float32)
+        self.points[0] = (point[0], point[1], 0.0)
+        self.size = 1
+        self.min_step = min_step
+        self.start = timestamp
+        self.last_time = timestamp
+        self.last_point = np.array(point, dtype=np.float32)
+        self.length = 0.0
+        self.zone_dwell: Dict[str, float] = {}
+        self.entry_zone: Optional[str] = None
+        self.exit_zone: Optional[str] = None
+        self.last_zones: List[str] = []
+
+    def add(self, point: np.ndarray, timestamp: float) -> None:
+        """Extend the path with the position seen at timestamp."""
+        step = float(np.hypot(point[0] - self.last_point[0], point[1] - self.last_point[1]))
+        self.length += step
+        self.last_point[:] = point
+        self.last_time = timestamp
+
+        stored = self.points[self.size - 1]
+        if np.hypot(point[0] - stored[0], point[1] - stored[1]) < self.min_step:
+            return
+        if self.size == len(self.points):
+            # Keep every other point (always keeping the first) and coarsen the spacing
+            kept = self.points[0:self.size:2].copy()
+            self.size = len(kept)
+            self.points[:self.size] = kept
+            self.min_step *= 2.0
+        self.points[self.size] = (point[0], point[1], timestamp - self.start)
+        self.size += 1
+
+    def path(self, decimals: int = 3) -> List[List[float]]:
+        """Downsampled path as [[x, y, t], ...] including the final position."""
+        points = self.points[:self.size]
+        last = (self.last_point[0], self.last_point[1], self.last_time - self.start)
+        if not np.allclose(points[-1], last):
+            points = np.vstack([points, np.asarray(last, dtype=np.float32)])
+        return np.round(points.astype(np.float64), decimals).tolist()
+
+
+class TrackAnalytics:
+    """
+    ตัวสร้างสรุปของแต่ละแทร็กจากผลการติดตาม
+
+    เวลาที่อยู่ในโซนคำนวณจากช่วงเวลาระหว่างการอัปเดต โดยนับให้โซนของตำแหน่งก่อนหน้า
+    """
+
+    def __init__(self, zone_map: Optional[ZoneMap] = None, max_points: int = 32,
+                 min_step: float = 0.02, min_duration: float = 1.0):
+        """
+        เริ่มต้นตัววิเคราะห์แทร็ก
+
+        Args:
+            zone_map: มาสก์โซนสำหรับเวลาอยู่ในโซน (None = ไม่คำนวณโซน)
+            max_points: จำนวนจุดสูงสุดของเส้นทางต่อแทร็ก
+            min_step: ระยะขั้นต่ำระหว่างจุดที่เก็บ (หน่วยปกติของภาพ)
+            min_duration: แทร็กที่สั้นกว่านี้ (วินาที) จะไม่สร้างสรุป
+        """
+        if max_points < 2:
+            raise ValueError("max_points ต้องมีค่าอย่างน้อย 2")
+        self.zone_map = zone_map
+        self.max_points = max_points
+        self.min_step = min_step
+        self.min_duration = min_duration
+        self._paths: Dict[int, TrackPath] = {}
+
+    @property
+    def active_count(self) -> int:
+        """Number of tracks being followed."""
+        return len(self._paths)
+
+    def _zone_names(self, bits: int) -> List[str]:
+        return [self.zone_map.names[i] for i in self.zone_map.zones_in(bits)]
+
+    def update(self, tracks: TrackFrame, frame_shape: Tuple[int, ...]) -> List[Dict[str, Any]]:
+        """
+        อัปเดตเส้นทางด้วยผลการติดตามของเฟรม
+
+        Args:
+            tracks: ผลการติดตามของเฟรม
+            frame_shape: ขนาดของเฟรม
+
+        Returns:
+            list: สรุป 'track_summary' ของแทร็กที่สิ้นสุดในเฟรมนี้
+        """
+        timestamp = tracks.timestamp
+        use_zones = self.zone_map is not None and len(self.zone_map) > 0
+        bits = self.zone_map.lookup(tracks.feet, frame_shape).tolist() if use_zones else None
+
+        for i, track_id in enumerate(tracks.ids.tolist()):
+            point = tracks.feet[i]
+            zones = self._zone_names(bits[i]) if use_zones else []
+            track = self._paths.get(track_id)
+            if track is None:
+                track = self._paths[track_id] = TrackPath(point, timestamp, self.max_points, self.min_step)
+            else:
+                elapsed = timestamp - track.last_time
+                for name in track.last_zones:
+                    track.zone_dwell[name] = track.zone_dwell.get(name, 0.0) + elapsed
+                track.add(point, timestamp)
+
+            if zones:
+                if track.entry_zone is None:
+                    track.entry_zone = zones[0]
+                track.exit_zone = zones[0]
+            track.last_zones = zones
+
+        summaries = []
+        for track_id in tracks.ended:
+            summary = self._finish(track_id)
+            if summary:
+                summaries.append(summary)
+        return summaries
+
+    def _finish(self, track_id: int) -> Optional[Dict[str, Any]]:
+        track = self._paths.pop(track_id, None)
+        if track is None:
+            return None
+        duration = track.last_time - track.start
+        if duration < self.min_duration:
+            return None
+        return {
+            'type': 'track_summary',
+            'timestamp': track.last_time,
+            'track_id': track_id,
+            'start': track.start,
+            'end': track.last_time,
+            'duration_seconds': round(duration, 3),
+            'path_length': round(track.length, 4),
+            'entry_zone': track.entry_zone,
+            'exit_zone': track.exit_zone,
+            'zone_dwell': {name: round(seconds, 3) for name, seconds in track.zone_dwell.items()},
+            'path': track.path()
+        }
+
+    def finish_all(self) -> List[Dict[str, Any]]:
+        """
+        สร้างสรุปของทุกแทร็กที่ยังติดตามอยู่ (เช่น เมื่อปิดระบบ)
+
+        Returns:
+            list: สรุปของแทร็ก
+        """
+        summaries = []
+        for track_id in list(self._paths):
+            summary = self._finish(track_id)
+            if summary:
+                summaries.append(summary)
+        return summaries
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+โมดูลติดตามบุคคลสำหรับระบบ MANTA
+(People tracking module for MANTA system)
+
+ติดตามตำแหน่งของบุคคลระหว่างเฟรมด้วยการจับคู่จุดศูนย์กลางของกรอบ
+พิกัดทั้งหมดเป็นค่าปกติ (0-1) ทำให้เกณฑ์และเส้น/โซนไม่ขึ้นกับความละเอียดของกล้อง
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from utils.vector_utils import pairwise_euclidean, threshold_match
+
+
+class TrackFrame:
+    """
+    ผลการติดตามของหนึ่งเฟรม (เฉพาะแทร็กที่จับคู่กับการตรวจจับในเฟรมนี้)
+
+    Attributes:
+        ids: รหัสแทร็ก (N,) int64
+        boxes: กรอบแบบปกติ x1, y1, x2, y2 (N, 4) float32
+        centroids: จุดศูนย์กลางของกรอบ (N, 2) float32
+        previous: จุดศูนย์กลางเมื่อพบแทร็กครั้งก่อน (N, 2) float32 (เท่ากับ centroids สำหรับแทร็กใหม่)
+        feet: จุดกึ่งกลางขอบล่างของกรอบ (N, 2) float32
+        detection_index: ดัชนีของการตรวจจับที่จับคู่ (N,) int64
+        ended: รหัสแทร็กที่สิ้นสุดในเฟรมนี้
+        timestamp: เวลาของเฟรม
+    """
+
+    __slots__ = ('ids', 'boxes', 'centroids', 'previous', 'feet',
+                 'detection_index', 'ended', 'timestamp')
+
+    def __init__(self, ids, boxes, centroids, previous, detection_index, ended, timestamp):
+        self.ids = ids
+        self.boxes = boxes
+        self.centroids = centroids
+        self.previous = previous
+        self.feet = np.stack([centroids[:, 0], boxes[:, 3]], axis=1) if len(ids) else centroids
+        self.detection_index = detection_index
+        self.ended = ended
+        self.timestamp = timestamp
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class CentroidTracker:
+    """
+    ตัวติดตามแบบจับคู่จุดศูนย์กลาง (greedy nearest neighbour)
+
+    ระยะห่างระหว่างแทร็กและการตรวจจับทั้งหมดคำนวณในครั้งเดียวด้วย NumPy
+    แล้วจับคู่จากคู่ที่ใกล้ที่สุดก่อน แทร็กที่ไม่พบเกิน max_missed เฟรมจะสิ้นสุด
+    """
+
+    def __init__(self, max_objects: int = 20, max_distance: float = 0.15,
+                 max_missed: int = 15):
+        """
+        เริ่มต้นตัวติดตาม
+
+        Args:
+            max_objects: จำนวนแทร็กสูงสุดพร้อมกัน
+            max_distance: ระยะเคลื่อนที่สูงสุดระหว่างการอัปเดต (หน่วยปกติของภาพ)
+            max_missed: จำนวนการอัปเดตที่ไม่พบก่อนถือว่าแทร็กสิ้นสุด
+        """
+        self.max_objects = max_objects
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+
+        self._next_id = 1
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._centroids = np.zeros((0, 2), dtype=np.float32)
+        self._missed = np.zeros(0, dtype=np.int32)
+
+    @property
+    def active_count(self) -> int:
+        """Number of live tracks (including ones currently not seen)."""
+        return len(self._ids)
+
+    def _match(self, detections_xy: np.ndarray) -> List[Tuple[int, int]]:
+        """Greedy one-to-one matching of tracks to detections by centroid distance."""
+        if len(self._ids) == 0 or len(detections_xy) == 0:
+            return []
+
+        distance = pairwise_euclidean(self._centroids, detections_xy)
+        return threshold_match(distance, self.max_distance, largest=False)
+
+    def update(self, detections: Sequence, frame_shape: Tuple[int, ...],
+               timestamp: float = 0.0) -> TrackFrame:
+        """
+        อัปเดตแทร็กด้วยการตรวจจับของเฟรมใหม่
+
+        Args:
+            detections: รายการ (x1, y1, x2, y2, confidence, class_id) เป็นพิกเซล
+            frame_shape: ขนาดของเฟรม (height, width, ...)
+            timestamp: เวลาของเฟรม
+
+        Returns:
+            TrackFrame: แทร็กที่พบในเฟรมนี้และแทร็กที่สิ้นสุด
+        """
+        height, width = frame_shape[:2]
+        if len(detections):
+            boxes = np.asarray([d[:4] for d in detections], dtype=np.float32)
+            boxes /= np.array([width, height, width, height], dtype=np.float32)
+            np.clip(boxes, 0.0, 1.0, out=boxes)
+        else:
+            boxes = np.zeros((0, 4), dtype=np.float32)
+        centroids = np.stack([(boxes[:, 0] + boxes[:, 2]) * 0.5,
+                              (boxes[:, 1] + boxes[:, 3]) * 0.5], axis=1)
+
+        pairs = self._match(centroids)
+        track_index = np.full(len(boxes), -1, dtype=np.int64)
+        for t, d in pairs:
+            track_index[d] = t
+
+        previous = centroids.copy()
+        matched_tracks = track_index[track_index >= 0]
+        previous[track_index >= 0] = self._centroids[matched_tracks]
+
+        # Age every track, then reset the ones that were seen
+        self._missed += 1
+        self._missed[matched_tracks] = 0
+        self._centroids[matched_tracks] = centroids[track_index >= 0]
+
+        # Drop tracks that have been missing for too long
+        expired = self._missed > self.max_missed
+        ended = self._ids[expired].tolist()
+        if ended:
+            keep = ~expired
+            remap = np.cumsum(keep) - 1
+            self._ids = self._ids[keep]
+            self._centroids = self._centroids[keep]
+            self._missed = self._missed[keep]
+            track_index[track_index >= 0] = remap[track_index[track_index >= 0]]
+
+        # Start new tracks for unmatched detections while there is room
+        unmatched = np.flatnonzero(track_index < 0)
+        room = max(0, self.max_objects - len(self._ids))
+        new = unmatched[:room]
+        if len(new):
+            new_ids = np.arange(self._next_id, self._next_id + len(new), dtype=np.int64)
+            self._next_id += len(new)
+            track_index[new] = np.arange(len(self._ids), len(self._ids) + len(new))
+            self._ids = np.concatenate([self._ids, new_ids])
+            self._centroids = np.concatenate([self._centroids, centroids[new]])
+            self._missed = np.concatenate([self._missed, np.zeros(len(new), dtype=np.int32)])
+
+        visible = np.flatnonzero(track_index >= 0)
+        return TrackFrame(
+            ids=self._ids[track_index[visible]],
+            boxes=boxes[visible],
+            centroids=centroids[visible],
+            previous=previous[visible],
+            detection_index=visible.astype(np.int64),
+            ended=ended,
+            timestamp=timestamp
+        )
+
+    def end_all(self) -> List[int]:
+        """
+        สิ้นสุดแทร็กทั้งหมด (เช่น เมื่อปิดระบบ)
+
+        Returns:
+            รายการรหัสแทร็กที่สิ้นสุด
+        """
+        ended = self._ids.tolist()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._centroids = np.zeros((0, 2), dtype=np.float32)
+        self._missed = np.zeros(0, dtype=np.int32)
+        return ended
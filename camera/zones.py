@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+โมดูลตรวจจับการเข้า/ออกโซนสำหรับระบบ MANTA
+(Zone entry/exit detection module for MANTA system)
+
+แปลงรูปหลายเหลี่ยมของ advanced.zones เป็นมาสก์บิตหนึ่งครั้งต่อความละเอียด
+จากนั้นการหาโซนของทุกแทร็กในเฟรมเป็นเพียงการอ่านค่าจากอาร์เรย์ครั้งเดียว
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from camera.tracking import TrackFrame
+
+# Largest zone count a single integer bit mask can hold
+MAX_ZONES = 64
+
+
+def _mask_dtype(zone_count: int):
+    """Smallest unsigned dtype with one bit per zone."""
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if zone_count <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"รองรับโซนได้สูงสุด {MAX_ZONES} โซน")
+
+
+class ZoneMap:
+    """
+    มาสก์ของโซนทั้งหมด โดยบิตที่ i ของแต่ละพิกเซลหมายถึงอยู่ในโซนที่ i
+    (โซนซ้อนทับกันได้) มาสก์ถูกสร้างครั้งเดียวต่อความละเอียดของเฟรมและเก็บไว้ใช้ซ้ำ
+    """
+
+    def __init__(self, zones: Sequence[Dict[str, Any]]):
+        """
+        เริ่มต้นมาสก์โซน
+
+        Args:
+            zones: รายการ {'name': ชื่อ, 'points': [[x, y], ...]} ในพิกัดปกติ (0-1)
+        """
+        self.set_zones(zones)
+
+    def set_zones(self, zones: Sequence[Dict[str, Any]]) -> None:
+        """
+        เปลี่ยนรายการโซน (ล้างมาสก์ที่สร้างไว้) ถ้ามีโซนที่ไม่ถูกต้อง จะไม่เปลี่ยนแปลงอะไรเลย
+
+        Args:
+            zones: รายการโซนใหม่
+
+        Raises:
+            ValueError: ถ้ามีโซนเกิน MAX_ZONES หรือมีรูปหลายเหลี่ยมที่ไม่ถูกต้อง
+        """
+        if len(zones) > MAX_ZONES:
+            raise ValueError(f"รองรับโซนได้สูงสุด {MAX_ZONES} โซน")
+        names: List[str] = []
+        polygons: List[np.ndarray] = []
+        for i, zone in enumerate(zones):
+            points = np.asarray(zone.get('points', []), dtype=np.float32)
+            if points.ndim != 2 or points.shape[0] < 3 or points.shape[1] != 2:
+                raise ValueError(f"โซน {zone.get('name', i)} ต้องมีอย่างน้อยสามจุด [[x, y], ...]")
+            names.append(str(zone.get('name', f'zone_{i}')))
+            polygons.append(points)
+
+        # Swap everything together so a failed reload keeps the old zones intact
+        self.names = names
+        self.polygons = polygons
+        self.dtype = _mask_dtype(max(1, len(polygons)))
+        self._masks: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def mask_for(self, frame_shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        มาสก์บิตของโซนสำหรับความละเอียดที่กำหนด (สร้างครั้งแรกแล้วเก็บไว้)
+
+        Args:
+            frame_shape: ขนาดของเฟรม (height, width, ...)
+
+        Returns:
+            np.ndarray: (height, width) มาสก์บิตของโซน
+        """
+        height, width = frame_shape[:2]
+        mask = self._masks.get((height, width))
+        if mask is None:
+            mask = np.zeros((height, width), dtype=self.dtype)
+            layer = np.zeros((height, width), dtype=np.uint8)
+            scale = np.array([width, height], dtype=np.float32)
+            for bit, polygon in enumerate(self.polygons):
+                layer.fill(0)
+                pixels = np.round(polygon * scale).astype(np.int32)
+                cv2.fillPoly(layer, [pixels], 1)
+                mask[layer.astype(bool)] |= self.dtype(1 << bit)
+            self._masks[(height, width)] = mask
+        return mask
+
+    def lookup(self, points: np.ndarray, frame_shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        บิตของโซนที่แต่ละจุดอยู่
+
+        Args:
+            points: จุดในพิกัดปกติ (N, 2)
+            frame_shape: ขนาดของเฟรม
+
+        Returns:
+            np.ndarray: (N,) มาสก์บิตของโซนต่อจุด
+        """
+        mask = self.mask_for(frame_shape)
+        height, width = mask.shape
+        if len(points) == 0:
+            return np.zeros(0, dtype=self.dtype)
+        xs = np.clip((points[:, 0] * width).astype(np.int64), 0, width - 1)
+        ys = np.clip((points[:, 1] * height).astype(np.int64), 0, height - 1)
+        return mask[ys, xs]
+
+    def zones_in(self, bits: int) -> List[int]:
+        """Indices of the zones set in a bit mask."""
+        return [i for i in range(len(self.names)) if bits >> i & 1]
+
+
+class ZoneMonitor:
+    """
+    ติดตามการเข้า/ออกโซนของแต่ละแทร็กและเวลาที่อยู่ในโซน
+
+    ใช้จุดกึ่งกลางขอบล่างของกรอบ (ตำแหน่งเท้า) เป็นตำแหน่งของบุคคล
+    """
+
+    def __init__(self, zone_map: ZoneMap):
+        """
+        เริ่มต้นตัวติดตามโซน
+
+        Args:
+            zone_map: มาสก์โซน
+        """
+        self.zone_map = zone_map
+        # track_id -> (zone bits, {zone index: entry time})
+        self._state: Dict[int, Tuple[int, Dict[int, float]]] = {}
+
+    def set_zones(self, zones: Sequence[Dict[str, Any]]) -> None:
+        """
+        เปลี่ยนรายการโซน สถานะของแทร็กถูกล้างโดยไม่สร้างเหตุการณ์
+
+        Args:
+            zones: รายการโซนใหม่
+        """
+        self.zone_map.set_zones(zones)
+        self._state.clear()
+
+    def occupancy(self) -> Dict[str, int]:
+        """Number of tracks currently inside each zone."""
+        counts = {name: 0 for name in self.zone_map.names}
+        for bits, _ in self._state.values():
+            for i in self.zone_map.zones_in(bits):
+                counts[self.zone_map.names[i]] += 1
+        return counts
+
+    def _exit_events(self, track_id: int, zone_indices: List[int], entered: Dict[int, float],
+                     timestamp: float, track_ended: bool) -> List[Dict[str, Any]]:
+        events = []
+        for i in zone_indices:
+            events.append({
+                'type': 'zone_exit',
+                'timestamp': timestamp,
+                'zone': self.zone_map.names[i],
+                'track_id': track_id,
+                'dwell_seconds': round(max(0.0, timestamp - entered.pop(i, timestamp)), 3),
+                'track_ended': track_ended
+            })
+        return events
+
+    def update(self, tracks: TrackFrame, frame_shape: Tuple[int, ...]) -> List[Dict[str, Any]]:
+        """
+        ตรวจสอบการเข้า/ออกโซนของแทร็กในเฟรมนี้
+
+        Args:
+            tracks: ผลการติดตามของเฟรม
+            frame_shape: ขนาดของเฟรม
+
+        Returns:
+            list: เหตุการณ์ 'zone_entry' และ 'zone_exit' (พร้อม dwell_seconds)
+        """
+        if len(self.zone_map) == 0:
+            return []
+
+        events = []
+        timestamp = tracks.timestamp
+        bits = self.zone_map.lookup(tracks.feet, frame_shape)
+
+        for track_id, track_bits in zip(tracks.ids.tolist(), bits.tolist()):
+            previous_bits, entered = self._state.get(track_id, (0, {}))
+            if track_bits == previous_bits:
+                continue
+
+            left = previous_bits & ~track_bits
+            if left:
+                events.extend(self._exit_events(track_id, self.zone_map.zones_in(left),
+                                                entered, timestamp, False))
+            for i in self.zone_map.zones_in(track_bits & ~previous_bits):
+                entered[i] = timestamp
+                events.append({
+                    'type': 'zone_entry',
+                    'timestamp': timestamp,
+                    'zone': self.zone_map.names[i],
+                    'track_id': track_id
+                })
+
+            if track_bits:
+                self._state[track_id] = (track_bits, entered)
+            else:
+                self._state.pop(track_id, None)
+
+        # Tracks that disappeared leave every zone they were in
+        for track_id in tracks.ended:
+            state = self._state.pop(track_id, None)
+            if state:
+                events.extend(self._exit_events(track_id, self.zone_map.zones_in(state[0]),
+                                                state[1], timestamp, True))
+        return events
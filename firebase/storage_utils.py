@@ -288,4 +288,29 @@ def upload_face_image(uploader: FirebaseStorageUploader,
     # Queue for upload
     uploader.upload_file(image_path, remote_path, metadata)
     
-    return remote_path
\ No newline at end of file
+    return remote_path
+
+
+def upload_heatmap(uploader: FirebaseStorageUploader,
+                   heatmap_path: str,
+                   camera_id: str,
+                   metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Upload a heatmap snapshot to Firebase Storage.
+    
+    Args:
+        uploader: FirebaseStorageUploader instance
+        heatmap_path: Path to the PNG or .npz snapshot
+        camera_id: Camera ID for folder structure
+        metadata: Optional metadata for the snapshot
+        
+    Returns:
+        Remote path if queued for upload, None otherwise
+    """
+    if uploader is None or not os.path.exists(heatmap_path):
+        return None
+    
+    remote_path = f"heatmaps/{camera_id}/{os.path.basename(heatmap_path)}"
+    uploader.upload_file(heatmap_path, remote_path, metadata)
+    
+    return remote_path
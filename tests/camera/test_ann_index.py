@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+ทดสอบดัชนีค้นหาเวกเตอร์ของแกลเลอรีการจดจำบุคคล
+(Tests for the re-ID gallery nearest-neighbour index)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.ann_index import (BruteForceIndex, IVFFlatIndex, benchmark, create_index,
+                              synthetic_gallery)
+
+
+def _unit(rng, count, dim=16):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize('kind', ['brute', 'ivf'])
+def test_incremental_insert_and_delete(kind):
+    rng = np.random.default_rng(1)
+    vectors = _unit(rng, 600)
+    index = create_index(kind, n_lists=8, n_probe=8) if kind == 'ivf' else create_index(kind)
+
+    for start in range(0, 600, 50):
+        index.add(range(start, start + 50), vectors[start:start + 50])
+    assert len(index) == 600
+
+    sims, ids = index.search(vectors[[3, 450]], k=2)
+    assert ids[:, 0].tolist() == [3, 450]
+    np.testing.assert_allclose(sims[:, 0], 1.0, rtol=1e-5)
+    assert sims[0, 0] >= sims[0, 1]
+
+    # Expire the oldest entries; the moved rows must stay searchable
+    assert index.remove(range(0, 300)) == 300
+    assert index.remove([5]) == 0
+    assert len(index) == 300 and 3 not in index and 450 in index
+    _, ids = index.search(vectors[[3, 450, 599]], k=1)
+    assert ids[0, 0] != 3
+    assert ids[1:, 0].tolist() == [450, 599]
+
+    index.update(450, vectors[0])
+    np.testing.assert_allclose(index.get(450), vectors[0])
+    _, ids = index.search(vectors[[0]], k=1)
+    assert ids[0, 0] == 450
+
+    with pytest.raises(ValueError):
+        index.add([450], vectors[:1])
+
+
+def test_empty_and_short_results_are_padded():
+    index = BruteForceIndex()
+    sims, ids = index.search(np.ones((2, 4), dtype=np.float32), k=3)
+    assert ids.tolist() == [[-1, -1, -1]] * 2 and np.isneginf(sims).all()
+
+    index.add([7], np.array([[1.0, 0.0, 0.0, 0.0]]))
+    _, ids = index.search(np.array([[1.0, 0.0, 0.0, 0.0]]), k=3)
+    assert ids.tolist() == [[7, -1, -1]]
+
+
+def test_ivf_recall_against_brute_force():
+    gallery, queries = synthetic_gallery(4000, dim=32, queries=200, seed=3)
+    index = IVFFlatIndex(n_lists=32, n_probe=8)
+    result = benchmark(index, gallery, queries, k=1)
+    assert index.is_trained
+    assert result['recall'] >= 0.95
+    assert result['latency_ms'] > 0 and result['exact_latency_ms'] > 0
+
+
+@pytest.mark.parametrize('dtype', ['float16', 'int8'])
+def test_quantized_storage_recall_and_memory(dtype):
+    gallery, queries = synthetic_gallery(3000, dim=64, queries=200, noise=1.2, seed=5)
+    reference = benchmark(BruteForceIndex(), gallery, queries, k=5)
+    index = create_index('brute', dtype=dtype)
+    result = benchmark(index, gallery, queries, k=5)
+    assert result['recall'] >= 0.95
+    assert result['bytes_per_vector'] < reference['bytes_per_vector'] * (0.6 if dtype == 'float16' else 0.35)
+
+    # Reads, updates and IVF retraining work on the dequantized vectors
+    np.testing.assert_allclose(index.get(7), gallery[7], atol=0.01)
+    index.update(7, gallery[8])
+    np.testing.assert_allclose(index.get(7), gallery[8], atol=0.01)
+    ivf = IVFFlatIndex(n_lists=16, n_probe=16, dtype=dtype)
+    assert benchmark(ivf, gallery, queries, k=1)['recall'] >= 0.95
+    assert ivf.is_trained and ivf.get(7).dtype == np.float32
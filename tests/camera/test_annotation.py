@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+ทดสอบการวาดผลการตรวจจับลงบนภาพแบบขี้เกียจ
+(Tests for lazy detection overlay rendering)
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.annotation import (FACE_COLOR, KNOWN_PERSON_COLOR, NEW_PERSON_COLOR, FrameAnnotations,
+                               FrameAnnotator)
+from utils.camera_utils import YUVFrame
+
+
+def test_render_draws_into_reused_buffer_without_touching_source():
+    frame = np.zeros((60, 80, 3), np.uint8)
+    annotations = FrameAnnotations(frame)
+    annotations.add_person((10, 20, 40, 50, 0.9, 0), 'person-1234567890', True)
+    annotations.add_face((15, 25, 25, 35))
+    assert len(annotations) == 2
+
+    annotator = FrameAnnotator()
+    canvas = annotator.render(annotations)
+    assert not frame.any()
+    assert tuple(canvas[50, 25]) == NEW_PERSON_COLOR
+    assert tuple(canvas[30, 15]) == FACE_COLOR
+
+    known = FrameAnnotations(frame)
+    known.add_person((10, 20, 40, 50), 'person-1', False)
+    assert annotator.render(known) is canvas
+    assert tuple(canvas[50, 25]) == KNOWN_PERSON_COLOR
+    # No stale overlay from the previous frame survives
+    assert not canvas[30, 15].any()
+    assert annotator.renders == 2
+
+
+def test_render_scales_full_resolution_boxes_to_the_low_res_frame():
+    bgr = np.full((48, 64, 3), 90, np.uint8)
+    low = YUVFrame(cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420))
+    annotations = FrameAnnotations(low, scale=(2.0, 2.0))
+    annotations.add_person((20, 20, 100, 80), 'person-2', True)
+
+    canvas = FrameAnnotator().render(annotations)
+    assert canvas.shape == (48, 64, 3)
+    assert tuple(canvas[40, 30]) == NEW_PERSON_COLOR
+    # The cached BGR conversion of the frame is left untouched
+    assert not (low.bgr == np.array(NEW_PERSON_COLOR, np.uint8)).all(axis=2).any()
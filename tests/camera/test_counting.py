@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+ทดสอบตัวนับคนผ่านเส้นของระบบ MANTA
+(Tests for MANTA line-crossing counter)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.counting import LineCounter, segment_crossings
+from camera.tracking import CentroidTracker
+
+FRAME_SHAPE = (100, 100, 3)
+LINE = np.array([[0.0, 0.5], [1.0, 0.5]], dtype=np.float32)
+
+
+def _det(cx, cy, size=10):
+    return (cx - size / 2, cy - size / 2, cx + size / 2, cy + size / 2, 0.9, 0)
+
+
+def test_segment_crossings_direction_and_extent():
+    start = np.array([[0.5, 0.4], [0.5, 0.6], [0.5, 0.4], [0.5, 0.1]], dtype=np.float32)
+    end = np.array([[0.5, 0.6], [0.5, 0.4], [0.5, 0.45], [0.5, 0.2]], dtype=np.float32)
+    assert segment_crossings(LINE, start, end).tolist() == [1, -1, 0, 0]
+
+    # A short line is not crossed by paths that pass beside it
+    short = np.array([[0.0, 0.5], [0.3, 0.5]], dtype=np.float32)
+    assert segment_crossings(short, start[:1], end[:1]).tolist() == [0]
+
+
+def test_line_counter_counts_tracks_in_both_directions():
+    tracker = CentroidTracker(max_distance=0.3)
+    counter = LineCounter([[0, 0.5], [1.0, 0.5]])
+
+    assert counter.update(tracker.update([_det(20, 30), _det(80, 70)], FRAME_SHAPE, 1.0)) is None
+    event = counter.update(tracker.update([_det(20, 60), _det(80, 40)], FRAME_SHAPE, 2.0))
+
+    assert event['type'] == 'line_crossing'
+    assert event['timestamp'] == 2.0
+    assert (event['in'], event['out']) == (1, 1)
+    assert sorted(event['tracks']) == [[1, 'in'], [2, 'out']]
+
+    # Standing still on the far side does not count again
+    assert counter.update(tracker.update([_det(20, 62), _det(80, 38)], FRAME_SHAPE, 3.0)) is None
+    assert (counter.count_in, counter.count_out) == (1, 1)
+
+
+def test_set_line_validates_shape():
+    counter = LineCounter()
+    with pytest.raises(ValueError):
+        counter.set_line([[0, 0.5]])
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+ทดสอบบริการแกลเลอรีการจดจำบุคคลร่วมของหลายกล้อง
+(Tests for the shared cross-camera re-ID gallery service)
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+import yaml
+
+# Add parent directory to path to import modules
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from camera.gallery import IdentityGallery
+from camera.gallery_service import GalleryClient, GalleryServer, is_loopback, parse_address
+from camera.reid import PersonReIdentifier
+
+AUTHKEY = 'test-key'
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+RED, GREEN, BLUE = _unit(1, 0, 0), _unit(0, 1, 0), _unit(0, 0, 1)
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Gallery service running in its own process on a Unix socket."""
+    address = str(tmp_path / 'gallery.sock')
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump({'reid': {
+        'similarity_threshold': 0.9,
+        'retention_period': 3600,
+        'gallery_service': {'address': address, 'authkey': AUTHKEY}
+    }}))
+    process = subprocess.Popen([sys.executable, '-m', 'camera.gallery_service', '--config', str(config_path)],
+                               cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while not os.path.exists(address):
+        assert process.poll() is None and time.time() < deadline, "gallery service did not start"
+        time.sleep(0.05)
+    yield address, process
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def _camera_b(address, queue):
+    client = GalleryClient(address, authkey=AUTHKEY)
+    noisy_green = _unit(0.05, 1, 0)
+    queue.put(client.match(np.stack([noisy_green, BLUE]), source='cam_b'))
+    client.close()
+
+
+def test_cameras_share_identities(service):
+    address, _ = service
+    camera_a = GalleryClient(address, authkey=AUTHKEY)
+    assert camera_a.ping()
+
+    first = camera_a.match(np.stack([RED, GREEN]), source='cam_a')
+    assert [is_new for is_new, _ in first] == [True, True]
+    green_id = first[1][1]
+
+    # A second camera process sees the same person under the same global id
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=_camera_b, args=(address, queue))
+    process.start()
+    second = queue.get(timeout=10)
+    process.join(timeout=10)
+    assert second[0] == (False, green_id)
+    assert second[1][0]
+
+    seen = camera_a.last_seen([green_id, first[0][1]])
+    assert set(seen[green_id]) == {'cam_a', 'cam_b'}
+    assert set(seen[first[0][1]]) == {'cam_a'}
+    assert camera_a.stats() == {'identities': 3, 'cameras': {'cam_a': 2, 'cam_b': 2}}
+
+
+def test_bulk_insert_and_expiry(service):
+    address, _ = service
+    client = GalleryClient(address, authkey=AUTHKEY)
+    old = time.time() - 7200
+    inserted = client.insert(np.stack([RED, GREEN]), person_ids=['old-red', 'old-green'],
+                             last_seen=[old, old + 1])
+    assert inserted == ['old-red', 'old-green']
+    client.insert(BLUE[np.newaxis])
+    assert client.expire() == ['old-red', 'old-green']
+    assert client.stats()['identities'] == 1
+    assert client.remove(['missing']) == []
+    with pytest.raises(RuntimeError):
+        client.match(np.ones((1, 5), dtype=np.float32))
+
+
+def test_reidentifier_falls_back_when_service_stops(service, capsys):
+    address, process = service
+    client = GalleryClient(address, authkey=AUTHKEY, retry_interval=60)
+    reid = PersonReIdentifier(feature_size=3, similarity_threshold=0.9, gallery=client, camera_id='cam_a')
+    assert reid._match(RED[np.newaxis])[0][0]
+    assert len(reid.local_gallery) == 0
+
+    process.terminate()
+    process.wait(timeout=10)
+    # Counting continues with the process-local gallery
+    assert reid._match(RED[np.newaxis])[0][0]
+    assert not reid._match(RED[np.newaxis])[0][0]
+    assert len(reid.local_gallery) == 1
+    # The outage is reported once, not on every frame
+    assert reid.gallery_unavailable
+    assert capsys.readouterr().out.count('shared re-ID gallery unavailable') == 1
+
+
+def test_parse_address():
+    assert parse_address('127.0.0.1:7070') == ('127.0.0.1', 7070)
+    assert parse_address('/run/manta/gallery.sock') == '/run/manta/gallery.sock'
+    assert parse_address(['localhost', '9000']) == ('localhost', 9000)
+
+
+def test_tcp_requires_loopback_and_authkey():
+    assert is_loopback('127.0.0.1') and is_loopback('localhost') and is_loopback('::1')
+    assert not is_loopback('0.0.0.0') and not is_loopback('192.168.1.10') and not is_loopback('gallery.lan')
+
+    # The protocol unpickles requests, so it must never listen on other interfaces or without a key
+    with pytest.raises(ValueError):
+        GalleryServer(IdentityGallery(), '0.0.0.0:7070', authkey=AUTHKEY).start()
+    with pytest.raises(ValueError):
+        GalleryServer(IdentityGallery(), '127.0.0.1:7070', authkey=None).start()
+
+    server = GalleryServer(IdentityGallery(), ('127.0.0.1', 0), authkey=AUTHKEY)
+    server.start()
+    try:
+        client = GalleryClient(server._listener.address, authkey=AUTHKEY)
+        assert client.ping()
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_service_checkpoints_on_shutdown(tmp_path):
+    address = str(tmp_path / 'gallery.sock')
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump({'reid': {
+        'gallery_dir': str(tmp_path / 'gallery'),
+        'gallery_service': {'address': address, 'authkey': AUTHKEY}
+    }}))
+    command = [sys.executable, '-m', 'camera.gallery_service', '--config', str(config_path)]
+
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while not os.path.exists(address):
+        assert process.poll() is None and time.time() < deadline, "gallery service did not start"
+        time.sleep(0.05)
+    person_id = GalleryClient(address, authkey=AUTHKEY).match(RED[np.newaxis])[0][1]
+    process.terminate()
+    process.wait(timeout=10)
+
+    # The restarted service remembers the person
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 10
+        while True:
+            try:
+                result = GalleryClient(address, authkey=AUTHKEY, retry_interval=0).match(RED[np.newaxis])
+                break
+            except OSError:
+                assert time.time() < deadline
+                time.sleep(0.05)
+        assert result == [(False, person_id)]
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_shutdown_during_startup_still_saves(tmp_path):
+    gallery_dir = str(tmp_path / 'gallery')
+    server = GalleryServer(IdentityGallery(), str(tmp_path / 'gallery.sock'), authkey=AUTHKEY,
+                           gallery_dir=gallery_dir)
+    start, save = server.start, server.gallery.save
+    interrupted = []
+
+    def start_then_interrupt():
+        # SIGTERM lands after the listener is serving clients but before start() returns
+        start()
+        server.gallery.insert(RED[np.newaxis], person_ids=['red'])
+        raise KeyboardInterrupt
+
+    def save_interrupted_once(directory):
+        # A second signal during the final save must not skip it
+        if not interrupted:
+            interrupted.append(directory)
+            raise KeyboardInterrupt
+        return save(directory)
+
+    server.start = start_then_interrupt
+    server.gallery.save = save_interrupted_once
+    server.serve_forever()
+
+    assert interrupted
+    restored = IdentityGallery()
+    assert restored.load(gallery_dir) == 1
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+ทดสอบแผนที่ความร้อนการเคลื่อนไหวของระบบ MANTA
+(Tests for MANTA movement heatmap)
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.heatmap import HeatmapAccumulator
+
+
+def test_accumulates_repeated_points():
+    heatmap = HeatmapAccumulator(grid_size=(10, 5))
+    points = np.array([[0.05, 0.1], [0.05, 0.1], [0.99, 0.99]], dtype=np.float32)
+    heatmap.add(points, timestamp=0.0)
+    heatmap.add(points[:1], timestamp=1.0)
+
+    grid = heatmap.snapshot()
+    assert grid.shape == (5, 10)
+    assert grid[0, 0] == 3.0
+    assert grid[4, 9] == 1.0
+    assert grid.sum() == 4.0
+    assert heatmap.samples == 4
+
+
+def test_decay_halves_old_samples():
+    heatmap = HeatmapAccumulator(grid_size=(4, 4), half_life=10.0)
+    heatmap.add(np.array([[0.1, 0.1]], dtype=np.float32), timestamp=0.0)
+    heatmap.add(np.array([[0.9, 0.9]], dtype=np.float32), timestamp=10.0)
+
+    grid = heatmap.snapshot(timestamp=10.0)
+    assert grid[0, 0] == pytest.approx(0.5)
+    assert grid[3, 3] == pytest.approx(1.0)
+
+    # Far in the future the grid is renormalized without losing the ratio
+    heatmap.add(np.array([[0.9, 0.9]], dtype=np.float32), timestamp=400.0)
+    assert heatmap.snapshot(timestamp=400.0)[3, 3] == pytest.approx(1.0, rel=1e-4)
+
+
+def test_snapshots_follow_interval(tmp_path):
+    heatmap = HeatmapAccumulator(grid_size=(8, 6), interval=60.0)
+    assert not heatmap.due(1000.0)
+    heatmap.add(np.array([[0.5, 0.5]], dtype=np.float32), timestamp=1000.0)
+    assert not heatmap.due(1059.0)
+    assert heatmap.due(1060.0)
+
+    png = heatmap.save_snapshot(str(tmp_path), 1060.0, fmt='png')
+    assert cv2.imread(png).shape == (6, 8, 3)
+    assert heatmap.samples == 0
+    assert not heatmap.due(1100.0)
+
+    heatmap.add(np.array([[0.5, 0.5]], dtype=np.float32), timestamp=1110.0)
+    npz = heatmap.save_snapshot(str(tmp_path), 1120.0, fmt='npz')
+    with np.load(npz) as data:
+        assert data['heatmap'].sum() == 1.0
+        assert int(data['samples']) == 1
+
+    with pytest.raises(ValueError):
+        heatmap.save_snapshot(str(tmp_path), 1200.0, fmt='jpg')
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+ทดสอบการโหลดการกำหนดค่าใหม่ขณะทำงานของระบบ MANTA
+(Tests for MANTA live configuration reload)
+"""
+
+import os
+import sys
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.hot_reload import ConfigReloader, get_path, changed_paths
+
+
+BASE_CONFIG = {
+    'camera': {'source': 0},
+    'detection': {'model_path': 'models/a.onnx', 'confidence_threshold': 0.5, 'frame_skip': 0},
+    'advanced': {'counting_line': [[0, 0.5], [1.0, 0.5]]},
+}
+
+
+def _updated(**detection):
+    config = {key: dict(value) for key, value in BASE_CONFIG.items()}
+    config['detection'].update(detection)
+    return config
+
+
+def test_get_path_and_changed_paths():
+    assert get_path(BASE_CONFIG, 'detection.frame_skip') == 0
+    assert get_path(BASE_CONFIG, 'detection.missing', 'x') == 'x'
+    new = _updated(frame_skip=2)
+    assert changed_paths(BASE_CONFIG, new, ['detection.frame_skip', 'advanced']) == ['detection.frame_skip']
+
+
+def test_apply_pending_calls_only_changed_handlers():
+    reloader = ConfigReloader(BASE_CONFIG)
+    calls = []
+    reloader.subscribe(['detection.confidence_threshold'], lambda c: calls.append('threshold'))
+    reloader.subscribe(['advanced.counting_line'], lambda c: calls.append('line'))
+
+    assert reloader.apply_pending() is None
+
+    reloader.submit(_updated(confidence_threshold=0.7))
+    assert reloader.has_pending
+    applied = reloader.apply_pending()
+    assert applied['detection']['confidence_threshold'] == 0.7
+    assert reloader.config is applied
+    assert calls == ['threshold']
+    assert reloader.apply_pending() is None
+
+
+def test_latest_submission_wins_and_handler_errors_are_contained():
+    reloader = ConfigReloader(BASE_CONFIG)
+
+    def broken(config):
+        raise RuntimeError("boom")
+
+    reloader.subscribe(['detection.frame_skip'], broken)
+    reloader.submit(_updated(frame_skip=1))
+    reloader.submit(_updated(frame_skip=3))
+    assert reloader.apply_pending()['detection']['frame_skip'] == 3
+
+
+def test_detector_loads_in_background_and_swaps_once():
+    reloader = ConfigReloader(BASE_CONFIG)
+    release = threading.Event()
+
+    def slow_factory():
+        release.wait(5)
+        return 'new-detector'
+
+    reloader.load_detector_async(slow_factory)
+    # The old detector keeps running until the new one is ready
+    assert reloader.take_detector() is None
+
+    release.set()
+    reloader.wait_for_loader(5)
+    assert reloader.take_detector() == 'new-detector'
+    assert reloader.take_detector() is None
+
+
+def test_failed_or_superseded_load_keeps_current_detector():
+    reloader = ConfigReloader(BASE_CONFIG)
+
+    def failing_factory():
+        raise IOError("missing model")
+
+    reloader.load_detector_async(failing_factory)
+    reloader.wait_for_loader(5)
+    assert reloader.take_detector() is None
+
+    first_release = threading.Event()
+    reloader.load_detector_async(lambda: first_release.wait(5) and 'stale')
+    reloader.load_detector_async(lambda: 'fresh')
+    first_release.set()
+    reloader.wait_for_loader(5)
+    assert reloader.take_detector() == 'fresh'
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+ทดสอบตัวจำกัดการบันทึกการพบบุคคลซ้ำ
+(Tests for the repeated-sighting log throttle)
+"""
+
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.logger import SightingThrottle
+
+
+def test_known_person_is_logged_once_per_interval():
+    throttle = SightingThrottle(interval=60.0)
+    assert throttle.allow('a', 0.0, is_new=True)
+    assert not throttle.allow('a', 1.0)
+    assert throttle.allow('b', 1.0)
+    assert not throttle.allow('a', 59.0)
+    assert throttle.allow('a', 61.0)
+    # Stale entries are pruned so the table only holds recently logged people
+    assert throttle.allow('c', 200.0)
+    assert set(throttle._last_logged) == {'c'}
+
+
+def test_zero_interval_logs_every_sighting():
+    throttle = SightingThrottle(interval=0)
+    assert all(throttle.allow('a', float(t)) for t in range(5))
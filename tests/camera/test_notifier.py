@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+ทดสอบตัวส่งเหตุการณ์ n8n ของระบบ MANTA
+(Tests for MANTA n8n webhook notifier)
+"""
+
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.notifier import N8nNotifier
+
+
+def test_notifier_posts_only_selected_events():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers['Content-Length'])
+            received.append(json.loads(self.rfile.read(length)))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        notifier = N8nNotifier(f"http://127.0.0.1:{server.server_port}/webhook/manta",
+                               ['zone_entry'], camera_id='cam_test')
+        assert notifier.notify({'type': 'zone_entry', 'zone': 'entry', 'track_id': 3})
+        assert not notifier.notify({'type': 'zone_exit', 'zone': 'entry', 'track_id': 3})
+        notifier.stop()
+    finally:
+        server.shutdown()
+
+    assert received == [{'type': 'zone_entry', 'zone': 'entry', 'track_id': 3,
+                         'event_type': 'zone_entry', 'camera_id': 'cam_test'}]
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+ทดสอบแหล่งภาพกล้อง Raspberry Pi ผ่าน picamera2 (แบ็กเอนด์จำลอง) การจับภาพแบบสองสตรีม และเฟรม YUV
+(Tests for the picamera2 camera source using the mock backend, dual-stream capture and YUV frames)
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.camera_utils import (DualStreamFrame, DualStreamSource, PiCameraSource, YUVFrame, as_bgr,
+                                create_camera_source)
+
+
+def test_bgr_frames_are_copied_into_reused_buffers():
+    source = PiCameraSource(100, 60, format='bgr', backend='mock')
+    # The mock pads rows like the ISP does; the padding must not leak into frames
+    assert source.camera.config['main']['stride'] > 100 * 3
+
+    ret, first = source.read()
+    assert ret and first.shape == (60, 100, 3) and first.dtype == np.uint8
+    assert first[0, 0, 2] == 1 and first[5, 0, 1] == 5
+    ret, second = source.read()
+    ret, third = source.read()
+    # Two arrays in rotation: the previous frame stays valid for one more read
+    assert second is not first and third is first
+    assert third[0, 0, 2] == 3
+
+    source.release()
+    assert not source.isOpened()
+    assert source.read() == (False, None)
+
+
+def test_yuv420_frames_drop_stride_padding():
+    source = PiCameraSource(100, 60, format='yuv420', backend='mock')
+    ret, frame = source.read()
+    assert ret and isinstance(frame, YUVFrame)
+    assert frame.i420.shape == (90, 100) and frame.shape == (60, 100, 3)
+    # Same first frame as the BGR source, through the same chroma subsampling
+    _, reference = PiCameraSource(100, 60, format='bgr', backend='mock').read()
+    expected = cv2.cvtColor(cv2.cvtColor(reference, cv2.COLOR_BGR2YUV_I420), cv2.COLOR_YUV2BGR_I420)
+    np.testing.assert_array_equal(frame.bgr, expected)
+    source.release()
+
+
+def test_yuv_frame_converts_at_most_once(monkeypatch):
+    conversions = []
+    monkeypatch.setattr(YUVFrame, 'listener', conversions.append)
+    bgr = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    frame = YUVFrame(cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420))
+
+    # Gray is the Y plane itself
+    assert frame.gray.shape == (48, 64) and np.shares_memory(frame.gray, frame.i420)
+    assert conversions == []
+    assert frame.bgr is frame.bgr and frame.rgb is frame.rgb
+    assert conversions == ['bgr', 'rgb']
+    np.testing.assert_array_equal(frame.rgb, frame.bgr[..., ::-1])
+    assert as_bgr(frame) is frame.bgr and as_bgr(bgr) is bgr
+
+
+def test_create_camera_source_prefers_picamera():
+    config = {'prefer_picamera': True, 'picamera_backend': 'mock',
+              'resolution': {'width': 64, 'height': 48}, 'fps': 10}
+    source = create_camera_source(config)
+    assert isinstance(source, PiCameraSource)
+    assert source.read()[1].shape == (48, 64, 3)
+    source.release()
+
+    with pytest.raises(ValueError):
+        PiCameraSource(format='jpeg', backend='mock')
+
+
+def test_lores_stream_loads_full_frame_lazily():
+    source = PiCameraSource(128, 96, backend='mock', lores_size=(64, 48))
+    ret, frame = source.read()
+    assert ret and isinstance(frame, DualStreamFrame)
+    assert isinstance(frame.low, YUVFrame)
+    assert frame.low.shape == (48, 64, 3) and frame.shape == (96, 128, 3)
+    assert frame.scale == (2.0, 2.0) and not frame.full_loaded
+    assert frame.to_full((10, 5, 20, 15, 0.9, 0)) == (20.0, 10.0, 40.0, 30.0, 0.9, 0)
+    # The low-res frame matches a downscaled full frame
+    np.testing.assert_allclose(frame.low.bgr.astype(float).mean(), frame.full.astype(float).mean(), atol=3)
+    assert frame.full_loaded and frame.full is frame.full
+
+    # Skipping the full frame keeps one camera buffer held until the next read, never more
+    _, unused = source.read()
+    for _ in range(10):
+        source.read()
+    assert source.camera.outstanding == 1
+    with pytest.raises(RuntimeError):
+        unused.full
+    source.release()
+    assert source._held is None
+
+
+def test_dual_stream_source_resizes_once():
+    camera = type('Camera', (), {'read': lambda self: (True, np.full((720, 1280, 3), 7, np.uint8))})()
+    source = DualStreamSource(camera, (640, 360))
+    ret, frame = source.read()
+    assert ret and frame.low.shape == (360, 640, 3) and frame.full.shape == (720, 1280, 3)
+    assert frame.scale == (2.0, 2.0) and (frame.low == 7).all()
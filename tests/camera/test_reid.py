@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+ทดสอบการจดจำบุคคลซ้ำของระบบ MANTA
+(Tests for MANTA person re-identification)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.ann_index import create_index
+from camera.reid import PersonReIdentifier, benchmark_fallback
+
+
+class FakeSession:
+    """Stands in for an onnxruntime session: embedding = per-channel mean of the input."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def run(self, output_names, feeds):
+        batch = next(iter(feeds.values()))
+        assert batch.dtype == np.float32 and batch.ndim == 4 and batch.shape[1] == 3
+        self.batch_sizes.append(batch.shape[0])
+        return [batch.mean(axis=(2, 3))]
+
+
+def _reidentifier(max_batch_size=None):
+    reid = PersonReIdentifier(feature_size=3, similarity_threshold=0.9)
+    reid.model = FakeSession()
+    reid.input_name, reid.output_name = 'input', 'output'
+    reid.input_width, reid.input_height = 16, 32
+    reid.max_batch_size = max_batch_size
+    return reid
+
+
+def _frame():
+    """Three people in distinct colours (BGR): red, green, blue."""
+    frame = np.zeros((100, 150, 3), dtype=np.uint8)
+    frame[:, 0:50] = (0, 0, 255)
+    frame[:, 50:100] = (0, 255, 0)
+    frame[:, 100:150] = (255, 0, 0)
+    return frame, [(5, 10, 45, 90), (55, 10, 95, 90), (105, 10, 145, 90)]
+
+
+def test_process_batch_runs_model_once_per_frame():
+    reid = _reidentifier()
+    frame, boxes = _frame()
+
+    first = reid.process_batch(frame, boxes)
+    assert reid.model.batch_sizes == [3]
+    assert [is_new for is_new, _ in first] == [True, True, True]
+    buffer = reid._batch_buffer
+
+    second = reid.process_batch(frame, boxes[::-1])
+    assert reid.model.batch_sizes == [3, 3]
+    assert [is_new for is_new, _ in second] == [False, False, False]
+    # The preallocated input tensor is reused between frames
+    assert reid._batch_buffer is buffer
+    assert reid.process_batch(frame, []) == []
+
+
+def test_fixed_batch_models_are_run_in_chunks():
+    reid = _reidentifier(max_batch_size=1)
+    frame, boxes = _frame()
+    reid.process_batch(frame, boxes)
+    assert reid.model.batch_sizes == [1, 1, 1]
+
+
+def test_prepared_batch_is_normalized_rgb():
+    reid = _reidentifier()
+    frame, boxes = _frame()
+    batch = reid._prepare_batch(frame, boxes[:1])
+    # A pure red BGR crop becomes R=1, G=B=0 before ImageNet normalization
+    expected = (np.array([1.0, 0.0, 0.0]) - reid.INPUT_MEAN) / reid.INPUT_STD
+    np.testing.assert_allclose(batch[0].mean(axis=(1, 2)), expected, rtol=1e-5)
+
+
+def test_fallback_features_without_model():
+    reid = PersonReIdentifier(feature_size=128, similarity_threshold=0.95)
+    frame, boxes = _frame()
+    # Boxes partly outside the frame are clipped
+    boxes = [(-10, -10, 45, 90)] + boxes[1:]
+    first = reid.process_batch(frame, boxes)
+    assert all(is_new for is_new, _ in first)
+    assert not reid.process(frame[10:90, 5:45].copy())[0]
+
+
+def test_fallback_stripes_separate_outfits_with_the_same_colours():
+    reid = PersonReIdentifier(feature_size=64)
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    frame[:50, :50], frame[50:, :50] = (0, 0, 255), (255, 0, 0)   # red shirt, blue trousers
+    frame[:50, 50:], frame[50:, 50:] = (255, 0, 0), (0, 0, 255)   # blue shirt, red trousers
+    vectors = reid._extract_features_batch(frame, [(0, 0, 50, 100), (50, 0, 100, 100), (0, 0, 50, 100)])
+    assert vectors.shape == (3, 64) and vectors.dtype == np.float32
+    assert vectors[0] @ vectors[1] < 0.5
+    np.testing.assert_allclose(vectors[0] @ vectors[2], 1.0, rtol=1e-5)
+    # All crops of a frame share one reusable buffer
+    buffer = reid._fallback_buffer
+    reid._extract_features_batch(frame, [(0, 0, 50, 100)])
+    assert reid._fallback_buffer is buffer
+
+
+def test_fallback_benchmark():
+    results = benchmark_fallback(count=60, per_frame=6)
+    assert results['stripes']['rank1'] >= 0.9
+    assert results['stripes']['rank1'] >= results['global']['rank1']
+    assert results['stripes']['ms_per_frame'] > 0
+
+
+@pytest.mark.parametrize('index', ['brute', 'ivf'])
+def test_gallery_expiry_and_size_limit(index, monkeypatch):
+    reid = _reidentifier()
+    reid.local_gallery.index = create_index(index, n_lists=2, train_size=2) if index == 'ivf' else create_index(index)
+    reid.local_gallery.max_identities = 2
+    frame, boxes = _frame()
+
+    now = [1000.0]
+    monkeypatch.setattr('camera.gallery.time.time', lambda: now[0])
+    reid.process_batch(frame, boxes)
+    # Only the two newest vectors are kept: the first (red) person is forgotten
+    assert reid.gallery_size == 2 and len(reid.local_gallery.index) == 2
+    assert reid.process_batch(frame, boxes[:1])[0][0]
+
+    now[0] += reid.local_gallery.retention_period + 1
+    assert reid.process_batch(frame, boxes[1:2])[0][0]
+    assert reid.gallery_size == 1
+
+
+def test_capture_timestamps_drive_expiry():
+    reid = _reidentifier()
+    frame, boxes = _frame()
+
+    # Replayed footage: the frame capture times, not the wall clock, decide expiry
+    reid.process_batch(frame, boxes, timestamp=1000.0)
+    assert [seen for seen, _ in reid.local_gallery._entries.values()] == [1000.0] * 3
+    later = 1000.0 + reid.local_gallery.retention_period + 1
+    assert all(is_new for is_new, _ in reid.process_batch(frame, boxes, timestamp=later))
+
+
+def test_prototypes_return_stable_ids_and_follow_ema():
+    reid = _reidentifier()
+    gallery = reid.local_gallery
+    gallery.ema_alpha = 0.5
+    frame, boxes = _frame()
+
+    first = reid.process_batch(frame, boxes)
+    for _ in range(5):
+        again = reid.process_batch(frame, boxes)
+        assert again == [(False, person_hash) for _, person_hash in first]
+    # The gallery holds one prototype per person, not one vector per sighting
+    assert reid.gallery_size == 3
+
+    identity_id = next(iter(gallery._entries))
+    before = gallery.index.get(identity_id)
+    vector = before + np.float32([0.0, 0.3, 0.0])
+    vector /= np.linalg.norm(vector)
+    gallery._update_identity(identity_id, vector, similarity=0.95)
+    after = gallery.index.get(identity_id)
+    expected = 0.5 * before + 0.5 * vector
+    np.testing.assert_allclose(after, expected / np.linalg.norm(expected), rtol=1e-5)
+
+
+def test_one_identity_per_frame():
+    reid = _reidentifier()
+    frame, boxes = _frame()
+    reid.process_batch(frame, boxes[:1])
+    # Two red people in the same frame cannot both be the known red person
+    results = reid.process_batch(frame, [boxes[0], (10, 10, 40, 90)])
+    assert sorted(is_new for is_new, _ in results) == [False, True]
+    assert reid.gallery_size == 2
+    # Identical crops still get distinct ids: ids are assigned at insertion, not hashed
+    assert results[0][1] != results[1][1]
+
+
+def test_gallery_checkpoint_round_trip(tmp_path, monkeypatch):
+    reid = _reidentifier()
+    frame, boxes = _frame()
+    now = [1000.0]
+    monkeypatch.setattr('camera.gallery.time.time', lambda: now[0])
+    first = reid.process_batch(frame, boxes)
+    now[0] += 100.0
+    reid.process_batch(frame, boxes[1:])
+    assert reid.save_gallery(str(tmp_path), background=True)
+    reid.local_gallery._checkpoint_thread.join()
+
+    # A restarted reidentifier recognizes everyone; the red person (last seen at 1000) has expired
+    restarted = _reidentifier()
+    restarted.local_gallery.retention_period = 150.0
+    now[0] += 100.0
+    assert restarted.load_gallery(str(tmp_path)) == 2
+    again = restarted.process_batch(frame, boxes)
+    assert again[1:] == [(False, person_id) for _, person_id in first[1:]]
+    assert again[0][0]
+
+    assert _reidentifier().load_gallery(str(tmp_path / 'missing')) == 0
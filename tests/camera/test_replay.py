@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ทดสอบโหมดเล่นซ้ำและรายงานประสิทธิภาพของระบบ MANTA
+(Tests for MANTA replay mode and benchmark report)
+"""
+
+import os
+import sys
+import json
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.replay import VirtualClock, ReplaySource, BenchmarkReport, peak_rss_mb
+
+
+def _write_clip(path, frames=12, fps=10.0, size=(64, 48)):
+    """Write a short synthetic MJPG clip and return its path."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    if not writer.isOpened():
+        pytest.skip("OpenCV build cannot write MJPG video")
+    for i in range(frames):
+        frame = np.full((size[1], size[0], 3), i * 10, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_virtual_clock_follows_media_time():
+    clock = VirtualClock(start_time=1000.0)
+    clock.advance_to(2.5)
+    assert clock.time() == pytest.approx(1002.5)
+    assert clock.monotonic() == pytest.approx(2.5)
+
+    # Time never runs backwards and sleep is virtual
+    clock.advance_to(1.0)
+    start = time.monotonic()
+    clock.sleep(5)
+    assert time.monotonic() - start < 1.0
+    assert clock.monotonic() == pytest.approx(2.5)
+
+
+def test_replay_source_reads_whole_clip(tmp_path):
+    path = _write_clip(tmp_path / "clip.avi", frames=12, fps=10.0)
+    clock = VirtualClock(start_time=0.0)
+    source = ReplaySource(path, clock)
+
+    count = 0
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        count += 1
+
+    assert count == 12
+    assert source.finished
+    assert not source.isOpened()
+    # The clock sits on the timestamp of the last frame
+    assert clock.time() == pytest.approx(11 / source.fps)
+    source.release()
+
+
+def test_replay_source_max_frames(tmp_path):
+    path = _write_clip(tmp_path / "clip.avi", frames=12)
+    source = ReplaySource(path, VirtualClock(), max_frames=5)
+    reads = [source.read()[0] for _ in range(8)]
+    assert reads.count(True) == 5
+    source.release()
+
+
+def test_replay_source_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ReplaySource(str(tmp_path / "missing.mp4"), VirtualClock())
+
+
+def test_benchmark_report_summary(tmp_path):
+    report = BenchmarkReport(source_path="clip.avi")
+    report.start()
+    for i in range(10):
+        with report.measure('detect'):
+            pass
+        report.record('reid', 0.001 * (i + 1))
+        report.count_frame(detections=[(0, 0, 1, 1, 0.9, 0)], identities=[(f"p{i % 3}", False)])
+    report.stop()
+
+    summary = report.summary()
+    assert summary['frames'] == 10
+    assert summary['detections'] == 10
+    assert summary['unique_persons'] == 3
+    assert summary['fps'] > 0
+    assert summary['stages']['detect']['count'] == 10
+    assert summary['stages']['reid']['max_ms'] == pytest.approx(10.0)
+    assert summary['stages']['reid']['p50_ms'] == pytest.approx(5.5)
+    assert summary['peak_rss_mb'] >= 0.0
+    assert 'reid' in report.format_text()
+
+    out = tmp_path / "reports" / "bench.json"
+    report.save(str(out))
+    with open(out) as f:
+        assert json.load(f)['frames'] == 10
+
+
+def test_peak_rss_is_positive():
+    assert peak_rss_mb() >= 0.0
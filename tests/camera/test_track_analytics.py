@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+ทดสอบการวิเคราะห์เส้นทางของแทร็กของระบบ MANTA
+(Tests for MANTA per-track analytics)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.tracking import CentroidTracker
+from camera.track_analytics import TrackAnalytics, TrackPath
+from camera.zones import ZoneMap
+
+FRAME_SHAPE = (100, 100, 3)
+ZONES = [
+    {'name': 'entry', 'points': [[0, 0.7], [0.3, 0.7], [0.3, 1.0], [0, 1.0]]},
+    {'name': 'exit', 'points': [[0.7, 0.7], [1.0, 0.7], [1.0, 1.0], [0.7, 1.0]]},
+]
+
+
+def _person(foot_x, foot_y, w=10, h=30):
+    return (foot_x - w / 2, foot_y - h, foot_x + w / 2, foot_y, 0.9, 0)
+
+
+def test_summary_reports_dwell_zones_and_length():
+    tracker = CentroidTracker(max_distance=0.5, max_missed=0)
+    analytics = TrackAnalytics(zone_map=ZoneMap(ZONES), min_duration=0.0)
+
+    # Walk from the entry zone, across the middle, into the exit zone
+    timeline = [(0.0, 10), (2.0, 20), (4.0, 50), (6.0, 80), (9.0, 90)]
+    for timestamp, x in timeline:
+        assert analytics.update(tracker.update([_person(x, 80)], FRAME_SHAPE, timestamp), FRAME_SHAPE) == []
+
+    summaries = analytics.update(tracker.update([], FRAME_SHAPE, 10.0), FRAME_SHAPE)
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert summary['type'] == 'track_summary'
+    assert summary['duration_seconds'] == 9.0
+    assert summary['entry_zone'] == 'entry'
+    assert summary['exit_zone'] == 'exit'
+    assert summary['zone_dwell'] == {'entry': 4.0, 'exit': 3.0}
+    assert summary['path_length'] == pytest.approx(0.8, abs=1e-4)
+    assert summary['path'][0][:2] == pytest.approx([0.1, 0.8])
+    assert summary['path'][-1] == pytest.approx([0.9, 0.8, 9.0])
+    assert analytics.active_count == 0
+
+
+def test_path_buffer_stays_bounded():
+    path = TrackPath(np.array([0.0, 0.0], dtype=np.float32), 0.0, max_points=8, min_step=0.01)
+    for i in range(1, 1000):
+        path.add(np.array([i / 1000.0, 0.0], dtype=np.float32), float(i))
+
+    assert path.size <= 8
+    assert path.points.shape == (8, 3)
+    points = path.path()
+    assert points[0] == [0.0, 0.0, 0.0]
+    assert points[-1][0] == pytest.approx(0.999)
+    assert path.length == pytest.approx(0.999, abs=1e-4)
+
+
+def test_short_tracks_and_shutdown():
+    tracker = CentroidTracker()
+    analytics = TrackAnalytics(min_duration=5.0)
+    analytics.update(tracker.update([_person(10, 80)], FRAME_SHAPE, 0.0), FRAME_SHAPE)
+    analytics.update(tracker.update([_person(12, 80)], FRAME_SHAPE, 1.0), FRAME_SHAPE)
+    assert analytics.finish_all() == []
+
+    analytics.update(tracker.update([_person(12, 80)], FRAME_SHAPE, 2.0), FRAME_SHAPE)
+    analytics.update(tracker.update([_person(14, 80)], FRAME_SHAPE, 8.0), FRAME_SHAPE)
+    summaries = analytics.finish_all()
+    assert len(summaries) == 1
+    assert summaries[0]['zone_dwell'] == {}
+    assert summaries[0]['entry_zone'] is None
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+ทดสอบตัวติดตามบุคคลของระบบ MANTA
+(Tests for MANTA centroid tracker)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.tracking import CentroidTracker
+
+FRAME_SHAPE = (100, 200, 3)
+
+
+def _det(cx, cy, w=20, h=40):
+    return (cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2, 0.9, 0)
+
+
+def test_tracks_keep_ids_while_moving():
+    tracker = CentroidTracker(max_distance=0.2)
+    first = tracker.update([_det(20, 50), _det(150, 50)], FRAME_SHAPE, timestamp=1.0)
+    assert first.ids.tolist() == [1, 2]
+    np.testing.assert_allclose(first.previous, first.centroids)
+
+    # Detections arrive in a different order; ids follow position
+    second = tracker.update([_det(160, 55), _det(30, 50)], FRAME_SHAPE, timestamp=2.0)
+    assert second.ids.tolist() == [2, 1]
+    np.testing.assert_allclose(second.previous[1], [0.1, 0.5], atol=1e-6)
+    np.testing.assert_allclose(second.feet[1], [0.15, 0.7], atol=1e-6)
+    assert second.detection_index.tolist() == [0, 1]
+    assert second.timestamp == 2.0
+
+
+def test_tracks_end_after_max_missed():
+    tracker = CentroidTracker(max_missed=2)
+    tracker.update([_det(20, 50)], FRAME_SHAPE)
+    assert tracker.update([], FRAME_SHAPE).ended == []
+    assert tracker.update([], FRAME_SHAPE).ended == []
+    assert tracker.update([], FRAME_SHAPE).ended == [1]
+    assert tracker.active_count == 0
+
+    # A far away detection starts a new track
+    assert tracker.update([_det(180, 90)], FRAME_SHAPE).ids.tolist() == [2]
+    assert tracker.end_all() == [2]
+
+
+def test_max_objects_limits_new_tracks():
+    tracker = CentroidTracker(max_objects=2)
+    frame = tracker.update([_det(20, 50), _det(100, 50), _det(180, 50)], FRAME_SHAPE)
+    assert len(frame) == 2
+    assert tracker.active_count == 2
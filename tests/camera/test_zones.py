@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+ทดสอบการตรวจจับการเข้า/ออกโซนของระบบ MANTA
+(Tests for MANTA zone entry/exit detection)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.tracking import CentroidTracker
+from camera.zones import ZoneMap, ZoneMonitor
+
+FRAME_SHAPE = (100, 100, 3)
+ZONES = [
+    {'name': 'entry', 'points': [[0, 0.7], [0.3, 0.7], [0.3, 1.0], [0, 1.0]]},
+    {'name': 'left', 'points': [[0, 0], [0.5, 0], [0.5, 1.0], [0, 1.0]]},
+]
+
+
+def _person(foot_x, foot_y, w=10, h=30):
+    """Detection whose bottom-centre (foot point) is at the given pixel."""
+    return (foot_x - w / 2, foot_y - h, foot_x + w / 2, foot_y, 0.9, 0)
+
+
+def test_zone_map_lookup_with_overlapping_zones():
+    zone_map = ZoneMap(ZONES)
+    points = np.array([[0.1, 0.9], [0.4, 0.2], [0.9, 0.9]], dtype=np.float32)
+    assert zone_map.lookup(points, FRAME_SHAPE).tolist() == [0b11, 0b10, 0]
+    assert zone_map.mask_for(FRAME_SHAPE).dtype == np.uint8
+
+    # Masks are built once per resolution
+    assert zone_map.mask_for(FRAME_SHAPE) is zone_map.mask_for(FRAME_SHAPE)
+    assert zone_map.mask_for((50, 80)).shape == (50, 80)
+
+
+def test_zone_map_rejects_bad_polygons():
+    with pytest.raises(ValueError):
+        ZoneMap([{'name': 'line', 'points': [[0, 0], [1, 1]]}])
+
+
+def test_zone_monitor_emits_entry_exit_and_dwell():
+    tracker = CentroidTracker(max_distance=0.5, max_missed=0)
+    monitor = ZoneMonitor(ZoneMap(ZONES))
+
+    events = monitor.update(tracker.update([_person(80, 90)], FRAME_SHAPE, 10.0), FRAME_SHAPE)
+    assert events == []
+
+    events = monitor.update(tracker.update([_person(20, 90)], FRAME_SHAPE, 12.0), FRAME_SHAPE)
+    assert sorted((e['type'], e['zone']) for e in events) == [('zone_entry', 'entry'), ('zone_entry', 'left')]
+    assert monitor.occupancy() == {'entry': 1, 'left': 1}
+
+    events = monitor.update(tracker.update([_person(20, 40)], FRAME_SHAPE, 15.0), FRAME_SHAPE)
+    assert [(e['type'], e['zone'], e['dwell_seconds']) for e in events] == [('zone_exit', 'entry', 3.0)]
+
+    # The track disappears while still inside "left"
+    events = monitor.update(tracker.update([], FRAME_SHAPE, 20.0), FRAME_SHAPE)
+    assert [(e['zone'], e['dwell_seconds'], e['track_ended']) for e in events] == [('left', 8.0, True)]
+    assert monitor.occupancy() == {'entry': 0, 'left': 0}
+
+
+def test_failed_zone_reload_keeps_previous_zones():
+    tracker = CentroidTracker(max_distance=0.5, max_missed=0)
+    zone_map = ZoneMap(ZONES)
+    monitor = ZoneMonitor(zone_map)
+    monitor.update(tracker.update([_person(20, 90)], FRAME_SHAPE, 10.0), FRAME_SHAPE)
+    mask = zone_map.mask_for(FRAME_SHAPE)
+
+    bad = {'name': 'bad', 'points': [[0, 0], [1, 1]]}
+    with pytest.raises(ValueError):
+        monitor.set_zones([ZONES[0], bad])
+    assert zone_map.names == ['entry', 'left']
+    assert zone_map.mask_for(FRAME_SHAPE) is mask
+    assert monitor.occupancy() == {'entry': 1, 'left': 1}
+
+    # The track still leaves both zones
+    events = monitor.update(tracker.update([_person(80, 20)], FRAME_SHAPE, 14.0), FRAME_SHAPE)
+    assert sorted((e['type'], e['zone']) for e in events) == [('zone_exit', 'entry'), ('zone_exit', 'left')]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+ทดสอบซองข้อมูลเฟรมพร้อมเวลาจับภาพและหมายเลขลำดับ
+(Tests for the frame metadata envelope)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from camera.replay import VirtualClock
+from utils.frame_envelope import FrameEnvelope, FrameStamper
+from utils.metrics import PipelineMetrics
+
+
+def test_envelope_is_slotted_and_records_stage_timings():
+    metrics = PipelineMetrics()
+    envelope = FrameEnvelope(np.zeros((4, 6, 3), np.uint8), 'cam_a', 7, 10.0, 1700000000.0, timer=metrics)
+    with pytest.raises(AttributeError):
+        envelope.extra = 1
+
+    with envelope.measure('detect'):
+        pass
+    envelope.record('face', 0.25)
+    envelope.record('face', 0.5)
+    assert envelope.shape == (4, 6, 3)
+    assert set(envelope.timings) == {'detect', 'face'}
+    assert envelope.timings['face'] == pytest.approx(0.75)
+    # Samples are forwarded to the pipeline metrics as well
+    assert metrics.stage_latency.labels('face').count == 2
+    assert envelope.latency(10.5) == pytest.approx(0.5)
+
+
+def test_stamper_uses_clock_and_counts_sequence_gaps():
+    clock = VirtualClock(start_time=1000.0)
+    missed = []
+    stamper = FrameStamper('cam_a', clock, on_missed=missed.append)
+
+    clock.advance_to(2.0)
+    first = stamper.wrap('frame')
+    assert (first.seq, first.captured_mono, first.captured_wall) == (0, 2.0, 1002.0)
+    assert stamper.wrap('frame').seq == 1
+
+    # Sources that stamp frames themselves report capture time and their own sequence
+    envelope = stamper.wrap('frame', (5, 3.5, 1003.5))
+    assert (envelope.seq, envelope.captured_mono, envelope.captured_wall) == (5, 3.5, 1003.5)
+    assert missed == [3] and stamper.missed == 3
+    stamper.wrap('frame', (6, 3.6, 1003.6))
+    assert stamper.missed == 3
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+ทดสอบตัวสร้างไปป์ไลน์ GStreamer สำหรับถอดรหัสวิดีโอ
+(Tests for the GStreamer decode pipeline builder)
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils import gst_pipeline
+from utils.gst_pipeline import benchmark, build_pipeline, candidate_pipelines, gstreamer_available
+
+
+def test_rtsp_h265_hardware_pipeline_scales_on_decoder():
+    pipeline = build_pipeline('rtsp://cam/stream', 'h265', 'v4l2', width=640, height=360)
+    assert pipeline.split(' ! ') == [
+        'rtspsrc location=rtsp://cam/stream latency=200 protocols=tcp', 'rtph265depay', 'h265parse',
+        'v4l2slh265dec', 'v4l2convert', 'video/x-raw,width=640,height=360',
+        'videoconvert', 'video/x-raw,format=BGR', 'appsink drop=true max-buffers=1 sync=false']
+
+    vaapi = build_pipeline('rtmp://192.168.42.1:1935/live/stream', decoder='vaapi', width=640, height=360)
+    assert vaapi.startswith('rtmpsrc location=rtmp://192.168.42.1:1935/live/stream ! flvdemux ! h264parse ! '
+                            'vaapih264dec ! vaapipostproc width=640 height=360 ! videoconvert')
+    # Without a target size the decoder output is passed through unscaled
+    assert 'videoscale' not in build_pipeline('clip.mp4')
+    assert build_pipeline('clip.h264', output_format='I420').startswith('filesrc location=clip.h264 ! h264parse')
+
+    with pytest.raises(ValueError):
+        build_pipeline('clip.mp4', codec='vp9')
+    with pytest.raises(ValueError):
+        build_pipeline('clip.mp4', decoder='cuda')
+
+
+def test_candidates_fall_back_to_software(monkeypatch):
+    monkeypatch.setattr(gst_pipeline, 'element_available', lambda element: element == 'vaapih264dec')
+    candidates = candidate_pipelines('rtsp://cam/stream', width=640, height=360)
+    assert [c['decoder'] for c in candidates] == ['vaapi', 'software']
+    assert 'avdec_h264 ! videoscale' in candidates[-1]['pipeline']
+
+    assert [c['decoder'] for c in candidate_pipelines('rtsp://cam/stream', hardware=False)] == ['software']
+    assert [c['decoder'] for c in candidate_pipelines('videotestsrc')] == ['software']
+
+
+@pytest.mark.skipif(not gstreamer_available(), reason="OpenCV built without GStreamer")
+def test_videotestsrc_benchmark():
+    result = benchmark('videotestsrc', frames=10, decoders=['software'], width=320, height=240)[0]
+    assert result['opened'] and result['frames'] == 10
+    assert result['fps'] > 0 and result['cpu_percent'] >= 0
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+ทดสอบตัวชี้วัดประสิทธิภาพของไปป์ไลน์ MANTA
+(Tests for MANTA pipeline metrics and Prometheus rendering)
+"""
+
+import os
+import sys
+import queue
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.metrics import MetricsRegistry, PipelineMetrics
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    hist = registry.histogram('test_latency_seconds', 'Test latency', buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+        hist.observe(value)
+
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{le="0.01"} 1' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 3' in text
+    assert 'test_latency_seconds_bucket{le="1"} 4' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 5' in text
+    assert 'test_latency_seconds_count 5' in text
+    assert hist.sum == pytest.approx(5.605)
+
+
+def test_labelled_counter_and_gauge():
+    registry = MetricsRegistry()
+    errors = registry.counter('test_errors_total', 'Errors', ('kind',))
+    errors.labels(kind='io').inc()
+    errors.labels('io').inc(2)
+    errors.labels('net').inc()
+    depth = registry.gauge('test_depth', 'Depth')
+    depth.set(7)
+
+    text = registry.render()
+    assert 'test_errors_total{kind="io"} 3' in text
+    assert 'test_errors_total{kind="net"} 1' in text
+    assert 'test_depth 7' in text
+
+    with pytest.raises(ValueError):
+        registry.gauge('test_errors_total', 'Wrong type')
+
+
+def test_pipeline_metrics_stage_timing_and_listeners():
+    metrics = PipelineMetrics()
+    seen = []
+    metrics.add_listener(lambda stage, seconds: seen.append(stage))
+
+    with metrics.measure('detect'):
+        pass
+    metrics.observe('reid', 0.002)
+    metrics.frames.inc()
+    metrics.frames_dropped.inc()
+
+    text = metrics.render()
+    assert seen == ['detect', 'reid']
+    assert 'manta_stage_latency_seconds_count{stage="detect"} 1' in text
+    assert 'manta_stage_latency_seconds_bucket{stage="reid",le="0.0025"} 1' in text
+    assert 'manta_frames_total 1' in text
+    assert 'manta_frames_dropped_total 1' in text
+
+
+def test_queue_depth_and_upload_backlog():
+    metrics = PipelineMetrics()
+    uploads, faces = queue.Queue(), queue.Queue()
+    metrics.track_queue('upload', uploads.qsize, upload=True)
+    metrics.track_queue('face_storage', faces.qsize, upload=True)
+    for i in range(3):
+        uploads.put(i)
+    faces.put('face.jpg')
+
+    text = metrics.render()
+    assert 'manta_queue_depth{queue="upload"} 3' in text
+    assert 'manta_queue_depth{queue="face_storage"} 1' in text
+    assert 'manta_upload_backlog 4' in text
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+ทดสอบสตรีมภาพตัวอย่าง MJPEG ของ MANTA
+(Tests for the MANTA MJPEG preview broadcaster)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.preview import PreviewBroadcaster
+
+
+def _frame(value=128):
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+
+def test_publish_without_viewers_does_not_encode():
+    preview = PreviewBroadcaster(max_fps=0)
+    assert not preview.active and not preview.wants_frame
+    assert preview.publish(_frame()) is False
+    assert preview.latest_jpeg() is None
+
+
+def test_one_encode_is_shared_by_all_viewers():
+    preview = PreviewBroadcaster(max_fps=0)
+    streams = [preview.stream(timeout=1.0) for _ in range(2)]
+    results = [None, None]
+
+    def read(i):
+        results[i] = next(streams[i])
+
+    # Starting the generators registers the viewers
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    while preview.clients < 2:
+        time.sleep(0.001)
+
+    assert preview.publish(_frame()) is True
+    for t in threads:
+        t.join(timeout=2.0)
+
+    jpeg = preview.latest_jpeg()
+    assert jpeg is not None and jpeg[:2] == b'\xff\xd8'
+    for chunk in results:
+        assert chunk.startswith(b'--frame\r\nContent-Type: image/jpeg\r\n')
+        assert jpeg in chunk
+
+    for stream in streams:
+        stream.close()
+    assert preview.clients == 0
+
+
+def test_preview_rate_is_capped():
+    preview = PreviewBroadcaster(max_fps=1)
+    stream = preview.stream(timeout=0.01)
+    thread = threading.Thread(target=lambda: next(stream))
+    thread.start()
+    while not preview.active:
+        time.sleep(0.001)
+
+    assert preview.wants_frame
+    assert preview.publish(_frame(10)) is True
+    # A second frame inside the same 1 s window is dropped, not encoded
+    assert not preview.wants_frame
+    assert preview.publish(_frame(20)) is False
+    thread.join(timeout=2.0)
+    stream.close()
+
+
+def test_close_ends_open_streams():
+    preview = PreviewBroadcaster()
+    stream = preview.stream(timeout=10.0)
+    chunks = []
+    thread = threading.Thread(target=lambda: chunks.extend(stream))
+    thread.start()
+    while not preview.active:
+        time.sleep(0.001)
+    preview.close()
+    thread.join(timeout=2.0)
+    assert not thread.is_alive()
+    assert chunks == []
+    assert preview.clients == 0
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+ทดสอบโปรไฟเลอร์แบบสุ่มตัวอย่างของ MANTA
+(Tests for the MANTA in-process sampling profiler)
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.profiler import SamplingProfiler, profile_process
+
+
+def _busy_capture_loop(stop_event, counter):
+    while not stop_event.is_set():
+        counter[0] += sum(range(200))
+
+
+def test_profiler_samples_other_threads_without_stopping_them():
+    stop_event = threading.Event()
+    counter = [0]
+    worker = threading.Thread(target=_busy_capture_loop, args=(stop_event, counter),
+                              name='capture', daemon=True)
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval=0.002, threads=['capture'])
+        before = counter[0]
+        stacks = profiler.run(0.3)
+        # The sampled thread kept running while it was being profiled
+        assert counter[0] > before
+    finally:
+        stop_event.set()
+        worker.join()
+
+    assert profiler.samples > 10
+    assert stacks
+    for stack in stacks:
+        assert stack.startswith('capture;')
+        assert '_busy_capture_loop (test_profiler.py:' in stack
+
+    lines = profiler.collapsed().strip().split('\n')
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+
+
+def test_profiler_excludes_its_own_thread():
+    text = profile_process(0.05, interval=0.005)
+    assert 'run (profiler.py:' not in text
+
+
+def test_profiler_rejects_invalid_interval():
+    with pytest.raises(ValueError):
+        SamplingProfiler(interval=0)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+ทดสอบตัวควบคุมการเชื่อมต่อกล้องแบบเครื่องสถานะพร้อม backoff
+(Tests for the supervised camera connection state machine)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.reconnect import (BACKOFF, CONNECTED, FRESH, NO_FRAME, STALE, STOPPED,
+                             ConnectionSupervisor)
+
+
+class FakeCapture:
+    """Stream that yields a numbered frame per read and dies after `frames` reads."""
+
+    def __init__(self, frames=None, interval=0.005):
+        self.frames = frames
+        self.interval = interval
+        self.count = 0
+        self.released = False
+
+    def read(self):
+        time.sleep(self.interval)
+        if self.frames is not None and self.count >= self.frames:
+            return False, None
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count, dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_backoff_grows_exponentially_and_is_capped():
+    supervisor = ConnectionSupervisor(lambda: None, initial_backoff=1, max_backoff=5, jitter=0)
+    assert [supervisor.backoff_delay(n) for n in range(5)] == [1, 2, 4, 5, 5]
+    supervisor = ConnectionSupervisor(lambda: None, initial_backoff=1, jitter=0.1)
+    assert all(0.9 <= supervisor.backoff_delay(0) <= 1.1 for _ in range(20))
+
+
+def test_read_never_waits_for_a_slow_connect():
+    release = threading.Event()
+
+    def slow_open():
+        release.wait(10)
+        return FakeCapture()
+
+    supervisor = ConnectionSupervisor(slow_open, jitter=0)
+    supervisor.start()
+    start = time.monotonic()
+    assert supervisor.read(timeout=1.0) == (NO_FRAME, None)
+    assert time.monotonic() - start < 0.1
+
+    release.set()
+    assert supervisor.wait_connected(5)
+    _wait_for(lambda: supervisor.frames > 0)
+    status, frame = supervisor.read()
+    assert status == FRESH and frame is not None
+    # Without a newer frame the last one is handed back as stale, without waiting
+    supervisor.stop()
+    assert supervisor.state == STOPPED
+    _, frame = supervisor.read()
+    start = time.monotonic()
+    status, stale = supervisor.read(timeout=1.0)
+    assert status == STALE and stale is frame
+    assert time.monotonic() - start < 0.1
+
+
+def test_failed_and_lost_connections_back_off_then_recover():
+    captures = []
+
+    def flaky_open():
+        attempt = len(captures)
+        captures.append(None if attempt < 2 else FakeCapture(frames=3 if attempt == 2 else None))
+        return captures[-1]
+
+    supervisor = ConnectionSupervisor(flaky_open, initial_backoff=0.01, jitter=0, stale_timeout=0.05)
+    states = []
+    original = supervisor._set_state
+    supervisor._set_state = lambda state: (states.append(state), original(state))
+    supervisor.start()
+    _wait_for(lambda: len(captures) >= 4 and supervisor.state == CONNECTED)
+    supervisor.stop()
+
+    # Two failed attempts, a session that went stale, then a healthy reconnect
+    assert states.count(BACKOFF) == 3
+    assert captures[2].released and captures[3].released
+    assert supervisor.failures == 0
+
+
+def test_health_check_forces_reconnect():
+    checks = []
+    opened = []
+
+    def open_capture():
+        opened.append(FakeCapture())
+        return opened[-1]
+
+    supervisor = ConnectionSupervisor(open_capture, initial_backoff=0.01, jitter=0,
+                                      health_check=lambda: checks.append(1) or len(checks) > 1,
+                                      health_interval=0.02)
+    supervisor.start()
+    _wait_for(lambda: len(opened) >= 2)
+    supervisor.stop()
+    assert opened[0].released
+
+
+def test_slow_consumer_only_sees_latest_frame():
+    supervisor = ConnectionSupervisor(lambda: FakeCapture(interval=0.001), jitter=0)
+    supervisor.start()
+    _wait_for(lambda: supervisor.frames > 20)
+    status, frame = supervisor.read()
+    supervisor.stop()
+    assert status == FRESH
+    assert supervisor.dropped >= 19
+    assert frame[0, 0, 0] >= 20
+    # The capture sequence number identifies the frame that was handed out
+    assert supervisor.last_capture[0] % 256 == frame[0, 0, 0]
+
+
+def test_restart_waits_for_a_thread_that_did_not_stop():
+    release = threading.Event()
+    opened = []
+
+    def slow_open():
+        release.wait(10)
+        opened.append(FakeCapture())
+        return opened[-1]
+
+    supervisor = ConnectionSupervisor(slow_open, jitter=0)
+    supervisor.start()
+    # The thread is stuck in open_capture: stop() times out and keeps its handle
+    assert not supervisor.stop(timeout=0.05)
+    assert not supervisor.start()
+    assert sum(t.name == 'camera-supervisor' for t in threading.enumerate()) == 1
+
+    release.set()
+    _wait_for(lambda: supervisor._thread is None or not supervisor._thread.is_alive())
+    assert opened[0].released
+    assert supervisor.start()
+    assert supervisor.wait_connected(5)
+    assert supervisor.stop()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+ทดสอบฟังก์ชันเวกเตอร์แบบรวมชุดของ MANTA
+(Tests for MANTA batched vector utilities)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.vector_utils import (normalize_rows, pairwise_cosine, pairwise_euclidean, threshold_match,
+                                top_k)
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float16, np.int8])
+def test_pairwise_matches_reference(dtype):
+    rng = np.random.default_rng(0)
+    a = (rng.standard_normal((7, 12)) * 20).astype(dtype)
+    b = (rng.standard_normal((5, 12)) * 20).astype(dtype)
+    a64, b64 = a.astype(np.float64), b.astype(np.float64)
+
+    expected = (a64 @ b64.T) / np.outer(np.linalg.norm(a64, axis=1), np.linalg.norm(b64, axis=1))
+    out = np.empty((7, 5), dtype=np.float32)
+    assert pairwise_cosine(a, b, out=out) is out
+    np.testing.assert_allclose(out, expected, atol=1e-5)
+
+    distance = np.linalg.norm(a64[:, None] - b64[None], axis=2)
+    np.testing.assert_allclose(pairwise_euclidean(a, b), distance, rtol=1e-4)
+    np.testing.assert_allclose(pairwise_euclidean(a, b, squared=True), distance ** 2, rtol=1e-4)
+    with pytest.raises(ValueError):
+        pairwise_cosine(a, b, out=np.empty((5, 7), dtype=np.float32))
+
+
+def test_normalize_rows_in_place():
+    vectors = np.array([[3.0, 4.0], [0.0, 0.0]], dtype=np.float32)
+    assert normalize_rows(vectors) is vectors
+    np.testing.assert_allclose(vectors, [[0.6, 0.8], [0.0, 0.0]])
+
+    quantized = np.array([[3, 4]], dtype=np.int8)
+    np.testing.assert_allclose(normalize_rows(quantized), [[0.6, 0.8]])
+    assert quantized.tolist() == [[3, 4]]
+
+
+def test_top_k_sorted_and_padded():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7], [0.3, 0.2, 0.8, 0.0]], dtype=np.float32)
+    values, indices = top_k(scores, 2)
+    assert indices.tolist() == [[1, 3], [2, 0]]
+    np.testing.assert_allclose(values, [[0.9, 0.7], [0.8, 0.3]])
+
+    _, indices = top_k(scores, 1, largest=False)
+    assert indices.tolist() == [[0], [3]]
+
+    values, indices = top_k(scores[:, :2], 3)
+    assert indices.tolist() == [[1, 0, -1], [0, 1, -1]]
+    assert np.isneginf(values[:, 2]).all()
+
+
+def test_threshold_match_greedy_and_hungarian():
+    scores = np.array([[0.9, 0.8],
+                       [0.85, 0.1]], dtype=np.float32)
+    # Greedy takes the single best pair first; Hungarian maximizes the total
+    assert threshold_match(scores, 0.5) == [(0, 0)]
+    assert threshold_match(scores, 0.5, method='hungarian') == [(0, 1), (1, 0)]
+
+    distance = np.array([[0.1, 0.3], [0.05, 0.5]], dtype=np.float32)
+    assert threshold_match(distance, 0.2, largest=False) == [(1, 0)]
+    assert threshold_match(np.empty((0, 3)), 0.5) == []
+    with pytest.raises(ValueError):
+        threshold_match(scores, 0.5, method='auction')
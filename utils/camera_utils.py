@@ -5,9 +5,13 @@
 
 รองรับทั้งกล้อง Raspberry Pi Camera Module และกล้อง USB แบบทั่วไป
 เหมาะสำหรับการใช้งานกับ Raspberry Pi 5 Model B
+
+PiCameraSource ใช้ picamera2 (libcamera) คัดลอกเฟรม BGR หรือ YUV420 ลงบัฟเฟอร์ที่จัดสรรไว้ล่วงหน้า
+โดยไม่เข้ารหัส/ถอดรหัส JPEG
 """
 
 import cv2
+import numpy as np
 from typing import Union, Tuple, Optional
 
 def setup_camera(source: Union[int, str], width: int = 640, height: int = 480, fps: int = 30) -> cv2.VideoCapture:
@@ -139,3 +143,443 @@ def create_pi_camera_video_stream(resolution: Tuple[int, int] = (640, 480),
         return camera, raw_capture
     except ImportError:
         raise ImportError("picamera module not found. Please install it with: pip install picamera[array]")
+
+# Output formats of PiCameraSource -> libcamera pixel formats.
+# picamera2's 'RGB888' is stored B, G, R in memory, i.e. OpenCV's BGR order.
+PICAMERA_FORMATS = {
+    'bgr': 'RGB888',
+    'yuv420': 'YUV420',
+}
+
+def _copy_frame(source: np.ndarray, stride: int, target: np.ndarray, format: str,
+                width: int, height: int) -> None:
+    """Copy a mapped camera buffer into `target`, dropping any row padding."""
+    if format == 'RGB888':
+        np.copyto(target, source[:height, :width])
+        return
+    # I420 planes with a padded stride: Y is (H, stride), U and V are (H/2, stride/2) each
+    flat, out = source.reshape(-1), target.reshape(-1)
+    y_size, chroma_size = height * stride, (height // 2) * (stride // 2)
+    out[:width * height].reshape(height, width)[:] = flat[:y_size].reshape(height, stride)[:, :width]
+    for plane in range(2):
+        start = y_size + plane * chroma_size
+        target_start = width * height + plane * (width // 2) * (height // 2)
+        out[target_start:target_start + (width // 2) * (height // 2)].reshape(height // 2, width // 2)[:] = \
+            flat[start:start + chroma_size].reshape(height // 2, stride // 2)[:, :width // 2]
+
+class YUVFrame:
+    """
+    A camera frame kept in its native planar YUV 4:2:0 (I420) layout.
+    
+    `gray` is the Y plane itself (no conversion). `bgr` and `rgb` are converted
+    on first access and cached, so each is computed at most once per frame.
+    Every conversion is reported to `YUVFrame.listener(format)` if set
+    (e.g. a metrics counter).
+    """
+    
+    __slots__ = ('i420', 'shape', '_bgr', '_rgb')
+    
+    # Called with 'bgr' or 'rgb' after each conversion
+    listener = None
+    
+    def __init__(self, i420: np.ndarray):
+        """
+        Args:
+            i420: (H * 3/2, W) uint8 buffer: Y plane, then U and V at half resolution
+        """
+        self.i420 = i420
+        self.shape = (i420.shape[0] * 2 // 3, i420.shape[1], 3)
+        self._bgr = None
+        self._rgb = None
+    
+    def _convert(self, code: int, format: str) -> np.ndarray:
+        image = cv2.cvtColor(self.i420, code)
+        if YUVFrame.listener is not None:
+            YUVFrame.listener(format)
+        return image
+    
+    @property
+    def gray(self) -> np.ndarray:
+        """Luma plane as an (H, W) view."""
+        return self.i420[:self.shape[0]]
+    
+    @property
+    def bgr(self) -> np.ndarray:
+        if self._bgr is None:
+            self._bgr = self._convert(cv2.COLOR_YUV2BGR_I420, 'bgr')
+        return self._bgr
+    
+    @property
+    def rgb(self) -> np.ndarray:
+        if self._rgb is None:
+            self._rgb = self._convert(cv2.COLOR_YUV2RGB_I420, 'rgb')
+        return self._rgb
+    
+    @property
+    def has_bgr(self) -> bool:
+        return self._bgr is not None
+
+def as_bgr(frame):
+    """BGR pixels of an ndarray or YUVFrame (converted once for a YUVFrame)."""
+    return frame.bgr if isinstance(frame, YUVFrame) else frame
+
+class DualStreamFrame:
+    """
+    A small inference frame plus the full-resolution frame, fetched lazily.
+    
+    Detection runs on `low`; only person/face crops touch `full`, which is
+    materialized on first access (at most once). `shape` is the full-resolution
+    shape, so tracking and zones work in full-frame coordinates without it.
+    """
+    
+    __slots__ = ('low', 'shape', 'scale', '_full', '_loader')
+    
+    def __init__(self, low, shape: Tuple[int, ...], full=None, loader=None):
+        """
+        Args:
+            low: Inference frame (BGR ndarray or YUVFrame)
+            shape: Shape of the full-resolution frame
+            full: The full-resolution frame (ndarray or YUVFrame), if already available
+            loader: Callable producing the full-resolution frame on demand
+        """
+        self.low = low
+        self.shape = tuple(shape)
+        self.scale = (shape[1] / float(low.shape[1]), shape[0] / float(low.shape[0]))
+        self._full = full
+        self._loader = loader
+    
+    @property
+    def full(self):
+        if self._full is None:
+            if self._loader is None:
+                raise RuntimeError("Full-resolution frame is no longer available")
+            self._full, self._loader = self._loader(), None
+        return self._full
+    
+    @property
+    def full_loaded(self) -> bool:
+        return self._full is not None
+    
+    def expire(self) -> None:
+        """Drop the loader once the camera buffer behind it has been recycled."""
+        self._loader = None
+    
+    def to_full(self, detection: Tuple) -> Tuple:
+        """Scale a detection (x1, y1, x2, y2, ...) from `low` to full-resolution coordinates."""
+        sx, sy = self.scale
+        x1, y1, x2, y2 = detection[:4]
+        return (x1 * sx, y1 * sy, x2 * sx, y2 * sy) + tuple(detection[4:])
+
+class PiCameraSource:
+    """
+    Raspberry Pi camera source using the picamera2 (libcamera) API.
+    
+    Frames are copied once from the camera's DMA buffer straight into a
+    preallocated NumPy array (no JPEG encode/decode, no per-frame allocation).
+    read() returns the same arrays in rotation, so a frame stays valid until
+    `buffers` more frames have been read; copy it if it must live longer.
+    With format 'yuv420' frames are YUVFrames (BGR/RGB converted only on use).
+    
+    With `lores_size` the ISP also scales the image to a second, low-resolution
+    stream: read() then returns a DualStreamFrame whose full-resolution pixels
+    are only copied if they are used before the next read.
+    
+    Exposes the subset of the cv2.VideoCapture interface used by the frame loop.
+    """
+    
+    def __init__(self, width: int = 640, height: int = 480, fps: int = 30,
+                 format: str = 'bgr', buffers: int = 2, backend: Optional[str] = None,
+                 lores_size: Optional[Tuple[int, int]] = None):
+        """
+        Start the camera.
+        
+        Args:
+            width: Frame width (may be adjusted to the sensor's alignment)
+            height: Frame height
+            fps: Frames per second
+            format: 'bgr' ((H, W, 3) uint8 arrays) or 'yuv420' (YUVFrames over I420 buffers)
+            buffers: Number of output arrays used in rotation
+            backend: None for picamera2, or 'mock' for synthetic frames on non-Pi machines
+            lores_size: (width, height) of the inference stream (None = main stream only)
+        """
+        if format not in PICAMERA_FORMATS:
+            raise ValueError(f"Unsupported picamera format: {format}")
+        if backend == 'mock':
+            self.camera, self._mapped_array = MockPicamera2(), _MockMappedArray
+        else:
+            try:
+                from picamera2 import Picamera2, MappedArray
+            except ImportError:
+                raise ImportError("picamera2 module not found. Please install it with: sudo apt install python3-picamera2")
+            self.camera, self._mapped_array = Picamera2(), MappedArray
+        
+        # The low-resolution stream is YUV420 (the only lores format on Pi 4)
+        streams = {'main': {'size': (width, height), 'format': PICAMERA_FORMATS[format]}}
+        if lores_size:
+            streams['lores'] = {'size': tuple(lores_size), 'format': 'YUV420'}
+        config = self.camera.create_video_configuration(
+            controls={'FrameRate': fps}, buffer_count=4, **streams)
+        self.camera.align_configuration(config)
+        self.camera.configure(config)
+        
+        self.format = format
+        self.width, self.height = config['main']['size']
+        shape = (self.height, self.width, 3) if format == 'bgr' else (self.height * 3 // 2, self.width)
+        self._buffers = [np.empty(shape, dtype=np.uint8) for _ in range(max(1, buffers))]
+        self._next = 0
+        
+        self.lores_size = config['lores']['size'] if lores_size else None
+        self._held = None  # (request, DualStreamFrame) whose main buffer is still mapped
+        if self.lores_size:
+            lores_width, lores_height = self.lores_size
+            self._lores_buffers = [np.empty((lores_height * 3 // 2, lores_width), dtype=np.uint8)
+                                   for _ in range(max(1, buffers))]
+        
+        self.camera.start()
+        self._opened = True
+    
+    def isOpened(self) -> bool:
+        return self._opened
+    
+    def _copy(self, request, stream: str, target: np.ndarray) -> None:
+        config = request.config[stream]
+        width, height = config['size']
+        with self._mapped_array(request, stream) as mapped:
+            _copy_frame(mapped.array, config['stride'], target, config['format'], width, height)
+    
+    def _wrap(self, buffer: np.ndarray):
+        return YUVFrame(buffer) if self.format == 'yuv420' else buffer
+    
+    def _release_held(self) -> None:
+        if self._held is not None:
+            request, frame = self._held
+            self._held = None
+            frame.expire()
+            request.release()
+    
+    def read(self) -> Tuple[bool, Optional[Union[np.ndarray, DualStreamFrame]]]:
+        """
+        Capture the next frame.
+        
+        Returns:
+            Tuple of (success, frame); the frame (ndarray, YUVFrame, or DualStreamFrame
+            with lores_size) reuses arrays of earlier reads
+        """
+        if not self._opened:
+            return False, None
+        self._release_held()
+        target = self._buffers[self._next]
+        try:
+            request = self.camera.capture_request()
+        except Exception as e:
+            print(f"Error capturing frame: {e}")
+            return False, None
+        
+        try:
+            if self.lores_size:
+                low = self._lores_buffers[self._next]
+                self._copy(request, 'lores', low)
+                
+                def load_full(request=request, target=target):
+                    self._copy(request, 'main', target)
+                    return self._wrap(target)
+                
+                frame = DualStreamFrame(YUVFrame(low), (self.height, self.width, 3), loader=load_full)
+                self._held = (request, frame)
+                request = None
+            else:
+                self._copy(request, 'main', target)
+                frame = self._wrap(target)
+        except Exception as e:
+            print(f"Error capturing frame: {e}")
+            return False, None
+        finally:
+            if request is not None:
+                request.release()
+        self._next = (self._next + 1) % len(self._buffers)
+        return True, frame
+    
+    def release(self) -> None:
+        if self._opened:
+            self._opened = False
+            self._release_held()
+            self.camera.stop()
+            self.camera.close()
+
+class DualStreamSource:
+    """
+    Dual-stream capture for sources without a hardware scaler: wraps a
+    cv2.VideoCapture-like source and returns DualStreamFrames whose inference
+    frame is resized once into a reused buffer (the full frame is the decoded one).
+    """
+    
+    def __init__(self, source, inference_size: Tuple[int, int]):
+        """
+        Args:
+            source: Object with read() -> (ret, frame)
+            inference_size: (width, height) of the inference frame
+        """
+        self.source = source
+        self.inference_size = tuple(inference_size)
+        self._low = np.empty((self.inference_size[1], self.inference_size[0], 3), dtype=np.uint8)
+    
+    def read(self) -> Tuple[bool, Optional[DualStreamFrame]]:
+        ret, frame = self.source.read()
+        if not ret or frame is None:
+            return ret, None
+        if frame.shape[:2] == self._low.shape[:2]:
+            return ret, DualStreamFrame(frame, frame.shape, full=frame)
+        cv2.resize(frame, self.inference_size, dst=self._low, interpolation=cv2.INTER_LINEAR)
+        return ret, DualStreamFrame(self._low, frame.shape, full=frame)
+    
+    def __getattr__(self, name):
+        # isOpened(), release(), get(), ... of the wrapped source
+        return getattr(self.source, name)
+
+class MockPicamera2:
+    """
+    Stand-in for picamera2.Picamera2 on machines without a Pi camera.
+    
+    Produces a moving gradient with padded row strides, like the real ISP output.
+    """
+    
+    STRIDE_ALIGN = 64
+    
+    def __init__(self):
+        self.config = None
+        self.started = False
+        self.frame_count = 0
+        self.outstanding = 0  # Captured requests not yet released
+    
+    def create_video_configuration(self, main=None, lores=None, controls=None, buffer_count=4):
+        config = {'main': dict(main), 'controls': dict(controls or {}), 'buffer_count': buffer_count}
+        if lores is not None:
+            config['lores'] = dict(lores)
+        return config
+    
+    def align_configuration(self, config):
+        for stream in ('main', 'lores'):
+            if stream in config:
+                width, height = config[stream]['size']
+                config[stream]['size'] = (width - width % 2, height - height % 2)
+    
+    def configure(self, config):
+        for stream in ('main', 'lores'):
+            if stream in config:
+                width = config[stream]['size'][0]
+                row = width * 3 if config[stream]['format'] == 'RGB888' else width
+                config[stream]['stride'] = -(-row // self.STRIDE_ALIGN) * self.STRIDE_ALIGN
+        self.config = config
+    
+    def start(self):
+        self.started = True
+    
+    def stop(self):
+        self.started = False
+    
+    def close(self):
+        self.config = None
+    
+    def capture_request(self):
+        if not self.started:
+            raise RuntimeError("Camera is not started")
+        if self.outstanding >= self.config['buffer_count']:
+            raise RuntimeError("All camera buffers are held by the application")
+        self.frame_count += 1
+        self.outstanding += 1
+        return _MockRequest(self, self.frame_count)
+
+def _mock_layout(bgr: np.ndarray, format: str, stride: int) -> np.ndarray:
+    """Lay out a BGR image the way libcamera fills a buffer of `format` with `stride`."""
+    height, width = bgr.shape[:2]
+    if format == 'RGB888':
+        buffer = np.zeros((height, stride), dtype=np.uint8)
+        buffer[:, :width * 3] = bgr.reshape(height, -1)
+        return buffer
+    i420 = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420).reshape(-1)
+    planes = (i420[:width * height].reshape(height, width),
+              i420[width * height:width * height * 5 // 4].reshape(height // 2, width // 2),
+              i420[width * height * 5 // 4:].reshape(height // 2, width // 2))
+    padded = [np.zeros((height, stride), dtype=np.uint8),
+              np.zeros((height // 2, stride // 2), dtype=np.uint8),
+              np.zeros((height // 2, stride // 2), dtype=np.uint8)]
+    for plane, target in zip(planes, padded):
+        target[:, :plane.shape[1]] = plane
+    return np.concatenate([p.reshape(-1) for p in padded]).reshape(height * 3 // 2, stride)
+
+class _MockRequest:
+    """Completed request holding one synthetic frame per stream in the camera's memory layout."""
+    
+    def __init__(self, camera, index):
+        self.camera = camera
+        self.config = camera.config
+        width, height = self.config['main']['size']
+        x = (np.arange(width) + 4 * index) % 256
+        bgr = np.empty((height, width, 3), dtype=np.uint8)
+        bgr[..., 0] = x
+        bgr[..., 1] = np.arange(height)[:, None] % 256
+        bgr[..., 2] = index % 256
+        self.bgr = bgr
+        self.buffers = {'main': _mock_layout(bgr, self.config['main']['format'], self.config['main']['stride'])}
+        if 'lores' in self.config:
+            lores = self.config['lores']
+            small = cv2.resize(bgr, lores['size'], interpolation=cv2.INTER_AREA)
+            self.buffers['lores'] = _mock_layout(small, lores['format'], lores['stride'])
+        self.released = False
+    
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.camera.outstanding -= 1
+
+class _MockMappedArray:
+    """Context manager exposing a request's buffer like picamera2.MappedArray."""
+    
+    def __init__(self, request, stream):
+        self.request = request
+        self.stream = stream
+    
+    def __enter__(self):
+        if self.request.released:
+            raise RuntimeError("Request has been released")
+        config = self.request.config[self.stream]
+        width, height = config['size']
+        buffer = self.request.buffers[self.stream]
+        if config['format'] == 'RGB888':
+            self.array = buffer[:, :width * 3].reshape(height, width, 3)
+        else:
+            self.array = buffer
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+def create_camera_source(camera_config: dict):
+    """
+    Open the camera described by the `camera` config section.
+    
+    With `prefer_picamera` the picamera2 source is used when available
+    (`picamera_backend: mock` forces the synthetic backend); otherwise, or if
+    picamera2 is not installed, an OpenCV VideoCapture is opened.
+    With `inference_size` frames are DualStreamFrames: the ISP's second stream
+    on picamera2, a cached resize otherwise. `picamera_format: yuv420` keeps
+    picamera2 frames in YUV (YUVFrame).
+    
+    Args:
+        camera_config: The `camera` section of the configuration
+        
+    Returns:
+        PiCameraSource, DualStreamSource or cv2.VideoCapture
+    """
+    resolution = camera_config.get('resolution', {})
+    width, height = resolution.get('width', 640), resolution.get('height', 480)
+    fps = camera_config.get('fps', 30)
+    inference_size = camera_config.get('inference_size')
+    if camera_config.get('prefer_picamera'):
+        try:
+            return PiCameraSource(width, height, fps, format=camera_config.get('picamera_format', 'bgr'),
+                                  backend=camera_config.get('picamera_backend'), lores_size=inference_size)
+        except ImportError as e:
+            print(f"Warning: {e}; falling back to OpenCV capture")
+    camera = setup_camera(camera_config.get('source', 0), width, height, fps)
+    return DualStreamSource(camera, inference_size) if inference_size else camera
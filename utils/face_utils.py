@@ -13,6 +13,8 @@ import time
 import uuid
 from typing import List, Tuple, Optional, Union, Dict, Any
 
+from utils.camera_utils import YUVFrame, as_bgr
+
 class FaceDetector:
     """
     ตัวตรวจจับใบหน้าโดยใช้ OpenCV
@@ -67,7 +69,7 @@ class FaceDetector:
         ตรวจจับใบหน้าในเฟรม
         
         Args:
-            frame: ภาพนำเข้า (รูปแบบ BGR)
+            frame: ภาพนำเข้า (รูปแบบ BGR หรือภาพขาวดำสำหรับ Haar Cascade)
             
         Returns:
             รายการใบหน้าที่ตรวจพบในรูปแบบ [x, y, width, height, confidence]
@@ -116,8 +118,8 @@ class FaceDetector:
         
         # ใช้ Haar Cascade ในการตรวจจับ (เร็วกว่า แต่แม่นยำน้อยกว่า)
         else:
-            # แปลงเป็นภาพขาวดำเพื่อประสิทธิภาพที่ดีขึ้น
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # แปลงเป็นภาพขาวดำเพื่อประสิทธิภาพที่ดีขึ้น (ภาพขาวดำ เช่น ระนาบ Y ใช้ได้ทันที)
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
             # ตรวจจับใบหน้า
             face_rects = self.face_cascade.detectMultiScale(
@@ -168,16 +170,19 @@ class FaceDetector:
         return face_img
     
     def process_person_for_faces(self, frame: np.ndarray, 
-                                 person_box: Tuple[float, float, float, float, float, int]) -> List[np.ndarray]:
+                                 person_box: Tuple[float, float, float, float, float, int],
+                                 return_boxes: bool = False):
         """
         ประมวลผลคนที่ตรวจจับได้เพื่อหาใบหน้า
         
         Args:
-            frame: ภาพต้นฉบับ
+            frame: ภาพต้นฉบับ (BGR หรือ YUVFrame: Haar Cascade ใช้ระนาบ Y โดยไม่แปลงสี)
             person_box: กรอบคนที่ตรวจจับได้ [x1, y1, x2, y2, confidence, class_id]
+            return_boxes: ส่งคืนกรอบใบหน้าด้วย (ไม่ต้องตรวจจับซ้ำเพื่อวาดกรอบ)
             
         Returns:
-            รายการภาพใบหน้าที่ตัดแล้ว
+            รายการภาพใบหน้าที่ตัดแล้ว หรือ (รายการภาพใบหน้า, รายการกรอบ [x, y, w, h, confidence]
+            ในพิกัดของภาพต้นฉบับ) ถ้า return_boxes เป็น True
         """
         # ตัดเฉพาะส่วนของคน
         x1, y1, x2, y2, _, _ = person_box
@@ -190,21 +195,28 @@ class FaceDetector:
         y2 = min(height, y2)
         
         if x1 >= x2 or y1 >= y2:
-            return []
+            return ([], []) if return_boxes else []
         
-        person_img = frame[y1:y2, x1:x2]
-        
-        # ตรวจจับใบหน้าในส่วนของคน
-        faces = self.detect_faces(person_img)
+        # ตรวจจับใบหน้าในส่วนของคน (Haar Cascade บน YUVFrame ใช้ระนาบ Y โดยไม่แปลงสี)
+        if isinstance(frame, YUVFrame) and not self.use_dnn:
+            faces = self.detect_faces(frame.gray[y1:y2, x1:x2])
+        else:
+            faces = self.detect_faces(as_bgr(frame)[y1:y2, x1:x2])
+        if not faces:
+            return ([], []) if return_boxes else []
+        person_img = as_bgr(frame)[y1:y2, x1:x2]
         
         # ตัดใบหน้า
         cropped_faces = []
+        face_boxes = []
         for face in faces:
             face_img = self.crop_face(person_img, face)
             if face_img.size > 0:
                 cropped_faces.append(face_img)
+                fx, fy, fw, fh, confidence = face
+                face_boxes.append((x1 + fx, y1 + fy, fw, fh, confidence))
         
-        return cropped_faces
+        return (cropped_faces, face_boxes) if return_boxes else cropped_faces
 
 
 class FaceDataManager:
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+ซองข้อมูลเฟรมพร้อมเวลาจับภาพและหมายเลขลำดับสำหรับระบบ MANTA
+(Frame metadata envelope with capture timestamps and sequence numbers for MANTA system)
+
+แต่ละเฟรมที่อ่านจากกล้องถูกห่อด้วย FrameEnvelope ซึ่งเก็บรหัสแหล่งภาพ หมายเลขลำดับ
+เวลาจับภาพ (monotonic และเวลาจริง) และเวลาที่ใช้ในแต่ละขั้นตอน ทำให้วัดเฟรมที่หลุด
+ความหน่วงตั้งแต่จับภาพจนประมวลผลเสร็จ และเวลาของเหตุการณ์ที่แม่นยำได้
+"""
+
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class _EnvelopeTimer:
+    """Context manager returned by FrameEnvelope.measure()."""
+
+    __slots__ = ('_envelope', '_stage', '_start')
+
+    def __init__(self, envelope: 'FrameEnvelope', stage: str):
+        self._envelope = envelope
+        self._stage = stage
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._envelope.record(self._stage, time.perf_counter() - self._start)
+        return False
+
+
+class FrameEnvelope:
+    """
+    เฟรมหนึ่งเฟรมพร้อมเมทาดาต้า ใช้แทนตัวจับเวลา (timer) ของไปป์ไลน์ได้โดยตรง:
+    measure(stage) บันทึกเวลาลงใน timings และส่งต่อให้ PipelineMetrics ถ้ามี
+    """
+
+    __slots__ = ('frame', 'source_id', 'seq', 'captured_mono', 'captured_wall', 'timings', 'timer')
+
+    def __init__(self, frame, source_id: str, seq: int, captured_mono: float, captured_wall: float,
+                 timer=None):
+        """
+        Args:
+            frame: เฟรมภาพ (numpy.ndarray, YUVFrame หรือ DualStreamFrame)
+            source_id: รหัสกล้อง
+            seq: หมายเลขลำดับของเฟรมจากแหล่งภาพ
+            captured_mono: เวลาจับภาพแบบ monotonic (วินาที) สำหรับคำนวณความหน่วง
+            captured_wall: เวลาจับภาพแบบ epoch (วินาที) สำหรับเวลาของเหตุการณ์
+            timer: ตัวรับเวลาของแต่ละขั้นตอน (มีเมธอด observe(stage, seconds)) เช่น PipelineMetrics
+        """
+        self.frame = frame
+        self.source_id = source_id
+        self.seq = seq
+        self.captured_mono = captured_mono
+        self.captured_wall = captured_wall
+        self.timings: Dict[str, float] = {}
+        self.timer = timer
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """รูปร่างของเฟรม (สูง, กว้าง, ช่องสี)"""
+        return self.frame.shape
+
+    def measure(self, stage: str) -> _EnvelopeTimer:
+        """
+        Context manager that times a pipeline stage for this frame.
+
+        Args:
+            stage: Stage name ('detect', 'reid', 'face', 'track', ...)
+        """
+        return _EnvelopeTimer(self, stage)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        บันทึกเวลาของขั้นตอน (รวมกันถ้าขั้นตอนเดียวกันเกิดหลายครั้งในเฟรม) และส่งต่อให้ timer
+
+        Args:
+            stage: ชื่อขั้นตอน
+            seconds: เวลาที่ใช้ (วินาที)
+        """
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        if self.timer is not None:
+            self.timer.observe(stage, seconds)
+
+    def latency(self, now_mono: float) -> float:
+        """
+        ความหน่วงตั้งแต่จับภาพ
+
+        Args:
+            now_mono: เวลา monotonic ปัจจุบัน (จากนาฬิกาเดียวกับ captured_mono)
+
+        Returns:
+            float: วินาทีนับจากจับภาพ
+        """
+        return now_mono - self.captured_mono
+
+    def __repr__(self) -> str:
+        return (f"FrameEnvelope(source_id={self.source_id!r}, seq={self.seq}, "
+                f"captured_wall={self.captured_wall:.3f}, timings={self.timings})")
+
+
+class FrameStamper:
+    """
+    ห่อเฟรมของแหล่งภาพหนึ่งแหล่งด้วย FrameEnvelope และนับเฟรมที่หลุดจากช่องว่างของหมายเลขลำดับ
+    """
+
+    def __init__(self, source_id: str, clock=None, timer=None,
+                 on_missed: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            source_id: รหัสกล้อง
+            clock: นาฬิกาที่มี monotonic() และ time() (SystemClock หรือ VirtualClock ในโหมดเล่นซ้ำ)
+            timer: ส่งต่อให้ FrameEnvelope แต่ละเฟรม (เช่น PipelineMetrics)
+            on_missed: เรียกด้วยจำนวนเฟรมที่จับภาพแล้วแต่ไม่ได้ประมวลผล (ถูกแทนที่ด้วยเฟรมใหม่กว่า)
+        """
+        self.source_id = source_id
+        self.clock = clock
+        self.timer = timer
+        self.on_missed = on_missed
+        self.last_seq: Optional[int] = None
+        self.missed = 0
+
+    def wrap(self, frame, capture: Optional[Tuple[int, float, float]] = None) -> FrameEnvelope:
+        """
+        ห่อเฟรมที่เพิ่งอ่านได้
+
+        Args:
+            frame: เฟรมภาพ
+            capture: (seq, monotonic, wall) ที่แหล่งภาพบันทึกไว้ตอนจับภาพ (เช่น WebcamConnection.last_capture)
+                     ถ้าไม่มี ใช้หมายเลขถัดไปและเวลาปัจจุบันของนาฬิกา
+
+        Returns:
+            FrameEnvelope: ซองข้อมูลของเฟรม
+        """
+        if capture is not None:
+            seq, captured_mono, captured_wall = capture
+        else:
+            seq = 0 if self.last_seq is None else self.last_seq + 1
+            if self.clock is not None:
+                captured_mono, captured_wall = self.clock.monotonic(), self.clock.time()
+            else:
+                captured_mono, captured_wall = time.monotonic(), time.time()
+
+        if self.last_seq is not None and seq > self.last_seq + 1:
+            gap = seq - self.last_seq - 1
+            self.missed += gap
+            if self.on_missed is not None:
+                self.on_missed(gap)
+        self.last_seq = seq
+        return FrameEnvelope(frame, self.source_id, seq, captured_mono, captured_wall, self.timer)
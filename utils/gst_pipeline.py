@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+ตัวสร้างไปป์ไลน์ GStreamer สำหรับถอดรหัสวิดีโอของระบบ MANTA
+(GStreamer decode pipeline builder for MANTA system)
+
+สร้างสตริง launch สำหรับ cv2.VideoCapture(..., cv2.CAP_GSTREAMER) จากแหล่ง RTMP/RTSP/ไฟล์/videotestsrc
+ถอดรหัส H.264/H.265 ด้วยฮาร์ดแวร์ (v4l2, vaapi, nvv4l2) หรือซอฟต์แวร์ (avdec) ย่อขนาดที่ฝั่งตัวถอดรหัส
+และส่งออกผ่าน `appsink drop=true max-buffers=1` เพื่อให้ได้เฟรมล่าสุดเสมอ
+
+รัน `python -m utils.gst_pipeline SOURCE` เพื่อวัด FPS การถอดรหัสและการใช้ CPU ของแต่ละตัวถอดรหัส
+"""
+
+import argparse
+import shutil
+import subprocess
+import time
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+
+CODECS = ('h264', 'h265')
+
+# Decoder element and decoder-side scaler of each backend
+DECODERS = {
+    'v4l2': {'h264': 'v4l2h264dec', 'h265': 'v4l2slh265dec', 'scale': 'v4l2convert'},
+    'vaapi': {'h264': 'vaapih264dec', 'h265': 'vaapih265dec', 'scale': 'vaapipostproc'},
+    'nvv4l2': {'h264': 'nvv4l2decoder', 'h265': 'nvv4l2decoder', 'scale': 'nvvidconv'},
+    'software': {'h264': 'avdec_h264', 'h265': 'avdec_h265', 'scale': 'videoscale'},
+}
+
+# Order tried by candidate_pipelines() when hardware decoding is requested
+DEFAULT_DECODERS = ('v4l2', 'vaapi', 'nvv4l2', 'software')
+
+OUTPUT_FORMATS = ('BGR', 'I420')
+
+# Synthetic sources produce raw video, so there is nothing to decode
+TEST_SOURCES = ('videotestsrc', 'test')
+
+_APPSINK = 'appsink drop=true max-buffers=1 sync=false'
+
+
+def gstreamer_available() -> bool:
+    """OpenCV ถูกคอมไพล์พร้อม GStreamer หรือไม่"""
+    for line in cv2.getBuildInformation().splitlines():
+        if line.strip().startswith('GStreamer:'):
+            return 'YES' in line
+    return False
+
+
+def element_available(element: str) -> bool:
+    """
+    ตรวจสอบว่ามีปลั๊กอิน GStreamer ที่ระบุหรือไม่ (ใช้ gst-inspect-1.0)
+
+    Returns:
+        bool: True ถ้ามี หรือถ้าไม่มี gst-inspect-1.0 ให้ตรวจสอบ (ให้การเปิดไปป์ไลน์เป็นตัวตัดสิน)
+    """
+    if shutil.which('gst-inspect-1.0') is None:
+        return True
+    try:
+        return subprocess.run(['gst-inspect-1.0', '--exists', element], timeout=5).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return True
+
+
+def _source_elements(source: str, codec: str, latency: int) -> List[str]:
+    """Elements from the source up to the parsed (still encoded) stream."""
+    depay = 'rtph264depay' if codec == 'h264' else 'rtph265depay'
+    parse = 'h264parse' if codec == 'h264' else 'h265parse'
+    if source.startswith(('rtsp://', 'rtsps://')):
+        return [f'rtspsrc location={source} latency={latency} protocols=tcp', depay, parse]
+    if source.startswith(('rtmp://', 'rtmps://')):
+        return [f'rtmpsrc location={source}', 'flvdemux', parse]
+    if source.endswith(('.h264', '.264', '.h265', '.265', '.hevc')):
+        return [f'filesrc location={source}', parse]
+    # Container files (mp4, mkv, ...) are demuxed automatically
+    return [f'filesrc location={source}', 'parsebin', parse]
+
+
+def build_pipeline(source: str, codec: str = 'h264', decoder: str = 'software',
+                   width: Optional[int] = None, height: Optional[int] = None,
+                   output_format: str = 'BGR', latency: int = 200, fps: int = 30) -> str:
+    """
+    สร้างสตริง launch ของ GStreamer สำหรับ cv2.VideoCapture(..., cv2.CAP_GSTREAMER)
+
+    Args:
+        source: rtsp://, rtmp://, พาธไฟล์ หรือ 'videotestsrc' (ภาพทดสอบ ไม่ต้องถอดรหัส)
+        codec: 'h264' หรือ 'h265'
+        decoder: ชนิดตัวถอดรหัสใน DECODERS ('v4l2', 'vaapi', 'nvv4l2', 'software')
+        width: ความกว้างที่ตัวถอดรหัสย่อให้ (None = ขนาดเดิม)
+        height: ความสูงที่ตัวถอดรหัสย่อให้ (None = ขนาดเดิม)
+        output_format: 'BGR' หรือ 'I420' (YUV สำหรับ YUVFrame)
+        latency: บัฟเฟอร์ของ RTSP (มิลลิวินาที)
+        fps: อัตราเฟรมของ videotestsrc
+
+    Returns:
+        str: สตริง launch ที่จบด้วย appsink
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported codec: {codec}")
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown decoder: {decoder}")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    size = f',width={width},height={height}' if width and height else ''
+
+    if source in TEST_SOURCES:
+        elements = ['videotestsrc is-live=true pattern=ball',
+                    f'video/x-raw,width={width or 1280},height={height or 720},framerate={fps}/1']
+    else:
+        elements = _source_elements(source, codec, latency)
+        elements.append(DECODERS[decoder][codec])
+        if size:
+            # Scale before colour conversion so videoconvert only touches the small frame
+            scaler = DECODERS[decoder]['scale']
+            if decoder == 'vaapi':
+                elements.append(f'{scaler} width={width} height={height}')
+            else:
+                elements.extend([scaler, f'video/x-raw{size}'])
+    elements.extend(['videoconvert', f'video/x-raw,format={output_format}', _APPSINK])
+    return ' ! '.join(elements)
+
+
+def candidate_pipelines(source: str, codec: str = 'h264', hardware: bool = True,
+                        decoders: Optional[Sequence[str]] = None, **options) -> List[Dict[str, str]]:
+    """
+    ไปป์ไลน์ที่จะลองตามลำดับ: ตัวถอดรหัสฮาร์ดแวร์ที่มีปลั๊กอิน แล้วจึงถอดรหัสด้วยซอฟต์แวร์
+
+    Args:
+        source: แหล่งวิดีโอ (ดู build_pipeline)
+        codec: 'h264' หรือ 'h265'
+        hardware: ลองตัวถอดรหัสฮาร์ดแวร์ก่อน
+        decoders: ลำดับตัวถอดรหัสที่จะลอง (None = DEFAULT_DECODERS)
+        **options: ส่งต่อให้ build_pipeline (width, height, output_format, latency)
+
+    Returns:
+        list: [{'decoder': ชื่อ, 'pipeline': สตริง launch}, ...] มี 'software' เป็นตัวสุดท้ายเสมอ
+    """
+    order = [d for d in (decoders or DEFAULT_DECODERS) if d != 'software']
+    if not hardware or source in TEST_SOURCES:
+        order = []
+    candidates = []
+    for decoder in order + ['software']:
+        if decoder != 'software' and not element_available(DECODERS[decoder][codec]):
+            continue
+        candidates.append({'decoder': decoder,
+                           'pipeline': build_pipeline(source, codec, decoder, **options)})
+    return candidates
+
+
+def open_capture(candidates: Sequence[Dict[str, str]], timeout: float = 10.0):
+    """
+    เปิด cv2.VideoCapture จากไปป์ไลน์แรกที่อ่านเฟรมได้
+
+    Args:
+        candidates: ผลลัพธ์จาก candidate_pipelines
+        timeout: เวลารอเฟรมแรกต่อไปป์ไลน์ (วินาที)
+
+    Returns:
+        tuple: (capture, decoder, first_frame) หรือ (None, None, None) ถ้าเปิดไม่ได้ทั้งหมด
+    """
+    for candidate in candidates:
+        capture = cv2.VideoCapture(candidate['pipeline'], cv2.CAP_GSTREAMER)
+        deadline = time.monotonic() + timeout
+        while capture.isOpened() and time.monotonic() < deadline:
+            ret, frame = capture.read()
+            if ret and frame is not None and frame.size > 0:
+                return capture, candidate['decoder'], frame
+            time.sleep(0.05)
+        capture.release()
+    return None, None, None
+
+
+def benchmark(source: str, codec: str = 'h264', frames: int = 300,
+              decoders: Optional[Sequence[str]] = None, **options) -> List[Dict[str, object]]:
+    """
+    วัด FPS การถอดรหัสและการใช้ CPU ของโปรเซส (รวมเธรดของ GStreamer) ของแต่ละตัวถอดรหัส
+
+    Args:
+        source: แหล่งวิดีโอ
+        codec: 'h264' หรือ 'h265'
+        frames: จำนวนเฟรมที่อ่านต่อตัวถอดรหัส
+        decoders: ตัวถอดรหัสที่จะวัด (None = DEFAULT_DECODERS)
+        **options: ส่งต่อให้ build_pipeline
+
+    Returns:
+        list: [{'decoder', 'opened', 'frames', 'fps', 'cpu_percent', 'pipeline'}, ...]
+    """
+    results = []
+    if source in TEST_SOURCES:
+        decoders = ['software']
+    for decoder in decoders or DEFAULT_DECODERS:
+        pipeline = build_pipeline(source, codec, decoder, **options)
+        result = {'decoder': decoder, 'opened': False, 'frames': 0, 'fps': 0.0,
+                  'cpu_percent': 0.0, 'pipeline': pipeline}
+        capture, _, _ = open_capture([{'decoder': decoder, 'pipeline': pipeline}])
+        if capture is not None:
+            wall, cpu = time.monotonic(), time.process_time()
+            count = 0
+            while count < frames:
+                ret, _ = capture.read()
+                if not ret:
+                    break
+                count += 1
+            wall, cpu = time.monotonic() - wall, time.process_time() - cpu
+            capture.release()
+            result.update(opened=True, frames=count, fps=count / wall if wall > 0 else 0.0,
+                          cpu_percent=100.0 * cpu / wall if wall > 0 else 0.0)
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='วัด FPS การถอดรหัสและการใช้ CPU ของไปป์ไลน์ GStreamer')
+    parser.add_argument('source', help='rtsp://, rtmp://, video file, or videotestsrc')
+    parser.add_argument('--codec', choices=CODECS, default='h264')
+    parser.add_argument('--decoders', nargs='+', choices=list(DECODERS), default=list(DEFAULT_DECODERS))
+    parser.add_argument('--width', type=int, help='Decoder-side output width')
+    parser.add_argument('--height', type=int, help='Decoder-side output height')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='BGR', help='appsink pixel format')
+    parser.add_argument('--frames', type=int, default=300, help='Frames to read per decoder')
+    args = parser.parse_args()
+
+    if not gstreamer_available():
+        parser.error("OpenCV was built without GStreamer support")
+    results = benchmark(args.source, args.codec, args.frames, args.decoders,
+                        width=args.width, height=args.height, output_format=args.format)
+    print(f"{'decoder':>9} {'frames':>7} {'fps':>8} {'cpu %':>7}")
+    for result in results:
+        if not result['opened']:
+            print(f"{result['decoder']:>9} {'unavailable':>24}")
+            continue
+        print(f"{result['decoder']:>9} {result['frames']:>7} {result['fps']:>8.1f} {result['cpu_percent']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+ตัวชี้วัดประสิทธิภาพของไปป์ไลน์สำหรับระบบ MANTA
+(Pipeline performance metrics for MANTA system)
+
+ฮิสโตแกรมความหน่วงของแต่ละขั้นตอน ตัวนับเฟรม และขนาดคิว
+แสดงผลในรูปแบบข้อความของ Prometheus ผ่านเส้นทาง /metrics ของเซิร์ฟเวอร์การกำหนดค่าระยะไกล
+"""
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond crops up to slow model loads
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                           0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a Prometheus label set such as {stage="detect"}."""
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                    for k, v in pairs)
+    return '{' + body + '}'
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects."""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing counter."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter by amount."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self._value)}"]
+
+
+class Gauge:
+    """Value that can go up and down, or be read from a callback at scrape time."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        """Set the gauge to value."""
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the gauge from function on every scrape (e.g. queue.qsize)."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return float('nan')
+        return self._value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self.value)}"]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    observe() is a bisect and two additions under a lock, so it is cheap
+    enough to call for every stage of every frame.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def samples(self, name: str, label_names: Sequence[str],
+                label_values: Sequence[str]) -> List[str]:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = _format_labels(label_names, label_values, ('le', _format_value(bound)))
+            lines.append(f"{name}_bucket{le} {cumulative}")
+        labels = _format_labels(label_names, label_values)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+
+class MetricFamily:
+    """
+    A named metric with optional labels; each label combination is a child
+    Counter, Gauge or Histogram.
+    """
+
+    TYPES = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}
+
+    def __init__(self, name: str, help_text: str, metric_type: str,
+                 label_names: Sequence[str] = (), **kwargs):
+        if metric_type not in self.TYPES:
+            raise ValueError(f"Unknown metric type: {metric_type}")
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.label_names = tuple(label_names)
+        self._kwargs = kwargs
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        """Get (or create) the child for a label combination."""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.label_names)
+        else:
+            values = tuple(str(v) for v in values)
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self.TYPES[self.metric_type](**self._kwargs)
+                    self._children[values] = child
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}",
+                 f"# TYPE {self.name} {self.metric_type}"]
+        for values, child in list(self._children.items()):
+            if self.metric_type == 'histogram':
+                lines.extend(child.samples(self.name, self.label_names, values))
+            else:
+                lines.extend(child.samples(self.name, _format_labels(self.label_names, values)))
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, help_text, metric_type, label_names, **kwargs) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(name, help_text, metric_type, label_names, **kwargs)
+                self._families[name] = family
+            elif family.metric_type != metric_type:
+                raise ValueError(f"Metric {name} already registered as {family.metric_type}")
+            return family
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        """Register a counter; returns the family if labelled, else the counter."""
+        family = self._register(name, help_text, 'counter', label_names)
+        return family if label_names else family.labels()
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        """Register a gauge; returns the family if labelled, else the gauge."""
+        family = self._register(name, help_text, 'gauge', label_names)
+        return family if label_names else family.labels()
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """Register a histogram; returns the family if labelled, else the histogram."""
+        family = self._register(name, help_text, 'histogram', label_names, buckets=buckets)
+        return family if label_names else family.labels()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for family in list(self._families.values()):
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+class _StageTimer:
+    """Context manager returned by PipelineMetrics.measure()."""
+
+    __slots__ = ('_metrics', '_stage', '_start')
+
+    def __init__(self, metrics: 'PipelineMetrics', stage: str):
+        self._metrics = metrics
+        self._stage = stage
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.observe(self._stage, time.perf_counter() - self._start)
+        return False
+
+
+class PipelineMetrics:
+    """
+    ตัวชี้วัดมาตรฐานของไปป์ไลน์ MANTA
+    (ความหน่วงของแต่ละขั้นตอน, เฟรม, การตรวจจับ, ขนาดคิวและงานอัปโหลดที่ค้าง)
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        """
+        สร้างตัวชี้วัดของไปป์ไลน์
+
+        Args:
+            registry: รีจิสทรีที่จะใช้ (ถ้าเป็น None จะสร้างใหม่)
+        """
+        self.registry = registry or MetricsRegistry()
+        self._listeners: List[Callable[[str, float], None]] = []
+        self._stage_children: Dict[str, Histogram] = {}
+
+        self.stage_latency = self.registry.histogram(
+            'manta_stage_latency_seconds', 'Time spent in each pipeline stage', ('stage',))
+        self.frames = self.registry.counter(
+            'manta_frames_total', 'Frames read from the camera')
+        self.frames_dropped = self.registry.counter(
+            'manta_frames_dropped_total', 'Frame reads that returned no frame')
+        self.frames_missed = self.registry.counter(
+            'manta_frames_missed_total', 'Captured frames replaced by a newer frame before processing')
+        self.frame_latency = self.registry.histogram(
+            'manta_frame_latency_seconds', 'Time from frame capture to the end of its processing')
+        self.frames_skipped = self.registry.counter(
+            'manta_frames_skipped_total', 'Frames skipped by detection.frame_skip')
+        self.detections = self.registry.counter(
+            'manta_detections_total', 'Person detections')
+        self.frame_conversions = self.registry.counter(
+            'manta_frame_conversions_total', 'Colour conversions of YUV camera frames', ('format',))
+        self.queue_depth = self.registry.gauge(
+            'manta_queue_depth', 'Items waiting in internal queues', ('queue',))
+        self.upload_backlog = self.registry.gauge(
+            'manta_upload_backlog', 'Records and files waiting to be uploaded')
+        self.started = self.registry.gauge(
+            'manta_start_time_seconds', 'Unix time the pipeline started')
+        self.started.set(time.time())
+
+        self._backlog_sources: List[Callable[[], int]] = []
+        self.upload_backlog.set_function(self._total_backlog)
+
+    def measure(self, stage: str) -> _StageTimer:
+        """
+        Context manager that times a pipeline stage.
+
+        Args:
+            stage: Stage name ('detect', 'reid', 'face', 'log', 'upload', ...)
+        """
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Record a stage latency and forward it to listeners.
+
+        Args:
+            stage: Stage name
+            seconds: Elapsed time in seconds
+        """
+        child = self._stage_children.get(stage)
+        if child is None:
+            child = self._stage_children[stage] = self.stage_latency.labels(stage)
+        child.observe(seconds)
+        for listener in self._listeners:
+            listener(stage, seconds)
+
+    def add_listener(self, listener: Callable[[str, float], None]) -> None:
+        """
+        Also send every stage sample to listener(stage, seconds),
+        e.g. BenchmarkReport.record in replay mode.
+        """
+        self._listeners.append(listener)
+
+    def track_queue(self, name: str, size_function: Callable[[], int],
+                    upload: bool = False) -> None:
+        """
+        Report the size of a queue on every scrape.
+
+        Args:
+            name: Queue label
+            size_function: Callable returning the current size (e.g. queue.qsize)
+            upload: Count this queue towards manta_upload_backlog
+        """
+        self.queue_depth.labels(name).set_function(size_function)
+        if upload:
+            self._backlog_sources.append(size_function)
+
+    def _total_backlog(self) -> int:
+        return sum(source() for source in self._backlog_sources)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        return self.registry.render()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+สตรีมภาพตัวอย่างแบบ MJPEG สำหรับระบบ MANTA
+(MJPEG live preview for MANTA system)
+
+เข้ารหัสเฟรมเป็น JPEG เฉพาะเมื่อมีผู้ชมอย่างน้อยหนึ่งราย ด้วยอัตราเฟรมที่จำกัด
+และแชร์ภาพที่เข้ารหัสแล้วหนึ่งภาพให้กับผู้ชมทุกราย
+"""
+
+import threading
+import time
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+MJPEG_BOUNDARY = 'frame'
+MJPEG_MIMETYPE = f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}'
+
+
+class PreviewBroadcaster:
+    """
+    กระจายภาพตัวอย่าง MJPEG ไปยังผู้ชมหลายราย
+
+    ลูปหลักเรียก publish() ทุกเฟรม ถ้าไม่มีผู้ชมจะคืนค่าทันทีโดยไม่เข้ารหัสภาพ
+    ถ้ามีผู้ชม ภาพจะถูกเข้ารหัสหนึ่งครั้งต่อช่วงเวลา 1/max_fps และแชร์ให้ทุกการเชื่อมต่อ
+    """
+
+    def __init__(self, max_fps: float = 5.0, jpeg_quality: int = 70,
+                 max_width: Optional[int] = None):
+        """
+        เริ่มต้นตัวกระจายภาพตัวอย่าง
+
+        Args:
+            max_fps: อัตราเฟรมสูงสุดของภาพตัวอย่าง
+            jpeg_quality: คุณภาพ JPEG (1-100)
+            max_width: ย่อภาพให้กว้างไม่เกินค่านี้ก่อนเข้ารหัส (None = ไม่ย่อ)
+        """
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self.max_width = max_width
+
+        self._condition = threading.Condition()
+        self._clients = 0
+        self._jpeg: Optional[bytes] = None
+        self._sequence = 0
+        self._last_encode = 0.0
+        self._closed = False
+
+    @property
+    def active(self) -> bool:
+        """True while at least one viewer is connected."""
+        return self._clients > 0
+
+    @property
+    def wants_frame(self) -> bool:
+        """True when a viewer is connected and the next publish() would be encoded."""
+        return self._clients > 0 and time.monotonic() - self._last_encode >= self.min_interval
+
+    @property
+    def clients(self) -> int:
+        """Number of connected viewers."""
+        return self._clients
+
+    def publish(self, frame: np.ndarray) -> bool:
+        """
+        ส่งเฟรมใหม่ให้ผู้ชม (เข้ารหัสเฉพาะเมื่อมีผู้ชมและถึงรอบของอัตราเฟรม)
+
+        Args:
+            frame: เฟรม BGR ที่วาดผลการตรวจจับแล้ว
+
+        Returns:
+            bool: True ถ้าเฟรมถูกเข้ารหัสและส่งออก
+        """
+        # Cheap early exit: nobody is watching
+        if self._clients == 0 or frame is None:
+            return False
+
+        now = time.monotonic()
+        if now - self._last_encode < self.min_interval:
+            return False
+
+        if self.max_width and frame.shape[1] > self.max_width:
+            scale = self.max_width / frame.shape[1]
+            frame = cv2.resize(frame, (self.max_width, int(frame.shape[0] * scale)),
+                               interpolation=cv2.INTER_AREA)
+
+        ok, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            return False
+
+        with self._condition:
+            self._jpeg = buffer.tobytes()
+            self._sequence += 1
+            self._last_encode = now
+            self._condition.notify_all()
+        return True
+
+    def stream(self, timeout: float = 5.0) -> Iterator[bytes]:
+        """
+        ตัวสร้างสำหรับหนึ่งการเชื่อมต่อ ส่งคืนส่วนของ multipart/x-mixed-replace
+
+        Args:
+            timeout: เวลารอเฟรมใหม่สูงสุดก่อนส่งเฟรมล่าสุดซ้ำ (วินาที)
+
+        Yields:
+            bytes: หนึ่งส่วนของสตรีม MJPEG
+        """
+        with self._condition:
+            self._clients += 1
+        try:
+            last_sequence = -1
+            while True:
+                with self._condition:
+                    if not self._closed and self._sequence == last_sequence:
+                        self._condition.wait(timeout)
+                    if self._closed:
+                        return
+                    jpeg, last_sequence = self._jpeg, self._sequence
+
+                if jpeg is None:
+                    continue
+
+                yield (b'--' + MJPEG_BOUNDARY.encode() + b'\r\n'
+                       b'Content-Type: image/jpeg\r\n'
+                       b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' +
+                       jpeg + b'\r\n')
+        finally:
+            with self._condition:
+                self._clients -= 1
+
+    def latest_jpeg(self) -> Optional[bytes]:
+        """The most recently encoded preview frame, if any."""
+        return self._jpeg
+
+    def close(self) -> None:
+        """End all open streams (called on shutdown)."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+ตัวสุ่มตัวอย่างโปรไฟล์ภายในโปรเซสสำหรับระบบ MANTA
+(In-process sampling profiler for MANTA system)
+
+สุ่มอ่านสแต็กของทุกเธรดเป็นระยะจากเธรดแยก โดยไม่หยุดลูปการจับภาพ
+ผลลัพธ์อยู่ในรูปแบบ collapsed stack ที่ใช้กับ flamegraph.pl หรือ speedscope ได้ทันที
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+# Upper bound for a single profiling request
+MAX_PROFILE_SECONDS = 300
+
+
+def _frame_label(frame) -> str:
+    """Label a stack frame as 'function (file.py:line)' without ';' separators."""
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+class SamplingProfiler:
+    """
+    โปรไฟเลอร์แบบสุ่มตัวอย่างสำหรับโปรเซสที่กำลังทำงาน
+
+    อ่าน sys._current_frames() ทุก interval วินาที ซึ่งใช้เวลาเพียงไม่กี่ไมโครวินาที
+    ต่อครั้ง เธรดที่ถูกสุ่มตัวอย่างจะไม่ถูกหยุดหรือแทรกแซง
+    """
+
+    def __init__(self, interval: float = 0.005, threads: Optional[Iterable[str]] = None,
+                 max_depth: int = 128):
+        """
+        เริ่มต้นโปรไฟเลอร์
+
+        Args:
+            interval: ช่วงเวลาระหว่างการสุ่มตัวอย่าง (วินาที)
+            threads: ชื่อเธรดที่จะสุ่ม (None = ทุกเธรดยกเว้นตัวโปรไฟเลอร์เอง)
+            max_depth: ความลึกสูงสุดของสแต็กที่จะเก็บ
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.threads = set(threads) if threads else None
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def _sample_once(self, own_ident: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            thread_name = names.get(ident, f"thread-{ident}")
+            if self.threads is not None and thread_name not in self.threads:
+                continue
+
+            labels = []
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+                depth += 1
+            labels.append(thread_name.replace(';', ':'))
+            labels.reverse()
+            self.stacks[';'.join(labels)] += 1
+        self.samples += 1
+
+    def run(self, seconds: float) -> Dict[str, int]:
+        """
+        สุ่มตัวอย่างในเธรดปัจจุบันเป็นเวลา seconds วินาที
+
+        Args:
+            seconds: ระยะเวลาในการโปรไฟล์ (สูงสุด MAX_PROFILE_SECONDS)
+
+        Returns:
+            dict: collapsed stack -> จำนวนตัวอย่าง
+        """
+        seconds = max(0.0, min(float(seconds), MAX_PROFILE_SECONDS))
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        next_sample = time.monotonic()
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now >= next_sample:
+                self._sample_once(own_ident)
+                next_sample += self.interval
+                # Do not try to catch up after a stall; just resume sampling
+                if next_sample < now:
+                    next_sample = now + self.interval
+            time.sleep(max(0.0, min(next_sample, deadline) - time.monotonic()))
+
+        return dict(self.stacks)
+
+    def collapsed(self) -> str:
+        """
+        ผลลัพธ์ในรูปแบบ collapsed stack (หนึ่งบรรทัดต่อสแต็ก: "a;b;c count")
+
+        Returns:
+            str: ข้อความสำหรับ flamegraph.pl / speedscope
+        """
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+
+def profile_process(seconds: float, interval: float = 0.005,
+                    threads: Optional[Iterable[str]] = None) -> str:
+    """
+    Profile the running process and return collapsed stacks.
+
+    Args:
+        seconds: Duration to sample for
+        interval: Seconds between samples
+        threads: Thread names to include (None for all)
+
+    Returns:
+        Collapsed-stack text
+    """
+    profiler = SamplingProfiler(interval=interval, threads=threads)
+    profiler.run(seconds)
+    return profiler.collapsed()
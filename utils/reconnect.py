@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+ตัวควบคุมการเชื่อมต่อกล้องแบบเครื่องสถานะพร้อม backoff สำหรับระบบ MANTA
+(Supervised camera connection state machine with exponential backoff for MANTA system)
+
+เธรดเดียวเป็นเจ้าของการเชื่อมต่อ: เปิดสตรีม อ่านเฟรมล่าสุด ตรวจสอบสตรีมที่ค้าง และเชื่อมต่อใหม่
+โดยรอเพิ่มขึ้นแบบทวีคูณ ส่วน read() ของลูปหลักเพียงหยิบเฟรมล่าสุดจึงไม่ถูกบล็อกด้วยการเชื่อมต่อ
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# สถานะการเชื่อมต่อ (Connection states)
+DISCONNECTED = 'disconnected'
+CONNECTING = 'connecting'
+CONNECTED = 'connected'
+BACKOFF = 'backoff'
+STOPPED = 'stopped'
+
+# สถานะของผลการอ่าน (Read statuses)
+FRESH = 'fresh'          # เฟรมใหม่ที่ยังไม่เคยส่งออก
+STALE = 'stale'          # ไม่มีเฟรมใหม่ ส่งคืนเฟรมล่าสุดที่เคยได้
+NO_FRAME = 'no_frame'    # ยังไม่เคยได้รับเฟรม
+
+
+class ConnectionSupervisor:
+    """
+    เครื่องสถานะการเชื่อมต่อ: DISCONNECTED → CONNECTING → CONNECTED → BACKOFF → CONNECTING ...
+
+    ทุกการเปลี่ยนสถานะเกิดในเธรดควบคุมเพียงเธรดเดียว จึงไม่มีการแข่งกันเชื่อมต่อ
+    """
+
+    def __init__(self, open_capture: Callable[[], Any], initial_backoff: float = 1.0,
+                 max_backoff: float = 60.0, multiplier: float = 2.0, jitter: float = 0.1,
+                 stale_timeout: float = 10.0, health_check: Optional[Callable[[], bool]] = None,
+                 health_interval: float = 30.0, name: str = 'camera'):
+        """
+        Args:
+            open_capture: ฟังก์ชันที่เปิดสตรีม (อาจใช้เวลานาน) คืนออบเจ็กต์ที่มี read()/release() หรือ None ถ้าล้มเหลว
+            initial_backoff: เวลารอก่อนลองใหม่ครั้งแรก (วินาที)
+            max_backoff: เวลารอสูงสุดระหว่างการลองใหม่ (วินาที)
+            multiplier: ตัวคูณเวลารอเมื่อล้มเหลวติดกัน
+            jitter: สัดส่วนการสุ่มเวลารอ (0.1 = ±10%) เพื่อไม่ให้หลายกล้องเชื่อมต่อพร้อมกัน
+            stale_timeout: ถ้าไม่ได้รับเฟรมนานเท่านี้ (วินาที) ถือว่าสตรีมค้างและเชื่อมต่อใหม่
+            health_check: ฟังก์ชันตรวจสอบเพิ่มเติมระหว่างเชื่อมต่อ (เช่น WiFi) คืน False เพื่อเชื่อมต่อใหม่
+            health_interval: ช่วงเวลาระหว่างการเรียก health_check (วินาที)
+            name: ชื่อสำหรับบันทึกและเธรด
+        """
+        self.open_capture = open_capture
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.stale_timeout = stale_timeout
+        self.health_check = health_check
+        self.health_interval = health_interval
+        self.name = name
+
+        self.state = DISCONNECTED
+        self.capture = None
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.frames = 0
+        self.dropped = 0
+        self.last_capture = None  # (seq, monotonic, wall) ของเฟรมล่าสุดที่ read() ส่งออกเป็น FRESH
+
+        self._frame = None
+        self._frame_time = 0.0
+        self._frame_wall = 0.0
+        self._fresh = False
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def backoff_delay(self, failures: int) -> float:
+        """
+        เวลารอก่อนลองเชื่อมต่อครั้งถัดไป
+
+        Args:
+            failures: จำนวนครั้งที่ล้มเหลวติดกัน
+
+        Returns:
+            float: initial_backoff * multiplier^failures ไม่เกิน max_backoff พร้อมการสุ่ม ±jitter
+        """
+        delay = min(self.max_backoff, self.initial_backoff * self.multiplier ** failures)
+        if self.jitter:
+            delay *= 1.0 + random.uniform(-self.jitter, self.jitter)
+        return delay
+
+    def start(self) -> bool:
+        """
+        เริ่มเธรดควบคุม (เรียกซ้ำได้)
+
+        Returns:
+            bool: True ถ้าเธรดควบคุมทำงานอยู่ False ถ้าเธรดเดิมที่สั่งหยุดแล้วยังไม่จบ
+                  (เช่น ยังค้างอยู่ใน open_capture) จึงยังเริ่มเธรดใหม่ไม่ได้
+        """
+        if self._thread is not None and self._thread.is_alive():
+            if self._stop.is_set():
+                # Clearing the stop flag would revive the old thread next to a new one
+                logger.warning(f"{self.name}: เธรดควบคุมเดิมยังไม่หยุด ยังเริ่มใหม่ไม่ได้")
+                return False
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'{self.name}-supervisor', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """
+        หยุดเธรดควบคุมและปล่อยการเชื่อมต่อ
+
+        Returns:
+            bool: True ถ้าเธรดควบคุมจบแล้ว False ถ้ายังไม่จบภายใน timeout (เธรดจะจบเองเมื่อ open_capture คืนค่า)
+        """
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        # Keep the handle of a thread that is still running so start() does not launch a second one
+        if thread is not None and not thread.is_alive():
+            self._thread = None
+        self._set_state(STOPPED)
+        return self._thread is None
+
+    def wait_connected(self, timeout: float) -> bool:
+        """รอจนเชื่อมต่อสำเร็จไม่เกิน timeout วินาที"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.state != CONNECTED and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self.state == CONNECTED
+
+    def read(self, timeout: float = 0.0) -> Tuple[str, Any]:
+        """
+        หยิบเฟรมล่าสุดโดยไม่เชื่อมต่อหรืออ่านสตรีมเอง
+
+        Args:
+            timeout: เวลารอเฟรมใหม่สูงสุดเมื่อเชื่อมต่ออยู่ (วินาที) ไม่รอเลยเมื่อยังไม่ได้เชื่อมต่อ
+
+        Returns:
+            tuple: (FRESH, เฟรมใหม่), (STALE, เฟรมล่าสุดที่เคยส่งออก) หรือ (NO_FRAME, None)
+        """
+        with self._condition:
+            if not self._fresh and timeout > 0 and self.state == CONNECTED:
+                self._condition.wait(timeout)
+            if self._fresh:
+                self._fresh = False
+                self.last_capture = (self.frames, self._frame_time, self._frame_wall)
+                return FRESH, self._frame
+            if self._frame is not None:
+                return STALE, self._frame
+            return NO_FRAME, None
+
+    @property
+    def frame_age(self) -> Optional[float]:
+        """อายุของเฟรมล่าสุด (วินาที) หรือ None ถ้ายังไม่มีเฟรม"""
+        if self._frame is None:
+            return None
+        return time.monotonic() - self._frame_time
+
+    def _set_state(self, state: str) -> None:
+        with self._condition:
+            if state != self.state:
+                logger.debug(f"{self.name}: {self.state} -> {state}")
+                self.state = state
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        """ลูปของเธรดควบคุม: เปิดสตรีม อ่านเฟรม และรอแบบ backoff เมื่อล้มเหลว"""
+        while not self._stop.is_set():
+            self._set_state(CONNECTING)
+            try:
+                capture = self.open_capture()
+            except Exception as e:
+                logger.error(f"{self.name}: เกิดข้อผิดพลาดขณะเชื่อมต่อ: {e}")
+                capture = None
+
+            if capture is not None:
+                if self._stop.is_set():
+                    capture.release()
+                    break
+                self.failures = 0
+                self.capture = capture
+                self._set_state(CONNECTED)
+                reason = self._grab(capture)
+                self.capture = None
+                capture.release()
+                if self._stop.is_set():
+                    break
+                logger.warning(f"{self.name}: {reason} กำลังเชื่อมต่อใหม่")
+            else:
+                self.failures += 1
+
+            delay = self.backoff_delay(max(self.failures - 1, 0))
+            self.next_attempt = time.monotonic() + delay
+            self._set_state(BACKOFF)
+            if self.failures:
+                logger.warning(f"{self.name}: เชื่อมต่อไม่สำเร็จ {self.failures} ครั้งติดกัน "
+                               f"จะลองใหม่ในอีก {delay:.1f} วินาที")
+            self._stop.wait(delay)
+        self._set_state(STOPPED)
+
+    def _grab(self, capture) -> str:
+        """
+        อ่านเฟรมต่อเนื่องและเก็บเฉพาะเฟรมล่าสุด
+
+        Returns:
+            str: เหตุผลที่หยุดอ่าน (สตรีมค้าง หรือ health_check ล้มเหลว)
+        """
+        last_frame = next_check = time.monotonic()
+        next_check += self.health_interval
+        while not self._stop.is_set():
+            try:
+                ret, frame = capture.read()
+            except Exception as e:
+                logger.error(f"{self.name}: เกิดข้อผิดพลาดขณะอ่านเฟรม: {e}")
+                ret, frame = False, None
+            now = time.monotonic()
+
+            if ret and frame is not None and frame.size > 0:
+                last_frame = now
+                with self._condition:
+                    if self._fresh:
+                        self.dropped += 1
+                    self._frame = frame
+                    self._frame_time = now
+                    self._frame_wall = time.time()
+                    self._fresh = True
+                    self.frames += 1
+                    self._condition.notify_all()
+            elif now - last_frame > self.stale_timeout:
+                return f"ไม่ได้รับเฟรมเป็นเวลา {self.stale_timeout:g} วินาที"
+            else:
+                self._stop.wait(0.01)
+
+            if self.health_check is not None and now >= next_check:
+                next_check = now + self.health_interval
+                if not self.health_check():
+                    return "การตรวจสอบการเชื่อมต่อล้มเหลว"
+        return "หยุดการทำงาน"
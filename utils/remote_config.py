@@ -13,14 +13,23 @@ import time
 import yaml
 import socket
 import ipaddress
+import math
 import subprocess
+import sys
 import netifaces
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
 
+# เพิ่มไดเร็กทอรีหลักลงในพาธ (รองรับการรันไฟล์นี้โดยตรง)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import PROMETHEUS_CONTENT_TYPE
+from utils.profiler import SamplingProfiler, MAX_PROFILE_SECONDS
+from utils.preview import MJPEG_MIMETYPE
+
 # Flask สำหรับ HTTP API
 try:
-    from flask import Flask, request, jsonify, send_file, render_template_string
+    from flask import Flask, Response, request, jsonify, send_file, render_template_string
     from flask_cors import CORS
     from werkzeug.serving import make_server
     from werkzeug.utils import secure_filename
@@ -541,7 +550,9 @@ class RemoteConfigServer:
                  device_name: str = 'MANTA-Camera',
                  enable_zeroconf: bool = True,
                  enable_wifi_direct: bool = False,
-                 wifi_direct_config: Optional[Dict[str, Any]] = None):
+                 wifi_direct_config: Optional[Dict[str, Any]] = None,
+                 metrics=None,
+                 preview=None):
         """
         เริ่มต้นเซิร์ฟเวอร์การกำหนดค่าระยะไกล
         
@@ -553,6 +564,8 @@ class RemoteConfigServer:
             enable_zeroconf: เปิดใช้งานการค้นพบผ่าน Zeroconf/mDNS
             enable_wifi_direct: เปิดใช้งาน WiFi Direct สำหรับการเชื่อมต่อโดยตรง
             wifi_direct_config: การกำหนดค่า WiFi Direct
+            metrics: ตัวชี้วัดของไปป์ไลน์ (PipelineMetrics) สำหรับเส้นทาง /metrics
+            preview: ตัวกระจายภาพตัวอย่าง (PreviewBroadcaster) สำหรับเส้นทาง /stream.mjpg
         """
         # ตรวจสอบว่ามี Flask หรือไม่
         if not FLASK_AVAILABLE:
@@ -577,6 +590,16 @@ class RemoteConfigServer:
             "enabled": False
         }
         
+        # ตัวชี้วัดและภาพตัวอย่างของไปป์ไลน์ (ถ้าเซิร์ฟเวอร์ทำงานในโปรเซสเดียวกับ main())
+        self.metrics = metrics
+        self.preview = preview
+        
+        # อนุญาตการโปรไฟล์ได้ครั้งละหนึ่งคำขอ
+        self._profile_lock = threading.Lock()
+        
+        # ผู้รับการแจ้งเตือนเมื่อการกำหนดค่าเปลี่ยน (เช่น ConfigReloader.submit)
+        self._config_listeners = []
+        
         # โหลดการกำหนดค่าปัจจุบัน
         self.config = self._load_config()
         
@@ -587,8 +610,9 @@ class RemoteConfigServer:
         # ตั้งค่าเส้นทาง (routes)
         self._setup_routes()
         
-        # เตรียม Server สำหรับ Flask
-        self.server = make_server(host, port, self.app)
+        # เตรียม Server สำหรับ Flask (แบบหลายเธรด เพื่อให้คำขอที่ใช้เวลานาน
+        # เช่น การโปรไฟล์ ไม่บล็อกเส้นทางอื่น)
+        self.server = make_server(host, port, self.app, threaded=True)
         self.server_thread = None
         
         # ตั้งค่า Zeroconf สำหรับการค้นพบบริการ
@@ -614,6 +638,24 @@ class RemoteConfigServer:
             logger.error(f"ไม่สามารถโหลดการกำหนดค่าได้: {e}")
             return {}
     
+    def add_config_listener(self, listener) -> None:
+        """
+        ลงทะเบียนฟังก์ชันที่จะถูกเรียกเมื่อบันทึกการกำหนดค่าใหม่สำเร็จ
+        
+        Args:
+            listener: ฟังก์ชันที่รับการกำหนดค่าใหม่ทั้งหมด (เรียกจากเธรดของเซิร์ฟเวอร์)
+        """
+        self._config_listeners.append(listener)
+    
+    def _notify_config_listeners(self, config: Dict[str, Any]) -> bool:
+        """แจ้งผู้รับว่าการกำหนดค่าเปลี่ยน ส่งคืน True ถ้ามีผู้รับอย่างน้อยหนึ่งราย"""
+        for listener in self._config_listeners:
+            try:
+                listener(config)
+            except Exception as e:
+                logger.error(f"ไม่สามารถแจ้งการเปลี่ยนแปลงการกำหนดค่าได้: {e}")
+        return bool(self._config_listeners)
+    
     def _save_config(self, config: Dict[str, Any]) -> bool:
         """บันทึกการกำหนดค่าไปยังไฟล์"""
         try:
@@ -687,7 +729,11 @@ class RemoteConfigServer:
                         wifi_config = merged_config.get('wifi_direct', {})
                         self._update_wifi_direct(wifi_config)
                     
-                    return jsonify({"success": True, "message": "บันทึกการกำหนดค่าสำเร็จ"})
+                    # นำการกำหนดค่าใหม่ไปใช้กับไปป์ไลน์ที่ทำงานอยู่โดยไม่ต้องรีสตาร์ท
+                    applied_live = self._notify_config_listeners(merged_config)
+                    
+                    return jsonify({"success": True, "message": "บันทึกการกำหนดค่าสำเร็จ",
+                                    "applied_live": applied_live})
                 else:
                     return jsonify({"success": False, "error": "ไม่สามารถบันทึกการกำหนดค่าได้"}), 500
             except Exception as e:
@@ -734,6 +780,58 @@ class RemoteConfigServer:
                 logger.error(f"เกิดข้อผิดพลาดในการรับข้อมูลระบบ: {e}")
                 return jsonify({"success": False, "error": str(e)}), 500
         
+        # ตัวชี้วัดสำหรับ Prometheus
+        @app.route('/metrics', methods=['GET'])
+        def metrics():
+            if self.metrics is None:
+                return Response("# metrics are only available when running inside camera/main.py\n",
+                                status=404, mimetype='text/plain')
+            return Response(self.metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+        
+        # ภาพตัวอย่างสดแบบ MJPEG
+        @app.route('/stream.mjpg', methods=['GET'])
+        def preview_stream():
+            if self.preview is None:
+                return jsonify({"success": False, "error": "ภาพตัวอย่างไม่ได้เปิดใช้งาน"}), 404
+            response = Response(self.preview.stream(), mimetype=MJPEG_MIMETYPE)
+            response.headers['Cache-Control'] = 'no-cache, private'
+            return response
+        
+        # API: โปรไฟล์โปรเซสที่กำลังทำงาน (collapsed stack สำหรับ flamegraph)
+        @app.route('/api/debug/profile', methods=['GET', 'POST'])
+        def profile_process():
+            try:
+                seconds = float(request.args.get('seconds', 10))
+                interval_ms = float(request.args.get('interval_ms', 5))
+                thread_names = request.args.get('threads')
+                if not math.isfinite(seconds) or not 0 < seconds <= MAX_PROFILE_SECONDS:
+                    return jsonify({"success": False,
+                                    "error": f"seconds ต้องอยู่ระหว่าง 0 ถึง {MAX_PROFILE_SECONDS}"}), 400
+                if not math.isfinite(interval_ms) or interval_ms < 1:
+                    return jsonify({"success": False, "error": "interval_ms ต้องไม่น้อยกว่า 1"}), 400
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            
+            if not self._profile_lock.acquire(blocking=False):
+                return jsonify({"success": False, "error": "กำลังโปรไฟล์อยู่แล้ว"}), 409
+            
+            try:
+                profiler = SamplingProfiler(
+                    interval=interval_ms / 1000.0,
+                    threads=thread_names.split(',') if thread_names else None
+                )
+                profiler.run(seconds)
+                logger.info(f"โปรไฟล์เสร็จสิ้น: {profiler.samples} ตัวอย่างใน {seconds} วินาที")
+                
+                filename = f"manta-profile-{time.strftime('%Y%m%d_%H%M%S')}.folded"
+                return Response(profiler.collapsed(), mimetype='text/plain',
+                                headers={'Content-Disposition': f'attachment; filename={filename}'})
+            except Exception as e:
+                logger.error(f"เกิดข้อผิดพลาดในการโปรไฟล์: {e}")
+                return jsonify({"success": False, "error": str(e)}), 500
+            finally:
+                self._profile_lock.release()
+        
         # API: รีสตาร์ทบริการ
         @app.route('/api/system/restart', methods=['POST'])
         def restart_service():
@@ -815,8 +913,10 @@ class RemoteConfigServer:
                     
                     # โหลดการกำหนดค่าใหม่
                     self.config = self._load_config()
+                    applied_live = self._notify_config_listeners(self.config)
                     
-                    return jsonify({"success": True, "message": "อัปโหลดการกำหนดค่าสำเร็จ"})
+                    return jsonify({"success": True, "message": "อัปโหลดการกำหนดค่าสำเร็จ",
+                                    "applied_live": applied_live})
                 except Exception as e:
                     # ลบไฟล์ชั่วคราวในกรณีที่มีข้อผิดพลาด
                     if os.path.exists(temp_path):
@@ -1214,6 +1314,10 @@ dhcp-range=192.168.42.2,192.168.42.20,255.255.255.0,24h
     
     def stop(self):
         """หยุดการทำงานของเซิร์ฟเวอร์การกำหนดค่าระยะไกล"""
+        # ปิดสตรีมภาพตัวอย่างที่เปิดค้างอยู่ เพื่อให้เซิร์ฟเวอร์หยุดได้
+        if self.preview is not None:
+            self.preview.close()
+        
         if self.zeroconf and self.zeroconf_info:
             self.zeroconf.unregister_service(self.zeroconf_info)
             self.zeroconf.close()
@@ -1229,7 +1333,9 @@ dhcp-range=192.168.42.2,192.168.42.20,255.255.255.0,24h
 
 def setup_remote_config(config_path: str, 
                         enable_wifi_direct: bool = False, 
-                        port: int = 8080) -> RemoteConfigServer:
+                        port: int = 8080,
+                        metrics=None,
+                        preview=None) -> RemoteConfigServer:
     """
     ตั้งค่าและเริ่มเซิร์ฟเวอร์การกำหนดค่าระยะไกล
     
@@ -1237,6 +1343,8 @@ def setup_remote_config(config_path: str,
         config_path: พาธไปยังไฟล์การกำหนดค่า YAML
         enable_wifi_direct: เปิดใช้งาน WiFi Direct
         port: พอร์ตที่จะให้บริการ
+        metrics: ตัวชี้วัดของไปป์ไลน์สำหรับเส้นทาง /metrics
+        preview: ตัวกระจายภาพตัวอย่างสำหรับเส้นทาง /stream.mjpg
     
     Returns:
         RemoteConfigServer: อ็อบเจกต์เซิร์ฟเวอร์
@@ -1255,7 +1363,9 @@ def setup_remote_config(config_path: str,
     # สร้างและเริ่มเซิร์ฟเวอร์
     server = RemoteConfigServer(config_path, 
                                enable_wifi_direct=enable_wifi_direct,
-                               port=port)
+                               port=port,
+                               metrics=metrics,
+                               preview=preview)
     server.start()
     
     return server
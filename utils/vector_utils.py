@@ -10,6 +10,13 @@
 import numpy as np
 from typing import List, Tuple, Union, Optional
 
+# Optimal assignment for threshold_match(method='hungarian'); greedy matching is used without it
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     """
     Calculate cosine similarity between two vectors.
@@ -118,3 +125,175 @@ def average_vectors(vectors: List[np.ndarray]) -> Optional[np.ndarray]:
     # Compute average
     avg = np.mean(vectors, axis=0)
     return avg
+
+
+# Batched primitives. Inputs may be float32, float16 or int8 (computed in float32);
+# outputs are float32 and can be written into preallocated arrays via `out`.
+
+def _as_float32(vectors: np.ndarray) -> np.ndarray:
+    """View float32 input as is; convert float16/int8 (and lists) to a float32 array."""
+    return np.asarray(vectors, dtype=np.float32)
+
+def _output(out: Optional[np.ndarray], shape: Tuple[int, ...]) -> np.ndarray:
+    """Return `out` after checking it matches `shape`, or a new float32 array."""
+    if out is None:
+        return np.empty(shape, dtype=np.float32)
+    if out.shape != shape or out.dtype != np.float32:
+        raise ValueError(f"out must be a float32 array of shape {shape}, got {out.dtype} {out.shape}")
+    return out
+
+def normalize_rows(vectors: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Normalize each row of a matrix to unit length.
+    
+    Float32 input is normalized in place unless `out` is given; float16/int8 input
+    is written to `out` (or a new float32 array). Zero rows stay zero.
+    
+    Args:
+        vectors: (N, D) matrix
+        out: Optional (N, D) float32 output (may be `vectors` itself)
+        
+    Returns:
+        The normalized float32 matrix
+    """
+    if out is None and isinstance(vectors, np.ndarray) and vectors.dtype == np.float32:
+        out = vectors
+    out = _output(out, np.shape(vectors))
+    if out is not vectors:
+        out[...] = vectors
+    norms = np.sqrt(np.einsum('ij,ij->i', out, out))
+    np.maximum(norms, 1e-12, out=norms)
+    out /= norms[:, np.newaxis]
+    return out
+
+def pairwise_cosine(a: np.ndarray, b: np.ndarray, out: Optional[np.ndarray] = None,
+                    normalized: bool = False) -> np.ndarray:
+    """
+    Cosine similarity between every row of `a` and every row of `b`.
+    
+    Args:
+        a: (N, D) matrix
+        b: (M, D) matrix
+        out: Optional (N, M) float32 output
+        normalized: Rows are already unit length (skips the norms)
+        
+    Returns:
+        (N, M) float32 similarities in [-1, 1]; 0 for zero rows
+    """
+    a, b = _as_float32(a), _as_float32(b)
+    out = _output(out, (len(a), len(b)))
+    np.matmul(a, b.T, out=out)
+    if not normalized:
+        norms_a = np.maximum(np.sqrt(np.einsum('ij,ij->i', a, a)), 1e-12)
+        norms_b = np.maximum(np.sqrt(np.einsum('ij,ij->i', b, b)), 1e-12)
+        out /= norms_a[:, np.newaxis]
+        out /= norms_b[np.newaxis, :]
+    return out
+
+def pairwise_euclidean(a: np.ndarray, b: np.ndarray, out: Optional[np.ndarray] = None,
+                       squared: bool = False) -> np.ndarray:
+    """
+    Euclidean distance between every row of `a` and every row of `b`.
+    
+    Uses |a|^2 + |b|^2 - 2 a.b, so no (N, M, D) temporary is created.
+    
+    Args:
+        a: (N, D) matrix
+        b: (M, D) matrix
+        out: Optional (N, M) float32 output
+        squared: Return squared distances (skips the square root)
+        
+    Returns:
+        (N, M) float32 distances
+    """
+    a, b = _as_float32(a), _as_float32(b)
+    out = _output(out, (len(a), len(b)))
+    np.matmul(a, b.T, out=out)
+    out *= -2.0
+    out += np.einsum('ij,ij->i', a, a)[:, np.newaxis]
+    out += np.einsum('ij,ij->i', b, b)[np.newaxis, :]
+    np.maximum(out, 0.0, out=out)
+    if not squared:
+        np.sqrt(out, out=out)
+    return out
+
+def top_k(scores: np.ndarray, k: int, largest: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best k entries of each row, found with argpartition and sorted best first.
+    
+    Args:
+        scores: (N, M) matrix (e.g. from pairwise_cosine)
+        k: Number of entries per row
+        largest: Best means largest (similarities) or smallest (distances)
+        
+    Returns:
+        Tuple of (values (N, k) float32, indices (N, k) int64); when M < k the
+        missing entries are padded with -inf (inf if not largest) and -1
+    """
+    scores = np.asarray(scores)
+    rows, columns = scores.shape
+    values = np.full((rows, k), -np.inf if largest else np.inf, dtype=np.float32)
+    indices = np.full((rows, k), -1, dtype=np.int64)
+    count = min(k, columns)
+    if count == 0 or rows == 0:
+        return values, indices
+    
+    keys = -scores if largest else scores
+    if count == 1:
+        best = keys.argmin(axis=1)[:, np.newaxis]
+    else:
+        if count < columns:
+            best = np.argpartition(keys, count - 1, axis=1)[:, :count]
+        else:
+            best = np.broadcast_to(np.arange(columns), (rows, columns))
+        order = np.argsort(np.take_along_axis(keys, best, axis=1), axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+    values[:, :count] = np.take_along_axis(scores, best, axis=1)
+    indices[:, :count] = best
+    return values, indices
+
+def threshold_match(scores: np.ndarray, threshold: float, largest: bool = True,
+                    method: str = 'greedy') -> List[Tuple[int, int]]:
+    """
+    One-to-one matching of rows to columns whose score passes a threshold.
+    
+    'greedy' takes the best remaining pair first (ties in row-major order);
+    'hungarian' maximizes the total score (requires scipy, falls back to greedy).
+    
+    Args:
+        scores: (N, M) similarities (largest=True) or distances (largest=False)
+        threshold: Minimum similarity / maximum distance of a match
+        largest: Whether larger scores are better
+        method: 'greedy' or 'hungarian'
+        
+    Returns:
+        List of (row, column) pairs; greedy pairs are in match order, Hungarian by row
+    """
+    if method not in ('greedy', 'hungarian'):
+        raise ValueError(f"Unknown matching method: {method}")
+    scores = np.asarray(scores, dtype=np.float32)
+    allowed = scores >= threshold if largest else scores <= threshold
+    if scores.size == 0 or not allowed.any():
+        return []
+    
+    if method == 'hungarian':
+        if SCIPY_AVAILABLE:
+            # Disallowed pairs get a cost worse than any allowed one, then are dropped
+            worst = scores[allowed].min() - 1.0 if largest else scores[allowed].max() + 1.0
+            rows, columns = linear_sum_assignment(np.where(allowed, scores, worst), maximize=largest)
+            keep = allowed[rows, columns]
+            return list(zip(rows[keep].tolist(), columns[keep].tolist()))
+        print("Warning: scipy not available, using greedy matching")
+    
+    candidates = np.flatnonzero(allowed.ravel())
+    order = np.argsort(-scores.ravel()[candidates] if largest else scores.ravel()[candidates], kind='stable')
+    row_used = np.zeros(scores.shape[0], dtype=bool)
+    column_used = np.zeros(scores.shape[1], dtype=bool)
+    pairs = []
+    for flat in candidates[order].tolist():
+        row, column = divmod(flat, scores.shape[1])
+        if row_used[row] or column_used[column]:
+            continue
+        row_used[row] = column_used[column] = True
+        pairs.append((row, column))
+    return pairs
@@ -10,13 +10,15 @@ import os
 import time
 import logging
 import subprocess
-import threading
 import cv2
 import numpy as np
 import yaml
 import netifaces
 import wifi
 
+from utils.gst_pipeline import candidate_pipelines, gstreamer_available, open_capture
+from utils.reconnect import CONNECTED, FRESH, ConnectionSupervisor
+
 logger = logging.getLogger(__name__)
 
 class WebcamConnection:
@@ -43,6 +45,8 @@ class WebcamConnection:
         self.camera_url = self.config.get('camera', {}).get('source', 'rtmp://192.168.42.1:1935/live/stream')
         self.retry_interval = self.config.get('camera', {}).get('retry_interval', 5)
         self.connection_timeout = self.config.get('camera', {}).get('connection_timeout', 10)
+        self.decoder = None  # ตัวถอดรหัส GStreamer ที่ใช้งานอยู่ (None = FFmpeg)
+        self.frame_interval = 1.0 / max(self.config.get('camera', {}).get('fps', 30), 1)
         
         # การกำหนดค่า WiFi
         self.wifi_config = self.config.get('wifi', {})
@@ -52,16 +56,42 @@ class WebcamConnection:
         self.backup_ssid = self.wifi_config.get('backup_network_ssid', '')
         self.backup_password = self.wifi_config.get('backup_network_password', '')
         
-        # สถานะการเชื่อมต่อ
-        self.cap = None
-        self.connected = False
-        self.should_reconnect = True
-        self.reconnect_thread = None
-        self.last_frame = None
-        self.last_frame_time = 0
-        
         # ตรวจสอบการติดตั้ง NetworkManager หรือ wpa_supplicant
         self._check_wifi_tools()
+        
+        # ตัวควบคุมการเชื่อมต่อ: เธรดเดียวเปิดสตรีม อ่านเฟรม และเชื่อมต่อใหม่แบบ backoff
+        camera_config = self.config.get('camera', {})
+        check_wifi = self.wifi_enabled and self.wifi_config.get('auto_reconnect', True)
+        self.supervisor = ConnectionSupervisor(
+            self._open,
+            initial_backoff=self.retry_interval,
+            max_backoff=camera_config.get('max_retry_interval', 60),
+            stale_timeout=camera_config.get('stale_timeout', 10),
+            health_check=self._check_wifi_connection if check_wifi else None,
+            health_interval=self.wifi_config.get('connection_check_interval', 30),
+            name=str(camera_config.get('id', 'webcam'))
+        )
+        self.stopped = False  # True หลัง disconnect() จนกว่าจะเรียก connect() อีกครั้ง
+    
+    @property
+    def state(self):
+        """สถานะการเชื่อมต่อปัจจุบัน (ดู utils.reconnect)"""
+        return self.supervisor.state
+    
+    @property
+    def connected(self):
+        """เชื่อมต่อกับกล้องอยู่หรือไม่"""
+        return self.supervisor.state == CONNECTED
+    
+    @property
+    def last_capture(self):
+        """(seq, monotonic, wall) ตอนจับภาพเฟรมล่าสุดที่ read() ส่งออก สำหรับ FrameStamper"""
+        return self.supervisor.last_capture
+    
+    @property
+    def cap(self):
+        """cv2.VideoCapture ที่ใช้งานอยู่ หรือ None ถ้ายังไม่ได้เชื่อมต่อ"""
+        return self.supervisor.capture
     
     def _check_wifi_tools(self):
         """ตรวจสอบเครื่องมือการจัดการ WiFi ที่มีอยู่"""
@@ -171,11 +201,29 @@ class WebcamConnection:
             logger.error(f"เกิดข้อผิดพลาดขณะเชื่อมต่อกับ WiFi สำรอง: {e}")
             return False
     
-    def connect(self):
-        """เชื่อมต่อกับกล้อง"""
-        if self.connected and self.cap is not None and self.cap.isOpened():
-            return True
+    def connect(self, timeout=None):
+        """
+        เริ่มตัวควบคุมการเชื่อมต่อและรอจนเชื่อมต่อสำเร็จ
+        
+        Args:
+            timeout (float, optional): เวลารอสูงสุด (วินาที) None = connection_timeout, 0 = ไม่รอ
+        
+        Returns:
+            bool: True ถ้าเชื่อมต่อแล้ว (ถ้า False ตัวควบคุมยังคงลองเชื่อมต่อในเบื้องหลัง)
+        """
+        self.stopped = False
+        self.supervisor.start()
+        if timeout is None:
+            timeout = self.connection_timeout
+        return self.supervisor.wait_connected(timeout)
+    
+    def _open(self):
+        """
+        เปิดสตรีมจากกล้อง เรียกจากเธรดของตัวควบคุมเท่านั้น จึงใช้เวลานานได้โดยไม่บล็อกลูปหลัก
         
+        Returns:
+            cv2.VideoCapture: สตรีมที่อ่านเฟรมแรกได้แล้ว หรือ None ถ้าเชื่อมต่อไม่สำเร็จ
+        """
         # เชื่อมต่อกับ WiFi ของกล้องถ้าเปิดใช้งาน
         if self.wifi_enabled:
             wifi_connected = self.connect_to_camera_wifi()
@@ -184,92 +232,100 @@ class WebcamConnection:
         
         logger.info(f"กำลังเชื่อมต่อกับกล้องที่ URL: {self.camera_url}")
         
+        cap = self._open_gstreamer()
+        if cap is not None:
+            return cap
+        
+        self.decoder = None
+        cap = None
         try:
             # ตั้งค่า OpenCV VideoCapture สำหรับสตรีม RTMP
-            self.cap = cv2.VideoCapture(self.camera_url)
+            cap = cv2.VideoCapture(self.camera_url)
             
             # ตั้งค่าคุณสมบัติเพิ่มเติม
             if self.config.get('camera', {}).get('enable_hardware_decode', False):
                 # เปิดใช้การถอดรหัสด้วยฮาร์ดแวร์ถ้ามี
-                self.cap.set(cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY)
+                cap.set(cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY)
             
             # ตั้งค่าความละเอียด
             width = self.config.get('camera', {}).get('resolution', {}).get('width', 1920)
             height = self.config.get('camera', {}).get('resolution', {}).get('height', 1080)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
             
             # ตั้งค่า FPS
             fps = self.config.get('camera', {}).get('fps', 30)
-            self.cap.set(cv2.CAP_PROP_FPS, fps)
+            cap.set(cv2.CAP_PROP_FPS, fps)
             
             # ตรวจสอบว่าการเชื่อมต่อสำเร็จหรือไม่โดยการอ่านเฟรมแรก
-            start_time = time.time()
-            success = False
-            
-            while time.time() - start_time < self.connection_timeout:
-                ret, frame = self.cap.read()
+            deadline = time.monotonic() + self.connection_timeout
+            while time.monotonic() < deadline:
+                ret, frame = cap.read()
                 if ret and frame is not None and frame.size > 0:
-                    success = True
-                    self.last_frame = frame
-                    self.last_frame_time = time.time()
-                    break
+                    logger.info(f"เชื่อมต่อกับกล้องสำเร็จ ความละเอียด: {frame.shape[1]}x{frame.shape[0]}")
+                    return cap
                 time.sleep(0.5)
             
-            if not success:
-                logger.error(f"ไม่สามารถเชื่อมต่อกับกล้องที่ URL: {self.camera_url}")
-                self.disconnect()
-                return False
-            
-            self.connected = True
-            logger.info(f"เชื่อมต่อกับกล้องสำเร็จ ความละเอียด: {int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}")
-            
-            # เริ่มวงเวียนลูปเชื่อมต่อใหม่ในเธรดแยกต่างหาก
-            self.should_reconnect = True
-            if self.reconnect_thread is None or not self.reconnect_thread.is_alive():
-                self.reconnect_thread = threading.Thread(target=self._reconnect_loop, daemon=True)
-                self.reconnect_thread.start()
-            
-            return True
-            
+            logger.error(f"ไม่สามารถเชื่อมต่อกับกล้องที่ URL: {self.camera_url}")
         except Exception as e:
             logger.error(f"เกิดข้อผิดพลาดขณะเชื่อมต่อกับกล้อง: {e}")
-            self.disconnect()
-            return False
+        
+        if cap is not None:
+            cap.release()
+        return None
+    
+    def _open_gstreamer(self):
+        """
+        เปิดสตรีมผ่านไปป์ไลน์ GStreamer (ถอดรหัสด้วยฮาร์ดแวร์ก่อน แล้วจึงซอฟต์แวร์)
+        
+        Returns:
+            cv2.VideoCapture: สตรีมที่อ่านเฟรมแรกได้แล้ว หรือ None ให้ใช้ FFmpeg แทน
+        """
+        camera_config = self.config.get('camera', {})
+        if camera_config.get('decoder', 'ffmpeg') != 'gstreamer':
+            return None
+        if not gstreamer_available():
+            logger.warning("OpenCV ไม่รองรับ GStreamer จะใช้ FFmpeg แทน")
+            return None
+        
+        # ย่อขนาดที่ฝั่งตัวถอดรหัสให้เท่าความละเอียดที่กำหนด
+        resolution = camera_config.get('resolution', {})
+        candidates = candidate_pipelines(
+            self.camera_url,
+            codec=camera_config.get('codec', 'h264'),
+            hardware=camera_config.get('enable_hardware_decode', False),
+            decoders=camera_config.get('gstreamer_decoders'),
+            width=resolution.get('width'),
+            height=resolution.get('height'),
+            latency=camera_config.get('gstreamer_latency', 200)
+        )
+        cap, decoder, frame = open_capture(candidates, timeout=self.connection_timeout)
+        if cap is None:
+            logger.warning("ไม่สามารถเปิดไปป์ไลน์ GStreamer ได้ จะใช้ FFmpeg แทน")
+            return None
+        
+        logger.info(f"เชื่อมต่อกับกล้องสำเร็จผ่าน GStreamer ตัวถอดรหัส: {decoder} "
+                    f"ความละเอียด: {frame.shape[1]}x{frame.shape[0]}")
+        self.decoder = decoder
+        return cap
     
     def disconnect(self):
-        """ตัดการเชื่อมต่อจากกล้อง"""
-        self.connected = False
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        """ตัดการเชื่อมต่อจากกล้องและหยุดการเชื่อมต่อใหม่ (read() จะไม่เริ่มเชื่อมต่อเองจนกว่าจะเรียก connect())"""
+        self.stopped = True
+        self.supervisor.stop()
+        self.decoder = None
         
         logger.info("ตัดการเชื่อมต่อจากกล้องแล้ว")
     
-    def _reconnect_loop(self):
-        """ลูปที่ตรวจสอบการเชื่อมต่อและทำการเชื่อมต่อใหม่หากจำเป็น"""
-        while self.should_reconnect:
-            if not self.connected or self.cap is None or not self.cap.isOpened():
-                logger.info("ตรวจพบการขาดการเชื่อมต่อ กำลังพยายามเชื่อมต่อใหม่...")
-                self.disconnect()  # ตัดการเชื่อมต่อที่อาจทำงานไม่ถูกต้อง
-                self.connect()
-            elif time.time() - self.last_frame_time > 10:  # หากไม่ได้รับเฟรมเป็นเวลา 10 วินาที
-                logger.warning("ไม่ได้รับเฟรมล่าสุดเป็นเวลา 10 วินาที กำลังเชื่อมต่อใหม่...")
-                self.disconnect()
-                self.connect()
-            
-            # ตรวจสอบการเชื่อมต่อ WiFi เป็นระยะ
-            if self.wifi_enabled and self.wifi_config.get('auto_reconnect', True):
-                wifi_check_interval = self.wifi_config.get('connection_check_interval', 30)
-                if int(time.time()) % wifi_check_interval == 0:
-                    self._check_wifi_connection()
-            
-            time.sleep(self.retry_interval)
-    
     def _check_wifi_connection(self):
-        """ตรวจสอบการเชื่อมต่อ WiFi และเชื่อมต่อใหม่ถ้าจำเป็น"""
+        """
+        ตรวจสอบการเชื่อมต่อ WiFi ของกล้อง (เรียกเป็นระยะจากเธรดของตัวควบคุม)
+        
+        Returns:
+            bool: False เมื่อหลุดจาก WiFi ของกล้อง ตัวควบคุมจะตัดสตรีมและเชื่อมต่อใหม่ (รวมถึง WiFi)
+        """
         if not (self.nm_available or self.wpa_available):
-            return
+            return True
         
         try:
             # ตรวจสอบว่ากำลังเชื่อมต่อกับเครือข่ายที่ถูกต้องหรือไม่
@@ -287,47 +343,39 @@ class WebcamConnection:
                 else:
                     connected_to_camera = False
             
-            if not connected_to_camera and self.connected:
+            if not connected_to_camera:
                 logger.warning("ขาดการเชื่อมต่อ WiFi ของกล้อง กำลังพยายามเชื่อมต่อใหม่...")
-                self.disconnect()
-                self.connect_to_camera_wifi()
-                self.connect()
+                return False
                 
         except Exception as e:
             logger.error(f"เกิดข้อผิดพลาดขณะตรวจสอบการเชื่อมต่อ WiFi: {e}")
+        return True
     
-    def read(self):
+    def read(self, timeout=None):
         """
-        อ่านเฟรมจากกล้อง
+        อ่านเฟรมล่าสุดจากกล้องโดยไม่บล็อก การเชื่อมต่อและเชื่อมต่อใหม่ทำในเธรดของตัวควบคุม
+        
+        Args:
+            timeout (float, optional): เวลารอเฟรมใหม่สูงสุดขณะเชื่อมต่ออยู่ (วินาที)
+                                       None = หนึ่งช่วงเฟรม, ไม่รอเลยเมื่อยังไม่ได้เชื่อมต่อ
         
         Returns:
             tuple: (success, frame) คล้ายกับ cv2.VideoCapture.read()
+                   success เป็น False เมื่อไม่มีเฟรมใหม่ โดย frame เป็นเฟรมล่าสุดที่เคยได้ (หรือ None)
         """
-        if not self.connected or self.cap is None or not self.cap.isOpened():
-            if not self.connect():
-                return False, None
+        status, frame = self.read_status(timeout)
+        return status == FRESH, frame
+    
+    def read_status(self, timeout=None):
+        """
+        อ่านเฟรมล่าสุดพร้อมสถานะ
         
-        try:
-            ret, frame = self.cap.read()
-            if ret and frame is not None and frame.size > 0:
-                self.last_frame = frame.copy()
-                self.last_frame_time = time.time()
-                return True, frame
-            else:
-                # เกิดข้อผิดพลาดในการอ่านเฟรม ส่งคืนเฟรมล่าสุดที่สำเร็จถ้ามี
-                if self.last_frame is not None:
-                    logger.warning("ไม่สามารถอ่านเฟรมใหม่ได้ ส่งคืนเฟรมล่าสุด")
-                    return True, self.last_frame
-                else:
-                    logger.error("ไม่สามารถอ่านเฟรมได้และไม่มีเฟรมล่าสุด")
-                    return False, None
-        except Exception as e:
-            logger.error(f"เกิดข้อผิดพลาดขณะอ่านเฟรมจากกล้อง: {e}")
-            # เกิดข้อผิดพลาด ส่งคืนเฟรมล่าสุดที่สำเร็จถ้ามี
-            if self.last_frame is not None:
-                return True, self.last_frame
-            else:
-                return False, None
+        Returns:
+            tuple: (status, frame) โดย status เป็น FRESH, STALE หรือ NO_FRAME (ดู utils.reconnect)
+        """
+        if not self.stopped:
+            self.supervisor.start()
+        return self.supervisor.read(self.frame_interval if timeout is None else timeout)
     
     def get_camera_properties(self):
         """
@@ -336,7 +384,8 @@ class WebcamConnection:
         Returns:
             dict: คุณสมบัติของกล้อง (ความกว้าง, ความสูง, FPS)
         """
-        if not self.connected or self.cap is None:
+        cap = self.cap
+        if not self.connected or cap is None:
             return {
                 'width': self.config.get('camera', {}).get('resolution', {}).get('width', 1920),
                 'height': self.config.get('camera', {}).get('resolution', {}).get('height', 1080),
@@ -344,9 +393,9 @@ class WebcamConnection:
             }
         
         try:
-            width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
             
             return {
                 'width': width,
@@ -362,10 +411,8 @@ class WebcamConnection:
     
     def __del__(self):
         """ตัวทำลายออบเจ็กต์"""
-        self.should_reconnect = False
-        if self.reconnect_thread and self.reconnect_thread.is_alive():
-            self.reconnect_thread.join(timeout=1.0)
-        self.disconnect()
+        if getattr(self, 'supervisor', None) is not None:
+            self.supervisor.stop(timeout=1.0)
 
 
 def create_insta360_connection(config=None):
@@ -431,7 +478,7 @@ def test_insta360_connection(config_path=None):
                     cv2.imshow('Insta360 Go 3S Test', display_frame)
                     if cv2.waitKey(1) & 0xFF == ord('q'):
                         break
-                else:
+                elif not connection.connected:
                     print("ไม่สามารถอ่านเฟรมได้ กำลังลองใหม่...")
                     time.sleep(1)
         finally: